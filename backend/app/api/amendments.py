@@ -1,13 +1,24 @@
 from fastapi import APIRouter, HTTPException
-from app.core.amendments import get_deal_versions, compare_versions
+from app.core.amendments import get_deal_lineage, get_covenant_timeline, compare_versions, diff_cache
 from typing import List
 
 router = APIRouter()
 
 @router.get("/{base_deal_name}/versions")
 def list_versions(base_deal_name: str):
-    versions = get_deal_versions(base_deal_name)
-    return {"versions": versions}
+    lineage = get_deal_lineage(base_deal_name)
+    return {"versions": [v['filename'] for v in lineage], "lineage": lineage}
+
+@router.get("/{base_deal_name}/timeline")
+def covenant_timeline(base_deal_name: str):
+    timeline = get_covenant_timeline(base_deal_name)
+    if not timeline['versions']:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    return timeline
+
+@router.get("/cache/stats")
+def get_diff_cache_stats():
+    return diff_cache.get_stats()
 
 @router.get("/compare")
 def compare(v1: str, v2: str):
@@ -1,13 +1,29 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File
 from pydantic import BaseModel
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any, Tuple
+import asyncio
+import codecs
+import hashlib
 import os
+import time
+from app.core.clause_index import clause_index
+from app.core.jobs import JobQueue
+from app.core.metrics import span
 from app.core.risk_engine import RiskEngine
+from app.core.result_cache import ResultCache, document_hash
+from app.core.templates import TemplateRegistry
+from app.core.uploads import MultipartFileStream, UploadError, UploadTooLarge
+from app.core.workers import analyze_in_worker, get_process_pool, parse_document, run_blocking
 
 router = APIRouter()
 risk_engine = RiskEngine()
+result_cache = ResultCache(max_entries=int(os.getenv("RESULT_CACHE_SIZE", "256")))
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+MULTI_MAX_TEMPLATES = int(os.getenv("MULTI_MAX_TEMPLATES", "10"))
+
+template_registry = TemplateRegistry(risk_engine, os.path.join(DATA_DIR, "templates"))
 
 class AnalysisRequest(BaseModel):
     deal_text: Optional[str] = None
@@ -39,20 +55,40 @@ def get_sample_deals():
     files = [f for f in os.listdir(samples_dir) if f.endswith(".txt")]
     return {"samples": files}
 
-@router.post("/", response_model=AnalysisResult)
-async def analyze_deal(request: AnalysisRequest):
-    # Load Template
-    template_path = os.path.join(DATA_DIR, "templates", request.template_id)
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=404, detail="Template not found")
-    
-    with open(template_path, "r") as f:
-        template_text = f.read()
+class JobRequest(AnalysisRequest):
+    # "bulk" for background re-scores; they never delay interactive jobs
+    priority: Literal["interactive", "bulk"] = "interactive"
 
-    # Load Deal Text
-    deal_text = ""
-    deal_name = "Uploaded Document"
+class BatchAnalysisRequest(BaseModel):
+    deals: List[AnalysisRequest]
+
+class BatchAnalysisResult(BaseModel):
+    results: List[AnalysisResult]
+    wall_time_ms: float
 
+class MultiAnalysisRequest(BaseModel):
+    deal_text: Optional[str] = None
+    sample_deal_id: Optional[str] = None
+    template_ids: List[str]
+
+class MultiAnalysisResult(BaseModel):
+    deal_name: str
+    results: List[AnalysisResult]
+    # One row per clause finding: the deal's value and each template's verdict on it
+    matrix: List[dict]
+    parse_ms: float
+    score_ms: float
+
+def _load_template(template_id: str) -> dict:
+    # Served from memory; the registry only re-stats files every few seconds
+    with span('template_load'):
+        template = template_registry.get(template_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template
+
+def _load_deal(request: AnalysisRequest) -> Tuple[str, str]:
+    """Returns (deal_name, deal_text) for a request"""
     if request.sample_deal_id:
         # Validate filename to prevent path traversal attacks
         import re
@@ -70,33 +106,315 @@ async def analyze_deal(request: AnalysisRequest):
         with open(resolved_path, "r") as f:
             deal_text = f.read()
         deal_name = request.sample_deal_id.replace(".txt", "").replace("_", " ")
+        return deal_name, deal_text
     elif request.deal_text:
-        deal_text = request.deal_text
+        return "Uploaded Document", request.deal_text
     else:
         raise HTTPException(status_code=400, detail="No deal text provided")
 
-    # Analyze
-    result = risk_engine.analyze_deal(deal_text, template_text)
-    
+def _parse_and_index(doc_hash: str, deal_text: str) -> dict:
+    # The clause index is fed from the same parse the analysis scores
+    deal_data = parse_document(risk_engine, deal_text)
+    clause_index.add_document(doc_hash, deal_data)
+    return deal_data
+
+def _template_key(template: dict) -> str:
+    # Changes when the template file is edited, so cached results go stale with it
+    return f"{template['id']}@{template['hash'][:16]}"
+
+def _cache_result(key: tuple, result: dict):
+    # Fallback descriptions written during an LLM outage must not outlive it: leave
+    # the result uncached so the next request asks again (as the explanation cache does)
+    if not result.get('ai_fallbacks'):
+        result_cache.put(key, result)
+
+def _format_result(deal_name: str, template_id: str, result: dict) -> dict:
     return {
         "deal_name": deal_name,
-        "template_name": request.template_id.replace(".txt", "").replace("_", " "),
+        "template_name": template_id.replace(".txt", "").replace("_", " "),
         "overall_score": result["overall_score"],
         "risk_label": result["risk_label"],
         "deviations": result["deviations"],
         "counts": result["counts"]
     }
 
+@router.get("/templates")
+def get_templates():
+    """Available templates with their parsed covenant values"""
+    return {"templates": template_registry.list_templates()}
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters for the analysis caches"""
+    return {
+        "explanations": risk_engine.ai_explainer.cache.get_stats(),
+        "results": result_cache.get_stats(),
+    }
+
+@router.post("/cache/invalidate")
+def invalidate_result_cache(stale_only: bool = False):
+    """
+    Drop cached analysis results - all of them, or with stale_only only those
+    scored under rules other than the current RiskScoringEngine.standards.
+    """
+    rules_version = risk_engine.scorer.rules_version if stale_only else None
+    return {"removed": result_cache.invalidate(rules_version)}
+
+async def _run_analysis(request: AnalysisRequest, endpoint: str) -> dict:
+    result, _ = await _analyze(request, endpoint)
+    return result
+
+async def _analyze(request: AnalysisRequest, endpoint: str) -> Tuple[dict, tuple]:
+    """_run_analysis, also returning the result cache key (document hash, template key, rules version)"""
+    # Template reloads, file reads, hashing, parsing and explanation calls all block - keep them off the event loop
+
+    # Load Template
+    template = await run_blocking(_load_template, request.template_id)
+
+    # Load Deal Text
+    deal_name, deal_text = await run_blocking(_load_deal, request)
+
+    # Unchanged document under unchanged rules - reuse the stored result
+    cache_key = await run_blocking(result_cache.key, deal_text, _template_key(template), risk_engine.scorer.rules_version)
+    result = result_cache.get(cache_key, endpoint)
+    if result is None:
+        # Analyze
+        deal_data = await run_blocking(_parse_and_index, cache_key[0], deal_text)
+        result = await run_blocking(risk_engine.analyze_parsed, deal_data, template['text'], template['standards'])
+        _cache_result(cache_key, result)
+    
+    return _format_result(deal_name, request.template_id, result), cache_key
+
+@router.post("/", response_model=AnalysisResult)
+async def analyze_deal(request: AnalysisRequest):
+    return await _run_analysis(request, "analyze")
+
+@router.post("/upload", response_model=AnalysisResult)
+async def analyze_upload(request: Request, template_id: str = "LMA_Leveraged_2023.txt"):
+    """
+    Analyze an agreement uploaded as multipart/form-data (field "file").
+    The document is parsed while it streams in, keeping only a window of
+    text in memory, so very large agreements never sit in memory whole.
+    """
+    template = await run_blocking(_load_template, template_id)
+    upload = MultipartFileStream(request.headers.get("content-type", ""), request.stream(), max_bytes=UPLOAD_MAX_BYTES)
+    parse = risk_engine.parser.incremental()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    digest = hashlib.sha256()
+    try:
+        async for chunk in upload:
+            text = decoder.decode(chunk)
+            # Hash of the decoded text, so the key matches a JSON upload of the same document
+            digest.update(text.encode())
+            await run_blocking(parse.feed, text)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    text = decoder.decode(b"", final=True)
+    digest.update(text.encode())
+    await run_blocking(parse.feed, text)
+    
+    cache_key = result_cache.key_from_hash(digest.hexdigest(), _template_key(template), risk_engine.scorer.rules_version)
+    result = result_cache.get(cache_key, "upload")
+    if result is None:
+        deal_data = await run_blocking(parse.finish)
+        await run_blocking(clause_index.add_document, cache_key[0], deal_data)
+        result = await run_blocking(risk_engine.analyze_parsed, deal_data, template['text'], template['standards'])
+        _cache_result(cache_key, result)
+    
+    deal_name = os.path.splitext(os.path.basename(upload.filename or ""))[0].replace("_", " ") or "Uploaded Document"
+    return _format_result(deal_name, template_id, result)
+
+@router.post("/batch", response_model=BatchAnalysisResult)
+async def analyze_batch(request: BatchAnalysisRequest):
+    """Analyze N deals in parallel across a process pool; results keep input order"""
+    started = time.perf_counter()
+    
+    # Validate and load everything up front so a bad entry fails the batch before any work starts
+    templates = {}
+    for d in request.deals:
+        if d.template_id not in templates:
+            templates[d.template_id] = await run_blocking(_load_template, d.template_id)
+    deals = [await run_blocking(_load_deal, d) for d in request.deals]
+    
+    rules_version = risk_engine.scorer.rules_version
+    keys = [
+        await run_blocking(result_cache.key, deal_text, _template_key(templates[d.template_id]), rules_version)
+        for d, (_, deal_text) in zip(request.deals, deals)
+    ]
+    results = [result_cache.get(key, "batch") for key in keys]
+    
+    # Only cache misses go to the pool
+    misses = [i for i, result in enumerate(results) if result is None]
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    computed = await asyncio.gather(*[
+        loop.run_in_executor(
+            pool,
+            analyze_in_worker,
+            deals[i][1],
+            templates[request.deals[i].template_id]['text'],
+            risk_engine.scorer.standards,
+            templates[request.deals[i].template_id]['standards'],
+        )
+        for i in misses
+    ])
+    for i, result in zip(misses, computed):
+        _cache_result(keys[i], result)
+        results[i] = result
+    
+    return {
+        "results": [
+            _format_result(deal_name, d.template_id, result)
+            for d, (deal_name, _), result in zip(request.deals, deals, results)
+        ],
+        "wall_time_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+def _deviation_matrix(template_ids: List[str], results: List[dict]) -> List[dict]:
+    """Rows keyed by finding type, in order of first appearance; None where a template raised no finding"""
+    rows = {}
+    for template_id, result in zip(template_ids, results):
+        for deviation in result["deviations"]:
+            metadata = deviation.get("metadata") or {}
+            row = rows.get(deviation["type"])
+            if row is None:
+                row = rows[deviation["type"]] = {
+                    "clause": deviation["clause"],
+                    "type": deviation["type"],
+                    "extracted_value": metadata.get("extracted_value"),
+                    "templates": dict.fromkeys(template_ids),
+                }
+            row["templates"][template_id] = {
+                "risk_level": deviation["risk_level"],
+                "risk_score": metadata.get("risk_score"),
+                "standard_value": metadata.get("standard_value"),
+                "deviation_pct": metadata.get("deviation_pct"),
+            }
+    return list(rows.values())
+
+@router.post("/multi", response_model=MultiAnalysisResult)
+async def analyze_multi(request: MultiAnalysisRequest):
+    """
+    One deal against several templates: the document is parsed once and the
+    extracted covenants scored against each template, so adding a template
+    costs a scoring pass rather than another parse.
+    """
+    template_ids = list(dict.fromkeys(request.template_ids))
+    if not template_ids:
+        raise HTTPException(status_code=400, detail="No templates given")
+    if len(template_ids) > MULTI_MAX_TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"At most {MULTI_MAX_TEMPLATES} templates per request")
+    templates = [await run_blocking(_load_template, template_id) for template_id in template_ids]
+    deal_name, deal_text = await run_blocking(_load_deal, request)
+    
+    # Per-template results are cached exactly as /analyze caches them, so either endpoint reuses the other's work
+    rules_version = risk_engine.scorer.rules_version
+    doc_hash = await run_blocking(document_hash, deal_text)
+    keys = [result_cache.key_from_hash(doc_hash, _template_key(template), rules_version) for template in templates]
+    results = [result_cache.get(key, "multi") for key in keys]
+    
+    parse_ms = score_ms = 0.0
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        started = time.perf_counter()
+        deal_data = await run_blocking(_parse_and_index, keys[0][0], deal_text)
+        parse_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        computed = await run_blocking(
+            risk_engine.analyze_templates, deal_data,
+            [(templates[i]['text'], templates[i]['standards']) for i in misses],
+        )
+        score_ms = (time.perf_counter() - started) * 1000
+        for i, result in zip(misses, computed):
+            _cache_result(keys[i], result)
+            results[i] = result
+    
+    return {
+        "deal_name": deal_name,
+        "results": [_format_result(deal_name, template_id, result) for template_id, result in zip(template_ids, results)],
+        "matrix": _deviation_matrix(template_ids, results),
+        "parse_ms": round(parse_ms, 2),
+        "score_ms": round(score_ms, 2),
+    }
+
+def _run_job(payload: dict, progress) -> dict:
+    """Job runner: analyze one deal on a job worker thread, reporting stage progress"""
+    template = _load_template(payload['template_id'])
+    cache_key = result_cache.key(payload['deal_text'], _template_key(template), risk_engine.scorer.rules_version)
+    result = result_cache.get(cache_key, "jobs")
+    if result is None:
+        progress('parse')
+        deal_data = _parse_and_index(cache_key[0], payload['deal_text'])
+        result = risk_engine.analyze_parsed(deal_data, template['text'], template['standards'], progress=progress)
+        _cache_result(cache_key, result)
+    return _format_result(payload['deal_name'], payload['template_id'], result)
+
+job_queue = JobQueue(
+    _run_job,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    reserved_workers=int(os.getenv("JOB_INTERACTIVE_WORKERS", "1")),
+    history=int(os.getenv("JOB_HISTORY", "1000")),
+)
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue an analysis; poll /jobs/{job_id} for progress and fetch /jobs/{job_id}/result"""
+    # Bad template or deal ids fail here rather than inside the job
+    await run_blocking(_load_template, request.template_id)
+    deal_name, deal_text = await run_blocking(_load_deal, request)
+    return job_queue.submit(
+        {'deal_name': deal_name, 'deal_text': deal_text, 'template_id': request.template_id},
+        priority=request.priority,
+    )
+
+@router.get("/jobs")
+def get_job_stats():
+    return job_queue.get_stats()
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    status = job_queue.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@router.get("/jobs/{job_id}/result", response_model=AnalysisResult)
+def get_job_result(job_id: str):
+    job = job_queue.result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Job failed: {job['error']}")
+    if job['status'] != 'done':
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job['result']
+
 @router.post("/add-to-portfolio")
 async def add_analysis_to_portfolio(request: AnalysisRequest):
     """Analyze a deal AND add it to portfolio"""
     
     # Run analysis (reuse existing logic)
-    result = await analyze_deal(request)
+    result, (document_hash, _, rules_version) = await _analyze(request, "add-to-portfolio")
+    
+    # Results served from the cache may predate the clause index (or come from /batch workers)
+    if not await run_blocking(clause_index.has_document, document_hash, risk_engine.parser.clause_patterns):
+        _, deal_text = await run_blocking(_load_deal, request)
+        await run_blocking(_parse_and_index, document_hash, deal_text)
+    # Jurisdiction, vintage and facility type from the indexed clauses, no second parse
+    parsed = await run_blocking(clause_index.parsed, document_hash)
+    metadata = risk_engine.parser.deal_metadata(parsed)
+    
+    # Add to portfolio, keeping the full result for reports
+    from app.api.portfolio import _add_analysis
+    portfolio_result = await run_blocking(_add_analysis, result, document_hash, rules_version, **metadata)
     
-    # Add to portfolio
-    from app.api.portfolio import add_to_portfolio
-    portfolio_result = add_to_portfolio(result)
+    item = portfolio_result['item']
+    await run_blocking(
+        clause_index.link, f"portfolio:{item['id']}", document_hash,
+        'portfolio', item['deal_name'], item['jurisdiction'],
+    )
     
     return {
         "analysis": result,
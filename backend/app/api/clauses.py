@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.core.clause_index import clause_index
+
+router = APIRouter()
+
+def _check_clause(clause: Optional[str]):
+    # The app's parser, rather than compiling another just for its clause names
+    from app.api.analyze import risk_engine
+    clauses = risk_engine.parser.clause_patterns
+    if clause is not None and clause not in clauses:
+        raise HTTPException(status_code=400, detail=f"Unknown clause type; expected one of {', '.join(clauses)}")
+
+def _check_text(text: Optional[str]) -> Optional[str]:
+    if text is not None and not text.strip():
+        raise HTTPException(status_code=400, detail="Search text is empty")
+    return text.strip() if text is not None else None
+
+@router.get("/stats")
+def get_clause_index_stats():
+    return clause_index.get_stats()
+
+@router.get("/query")
+def query_clauses(
+    clause: str,
+    gt: Optional[float] = None,
+    gte: Optional[float] = None,
+    lt: Optional[float] = None,
+    lte: Optional[float] = None,
+    jurisdiction: Optional[str] = None,
+    source: Optional[str] = Query(None, pattern="^(portfolio|file)$"),
+    text: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Deals by extracted clause value, e.g. clause=grace_period&gt=5&jurisdiction=Irish Law
+    or clause=cross_default&gt=10000000. Answered from the index, no documents are parsed.
+    """
+    _check_clause(clause)
+    text = _check_text(text)
+    matches = clause_index.query(clause, gt, gte, lt, lte, jurisdiction, source, text, limit)
+    return {"matches": matches, "count": len(matches)}
+
+@router.get("/search")
+def search_clauses(
+    text: str = Query(..., min_length=1),
+    clause: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Full-text search over the indexed clause text"""
+    _check_clause(clause)
+    text = _check_text(text)
+    matches = clause_index.search(text, clause, limit)
+    return {"matches": matches, "count": len(matches)}
@@ -1,14 +1,19 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 import json
 import os
+import time
 from pathlib import Path
+from app.core.portfolio_engine import PortfolioStore, build_filters
+from app.core.risk_engine import LMADocumentParser
 
 router = APIRouter()
 
-# Simple file-based storage for demo
+# SQLite-backed storage; the old JSON file is imported once if present
 PORTFOLIO_FILE = Path(__file__).parent.parent / "data" / "portfolio.json"
+PORTFOLIO_DB = os.getenv("PORTFOLIO_DB", str(Path(__file__).parent.parent / "data" / "portfolio.db"))
 
 class PortfolioItem(BaseModel):
     id: str
@@ -22,21 +27,33 @@ class PortfolioItem(BaseModel):
     low_risk_count: int
     is_red_flag: bool
     analyzed_at: str
+    facility_type: Optional[str] = None
 
-def load_portfolio() -> List[dict]:
-    """Load portfolio from file"""
-    if not PORTFOLIO_FILE.exists():
-        # Initialize with some baseline deals
-        return _get_initial_portfolio()
-    
-    with open(PORTFOLIO_FILE, 'r') as f:
-        return json.load(f)
+class PortfolioPage(BaseModel):
+    items: List[PortfolioItem]
+    next_cursor: Optional[str] = None
+
+class WhatIfRequest(BaseModel):
+    # Proposed values for any of RiskScoringEngine.standards; the rest stay as they are
+    standards: Dict[str, float]
+
+# Deviation type -> stored covenant column
+_COVENANT_TYPES = {
+    'Leverage Ratio': 'leverage_ratio',
+    'Interest Cover': 'interest_cover',
+    'Non-payment Grace Period': 'grace_period',
+    'Cross Default Threshold': 'cross_default',
+}
+
+# Stored for a document that states no agreement date; counted as legacy documentation
+UNDATED_VINTAGE = "N/A"
 
-def save_portfolio(portfolio: List[dict]):
-    """Save portfolio to file"""
-    PORTFOLIO_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(PORTFOLIO_FILE, 'w') as f:
-        json.dump(portfolio, f, indent=2)
+# Analysis result fields persisted per deal for reports
+_ANALYSIS_FIELDS = ('deal_name', 'template_name', 'overall_score', 'risk_label', 'deviations', 'counts')
+
+def load_portfolio() -> List[dict]:
+    """Load the full portfolio from the store"""
+    return portfolio_store.all()
 
 def _get_initial_portfolio() -> List[dict]:
     """Initial portfolio with realistic baseline"""
@@ -108,21 +125,72 @@ def _get_initial_portfolio() -> List[dict]:
         }
     ]
 
+# Initialize with some baseline deals when the store is first created
+portfolio_store = PortfolioStore(PORTFOLIO_DB, seed=_get_initial_portfolio, legacy_json=str(PORTFOLIO_FILE))
+
 @router.get("/", response_model=List[PortfolioItem])
 def get_portfolio():
     """Get all portfolio deals"""
     portfolio = load_portfolio()
     return portfolio
 
-@router.post("/add")
-def add_to_portfolio(analysis_result: dict):
-    """Add a newly analyzed deal to the portfolio"""
-    import datetime
+@router.get("/deals", response_model=PortfolioPage)
+def get_portfolio_page(
+    jurisdiction: Optional[str] = None,
+    vintage_from: Optional[int] = None,
+    vintage_to: Optional[int] = None,
+    risk_label: Optional[str] = None,
+    is_red_flag: Optional[bool] = None,
+    sort: str = Query("id", pattern="^(id|risk_score|-risk_score)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+):
+    """One page of portfolio deals, filtered and sorted server-side"""
+    filters = build_filters(jurisdiction, vintage_from, vintage_to, risk_label, is_red_flag)
+    try:
+        return portfolio_store.page(filters, sort=sort, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/deals/stream")
+def stream_portfolio(
+    jurisdiction: Optional[str] = None,
+    vintage_from: Optional[int] = None,
+    vintage_to: Optional[int] = None,
+    risk_label: Optional[str] = None,
+    is_red_flag: Optional[bool] = None,
+    sort: str = Query("id", pattern="^(id|risk_score|-risk_score)$"),
+):
+    """Matching deals as NDJSON, one row per line, emitted as they are read from storage"""
+    filters = build_filters(jurisdiction, vintage_from, vintage_to, risk_label, is_red_flag)
     
-    portfolio = load_portfolio()
+    def ndjson():
+        for batch in portfolio_store.stream(filters, sort=sort):
+            yield "".join(json.dumps(item) + "\n" for item in batch)
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+def _add_analysis(
+    analysis_result: dict,
+    document_hash: Optional[str],
+    rules_version: str,
+    jurisdiction: Optional[str] = None,
+    vintage: Optional[str] = None,
+    facility_type: Optional[str] = None,
+) -> dict:
+    """
+    Store an analyzed deal. Jurisdiction, vintage and facility type are as
+    extracted from the document (see LMADocumentParser.deal_metadata), with
+    UNKNOWN_JURISDICTION where no governing law was recognised. A document
+    without an agreement date gets UNDATED_VINTAGE; a result stored without a
+    document is taken to be this year's.
+    """
+    import datetime
+    if vintage is None:
+        vintage = UNDATED_VINTAGE if document_hash else str(datetime.datetime.now().year)
     
-    # Generate new ID
-    new_id = str(max([int(p['id']) for p in portfolio] + [0]) + 1)
+    # Results posted by older clients may carry no deviations; they just have nothing to re-score
+    deviations = analysis_result.get('deviations') or []
     
     # Determine if this is a red flag
     is_red_flag = (
@@ -131,51 +199,174 @@ def add_to_portfolio(analysis_result: dict):
     )
     
     new_item = {
-        "id": new_id,
         "deal_name": analysis_result['deal_name'],
-        "jurisdiction": "English Law",  # TODO: Extract from document
-        "vintage": str(datetime.datetime.now().year),
+        "jurisdiction": jurisdiction or LMADocumentParser.UNKNOWN_JURISDICTION,
+        "vintage": vintage,
+        "facility_type": facility_type,
         "risk_score": analysis_result['overall_score'],
         "risk_label": analysis_result['risk_label'],
         "high_risk_count": analysis_result['counts']['High'],
         "medium_risk_count": analysis_result['counts']['Medium'],
         "low_risk_count": analysis_result['counts']['Low'],
         "is_red_flag": is_red_flag,
-        "analyzed_at": datetime.datetime.now().strftime("%Y-%m-%d")
+        "analyzed_at": datetime.datetime.now().strftime("%Y-%m-%d"),
+        # Extracted values, so the deal can be re-scored when standards change
+        "covenants": {
+            _COVENANT_TYPES[d['type']]: d['metadata']['extracted_value']
+            for d in deviations
+            if d['type'] in _COVENANT_TYPES and d.get('metadata')
+        },
+        # ...and the standards they were scored against (the template's, where it states one)
+        "standards": {
+            _COVENANT_TYPES[d['type']]: d['metadata'].get('standard_value')
+            for d in deviations
+            if d['type'] in _COVENANT_TYPES and d.get('metadata')
+        },
+        # The full result, so committee reports are rendered without re-analysis
+        "analysis": {
+            **{key: analysis_result.get(key) for key in _ANALYSIS_FIELDS},
+            "document_hash": document_hash,
+            "rules_version": rules_version,
+        },
     }
     
-    portfolio.append(new_item)
-    save_portfolio(portfolio)
+    # ID is allocated atomically by the store
+    new_item = portfolio_store.add(new_item)
     
     return {"message": "Added to portfolio", "item": new_item}
 
+@router.post("/add")
+def add_to_portfolio(analysis_result: dict):
+    """Add a newly analyzed deal to the portfolio"""
+    from app.api.analyze import risk_engine
+    return _add_analysis(analysis_result, None, risk_engine.scorer.rules_version)
+
 @router.get("/stats")
 def get_portfolio_stats():
     """Get aggregated portfolio statistics"""
-    portfolio = load_portfolio()
+    # Maintained incrementally by the store - no pass over the portfolio
+    stats = portfolio_store.stats()
+    total_deals = stats['total_deals']
     
-    if not portfolio:
+    if not total_deals:
         return {"error": "No portfolio data"}
     
-    total_deals = len(portfolio)
-    high_risk_deals = len([p for p in portfolio if p['risk_label'] == 'High'])
-    avg_score = sum(p['risk_score'] for p in portfolio) / total_deals
-    
-    # Jurisdiction breakdown
-    jurisdiction_breakdown = {}
-    for p in portfolio:
-        jur = p['jurisdiction']
-        jurisdiction_breakdown[jur] = jurisdiction_breakdown.get(jur, 0) + 1
-    
-    # Vintage analysis
-    old_docs = len([p for p in portfolio if int(p['vintage']) < 2020])
+    high_risk_deals = stats['high_risk_count']
+    avg_score = stats['risk_score_sum'] / total_deals
     
     return {
         "total_deals": total_deals,
         "high_risk_count": high_risk_deals,
         "high_risk_percentage": round(high_risk_deals / total_deals * 100, 1) if total_deals > 0 else 0,
         "average_risk_score": round(avg_score, 2) if total_deals > 0 else 0,
-        "jurisdiction_breakdown": jurisdiction_breakdown,
-        "pre_2020_documentation": old_docs,
-        "red_flags": len([p for p in portfolio if p['is_red_flag']])
+        "jurisdiction_breakdown": stats['jurisdiction_breakdown'],
+        "pre_2020_documentation": stats['pre_2020_documentation'],
+        "red_flags": stats['red_flags']
+    }
+
+@router.post("/what-if")
+def what_if_standards(request: WhatIfRequest):
+    """
+    Preview the portfolio impact of changing the scoring standards: every deal
+    with stored covenants is re-scored under the standards it was analyzed
+    with (falling back to the scorer's defaults for deals stored without
+    them), then with the proposed values in their place.
+    """
+    from app.api.analyze import risk_engine
+    from app.core.bulk_scoring import standard_keys, what_if
+    
+    current = risk_engine.scorer.standards
+    # Only standards a re-scored covenant is measured against; anything else would change nothing
+    valid = standard_keys(risk_engine.scorer.rules)
+    unknown = sorted(set(request.standards) - set(valid))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown standards: {', '.join(unknown)} (valid: {', '.join(valid)})",
+        )
+    
+    started = time.perf_counter()
+    columns = portfolio_columns().refresh()
+    result = what_if(columns, current, request.standards, risk_engine.scorer.rules)
+    result['standards'] = {'defaults': current, 'proposed': request.standards}
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+_portfolio_columns = None
+
+def portfolio_columns():
+    """Columnar view of the book's covenants, created on first use (needs NumPy)"""
+    global _portfolio_columns
+    if _portfolio_columns is None:
+        from app.core.bulk_scoring import PortfolioColumns
+        _portfolio_columns = PortfolioColumns(portfolio_store)
+    return _portfolio_columns
+
+@router.get("/trends")
+def get_jurisdiction_trends(clause: str = "grace_period"):
+    """
+    Per-jurisdiction view of one clause type (deals, deals with the clause,
+    min / average / max value) over analyzed portfolio deals, read from the
+    clause index rather than by re-parsing their documents.
+    """
+    from app.api.clauses import _check_clause
+    from app.core.clause_index import clause_index
+    _check_clause(clause)
+    return {"clause": clause, "jurisdictions": clause_index.trends(clause, source='portfolio')}
+
+@router.post("/backfill-metadata")
+def backfill_metadata(dry_run: bool = False):
+    """
+    Fill in jurisdiction, vintage and facility type for existing deals from
+    their documents' governing-law, agreement-date and facility clauses.
+    Read from the clause index, so no document is re-read unless it was
+    indexed before those clauses were extracted and is still in the deals
+    directory (re-parsed by the directory sync). Deals without a stored
+    analysis, or whose document is no longer available, are left as they are.
+    """
+    from app.api.analyze import risk_engine
+    from app.core.amendments import deal_index
+    from app.core.clause_index import clause_index
+    
+    deal_index.sync()
+    parser = risk_engine.parser
+    hashes = portfolio_store.document_hashes()
+    updates, unresolved = {}, 0
+    for deal_id, document_hash in hashes.items():
+        if not clause_index.has_document(document_hash, parser.clause_patterns):
+            unresolved += 1
+            continue
+        metadata = parser.deal_metadata(clause_index.parsed(document_hash))
+        item = portfolio_store.get(deal_id)
+        changed = {
+            column: value for column, value in metadata.items()
+            if value is not None and item is not None and item[column] != value
+        }
+        if changed:
+            updates[deal_id] = changed
+    
+    updated = 0
+    if not dry_run:
+        updated = portfolio_store.update_metadata(updates)
+        for deal_id, changed in updates.items():
+            if 'jurisdiction' in changed:
+                item = portfolio_store.get(deal_id)
+                clause_index.link(
+                    f"portfolio:{deal_id}", hashes[deal_id], 'portfolio', item['deal_name'], item['jurisdiction'],
+                )
+    return {
+        "deals_with_documents": len(hashes),
+        "unresolved": unresolved,
+        "changes": {str(deal_id): changed for deal_id, changed in updates.items()},
+        "updated": updated,
+        "dry_run": dry_run,
     }
+
+@router.get("/stats/verify")
+def verify_portfolio_stats(rebuild: bool = False):
+    """Check the maintained aggregates against a full recompute (optionally rebuilding them)"""
+    result = portfolio_store.verify_stats()
+    if rebuild and not result['consistent']:
+        portfolio_store.rebuild_stats()
+        result['rebuilt'] = True
+    return result
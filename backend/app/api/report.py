@@ -1,34 +1,59 @@
-from fastapi import APIRouter
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional
 import datetime
+import os
+from app.api.portfolio import portfolio_store
+from app.core.portfolio_engine import build_filters
+from app.core.reports import FORMATS, ReportCache, ReportRenderer
 
 router = APIRouter()
 
-@router.get("/{deal_id}", response_class=PlainTextResponse)
-def get_report(deal_id: str):
-    # Generate a simple text report
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    report = f"""
-==================================================
-LMA COMPLIANCE REPORT - DO NOT DISTRIBUTE
-==================================================
-Deal Ref: {deal_id}
-Date: {timestamp}
-Status: REQUIRES APPROVAL
-
-EXECUTIVE SUMMARY
------------------
-This facility agreement contains material deviations from the LMA standard.
-Risk Score: HIGH
-
-KEY RISKS IDENTIFIED
---------------------
-1. Financial Covenants: Leverage Ratio exceeds standard (4.50:1 vs 3.00:1).
-2. Interest Cover: Floor is lower than market standard.
-3. Events of Default: Grace periods exceed 3 business days.
-
-RECOMMENDATION
---------------
-Refer to Credit Committee for Level 2 Approval.
+report_renderer = ReportRenderer(ReportCache(max_bytes=int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))))
+
+_FORMAT_PATTERN = f"^({'|'.join(FORMATS)})$"
+
+@router.get("/cache/stats")
+def get_report_cache_stats():
+    return report_renderer.cache.get_stats()
+
+@router.get("/export")
+def export_reports(
+    format: str = Query("pdf", pattern=_FORMAT_PATTERN),
+    jurisdiction: Optional[str] = None,
+    vintage_from: Optional[int] = None,
+    vintage_to: Optional[int] = None,
+    risk_label: Optional[str] = None,
+    is_red_flag: Optional[bool] = None,
+):
+    """
+    Committee pack: a zip of reports for every deal matching the portfolio
+    filters, streamed as the deals are read. Built from stored analyses only.
     """
-    return report
+    filters = build_filters(jurisdiction, vintage_from, vintage_to, risk_label, is_red_flag)
+
+    def batches():
+        for items in portfolio_store.stream(filters):
+            yield items, portfolio_store.analyses([int(item['id']) for item in items])
+
+    filename = f"committee_pack_{datetime.date.today().isoformat()}.zip"
+    return StreamingResponse(
+        report_renderer.zip_stream(batches(), format),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/{deal_id}")
+def get_report(deal_id: str, format: str = Query("text", pattern=_FORMAT_PATTERN)):
+    """Credit committee report for a portfolio deal, rendered from its stored analysis"""
+    item = portfolio_store.get(int(deal_id)) if deal_id.isdigit() else None
+    if item is None:
+        raise HTTPException(status_code=404, detail="Deal not found in portfolio")
+
+    stored = portfolio_store.analyses([int(deal_id)]).get(int(deal_id))
+    report = report_renderer.render(item, stored, format)
+    extension, media_type = FORMATS[format]
+    headers = {}
+    if format == "pdf":
+        headers["Content-Disposition"] = f'inline; filename="{report_renderer.filename(item, format)}"'
+    return Response(report, media_type=media_type, headers=headers)
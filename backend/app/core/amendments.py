@@ -1,21 +1,68 @@
+import hashlib
 import os
-import difflib
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.core.clause_index import clause_index
+from app.core.deals import DealVersionIndex
+from app.core.diff_cache import DiffCache
+from app.core.diff_engine import ClauseDiffEngine, COVENANT_LABELS, direction
+from app.core.metrics import span
+from app.core.workers import get_background_pool
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sample_deals")
+DATA_DIR = os.getenv("DEALS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sample_deals"))
+DEAL_INDEX_DB = os.getenv("DEAL_INDEX_DB", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "deal_index.db"))
+
+deal_index = DealVersionIndex(DATA_DIR, DEAL_INDEX_DB, clause_index=clause_index)
+diff_cache = DiffCache(max_bytes=int(os.getenv("DIFF_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
 
 def get_deal_versions(base_deal_name: str) -> List[str]:
     """
-    Finds all versions of a deal (e.g., Deal_Delta_Orig, Deal_Delta_Amend1).
+    All versions of a deal in lineage order (e.g. Deal_Delta_Orig, Deal_Delta_Amend1, ..., Deal_Delta_Amend10).
+    """
+    return deal_index.versions(base_deal_name)
+
+def get_deal_lineage(base_deal_name: str) -> List[Dict[str, Any]]:
+    """Versions of a deal with their document hashes and covenant snapshots"""
+    return deal_index.lineage(base_deal_name)
+
+def _covenant_deltas(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    deltas = []
+    for covenant, label in COVENANT_LABELS.items():
+        before, after = old.get(covenant), new.get(covenant)
+        if before != after:
+            deltas.append({
+                'covenant': covenant,
+                'label': label,
+                'from': before,
+                'to': after,
+                'direction': direction(covenant, before, after),
+            })
+    return deltas
+
+def get_covenant_timeline(base_deal_name: str) -> Dict[str, Any]:
+    """
+    Covenant values for every version of a deal, with the loosened/tightened
+    deltas between consecutive versions and across the whole lineage.
+    Built from the index snapshots - no document is read or parsed here.
     """
-    # Simply look for files starting with the base name
-    # For demo simplicity, we assume the base name is "Deal_Delta"
-    files = [f for f in os.listdir(DATA_DIR) if f.startswith(base_deal_name) and f.endswith(".txt")]
-    files.sort() # Should sort Orig, Amend1, Amend2 correctly if named well
-    return files
+    lineage = deal_index.lineage(base_deal_name)
+    versions = [
+        {k: v[k] for k in ('filename', 'version', 'kind', 'hash', 'covenants')}
+        for v in lineage
+    ]
+    steps = [
+        {
+            'version_from': old['filename'],
+            'version_to': new['filename'],
+            'changes': _covenant_deltas(old['covenants'], new['covenants']),
+        }
+        for old, new in zip(versions, versions[1:])
+    ]
+    net = _covenant_deltas(versions[0]['covenants'], versions[-1]['covenants']) if versions else []
+    return {'base': base_deal_name, 'versions': versions, 'deltas': steps, 'net_changes': net}
 
 import re
 
+diff_engine = ClauseDiffEngine()
 
 def _safe_resolve(filename: str) -> str:
     pattern = re.compile(r"^[\w\-.]+$")
@@ -28,26 +75,68 @@ def _safe_resolve(filename: str) -> str:
     return resolved
 
 
+def _read_version(filename: str) -> Dict[str, Any]:
+    with open(_safe_resolve(filename), 'rb') as f:
+        content = f.read()
+    return {'hash': hashlib.sha256(content).hexdigest(), 'text': content.decode('utf-8', errors='replace')}
+
+
+def _compute_diff(file1: str, file2: str, covenants1: Optional[Dict[str, Any]] = None, covenants2: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    old, new = _read_version(file1), _read_version(file2)
+    # Clause-level diff: only clauses whose hash changed are line-diffed
+    with span('diff'):
+        diff = diff_engine.compare(old['text'], new['text'], covenants1, covenants2)
+    # Keyed on the hashes actually read, in case a file changed since it was indexed
+    diff_cache.put((old['hash'], new['hash']), diff)
+    return diff
+
+
 def compare_versions(file1: str, file2: str) -> Dict[str, Any]:
-    path1 = _safe_resolve(file1)
-    path2 = _safe_resolve(file2)
-    
-    with open(path1, 'r') as f:
-        text1 = f.readlines()
-    with open(path2, 'r') as f:
-        text2 = f.readlines()
+    _safe_resolve(file1)
+    _safe_resolve(file2)
     
-    diff = difflib.unified_diff(text1, text2, lineterm='', n=0)
-    
-    changes = []
-    for line in diff:
-        if line.startswith('---') or line.startswith('+++') or line.startswith('@@'):
-            continue
-        changes.append(line)
+    # Indexed versions are looked up by content hash without touching the files
+    v1, v2 = deal_index.get(file1), deal_index.get(file2)
+    diff = diff_cache.get((v1['hash'], v2['hash'])) if v1 and v2 else None
+    if diff is None:
+        diff = _compute_diff(file1, file2, v1 and v1['covenants'], v2 and v2['covenants'])
         
     return {
         "version_from": file1,
         "version_to": file2,
-        "changes": changes
+        **diff
     }
 
+
+def precompute_diffs(base_deal_name: str) -> int:
+    """
+    Fill the diff cache for every adjacent pair in a lineage, plus Orig to
+    the latest version. Returns the number of diffs computed.
+    """
+    lineage = deal_index.lineage(base_deal_name)
+    pairs = list(zip(lineage, lineage[1:]))
+    if len(lineage) > 2:
+        pairs.append((lineage[0], lineage[-1]))
+    computed = 0
+    for old, new in pairs:
+        if (old['hash'], new['hash']) in diff_cache:
+            continue
+        try:
+            _compute_diff(old['filename'], new['filename'], old['covenants'], new['covenants'])
+        except FileNotFoundError:
+            # Removed since the lineage was read; the index will notify us again
+            continue
+        computed += 1
+    return computed
+
+
+def schedule_precompute(base_deal_name: Optional[str] = None):
+    """Queue diff precomputation for one lineage (or all of them) on the background pool"""
+    bases = [base_deal_name] if base_deal_name is not None else deal_index.bases()
+    pool = get_background_pool()
+    for base in bases:
+        pool.submit(precompute_diffs, base)
+
+
+# A new or changed version makes its neighbouring pairs worth computing ahead of time
+deal_index.add_listener(schedule_precompute)
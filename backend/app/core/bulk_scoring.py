@@ -0,0 +1,223 @@
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.portfolio_engine import PortfolioStore, COVENANT_COLUMNS, STANDARD_COLUMNS
+from app.core.scoring_rules import LEVELS, OFFSET_DIGITS, ScoringRules
+
+
+def _compile(clause) -> Dict[str, Any]:
+    # Band 0 is "within the standard", then the clause's bands in order; the
+    # bounds are already ascending (negated for lower-is-worse clauses)
+    bands = [clause.within] + clause.bands
+    return {
+        'standard': clause.standard_key,
+        'higher_is_worse': clause.higher_is_worse,
+        'relative': clause.relative,
+        'bounds': np.array(clause.bounds, dtype=np.float64),
+        'levels': np.array([LEVELS.index(band['risk_level']) for band in bands], dtype=np.int8),
+        'scores': np.array([band['risk_score'] for band in bands], dtype=np.int16),
+    }
+
+
+_ladders: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+
+def ladders(rules: ScoringRules) -> Dict[str, Dict[str, Any]]:
+    """
+    The rule table's numeric clauses that have a portfolio column, compiled
+    for NumPy (cached per table version). Presence clauses have no stored
+    value to re-score and are left out.
+    """
+    if rules.version not in _ladders:
+        _ladders[rules.version] = {
+            clause.key: _compile(clause)
+            for clause in rules.clauses
+            if clause.presence is None and clause.key in COVENANT_COLUMNS
+        }
+    return _ladders[rules.version]
+
+
+def score_covenant(ladder: Dict[str, Any], values: np.ndarray, standard) -> Dict[str, np.ndarray]:
+    """
+    Vectorized CompiledClause.score over an array of values, against one
+    standard or a per-row array of them.
+    NaN means the covenant was not found; those rows get level -1 and score 0.
+    """
+    present = ~np.isnan(values)
+    keys = np.round(values - standard, OFFSET_DIGITS) if ladder['relative'] else values
+    if ladder['higher_is_worse']:
+        within = values <= standard
+    else:
+        within = values >= standard
+        keys = -keys
+    # Same lookup as CompiledClause.band_index, over the whole column
+    band = np.searchsorted(ladder['bounds'], keys, side='left') + 1
+    band = np.where(within, 0, band)
+    return {
+        'band': band,
+        'risk_level': np.where(present, ladder['levels'][band], -1).astype(np.int8),
+        'risk_score': np.where(present, ladder['scores'][band], 0).astype(np.int16),
+    }
+
+
+def score_book(values: Dict[str, np.ndarray], standards: Dict[str, Any], rules: ScoringRules) -> Dict[str, np.ndarray]:
+    """
+    Score whole columns of covenant values under `standards` (keyed like
+    RiskScoringEngine.standards; each a number or a per-row array, see
+    book_standards). Totals follow RiskEngine.analyze_deal:
+    overall score capped at 10, label bands at 7 and 3, and portfolio red
+    flags at a score of 7 or two High findings.
+    """
+    n = len(next(iter(values.values())))
+    total = np.zeros(n, dtype=np.int16)
+    counts = np.zeros((len(LEVELS), n), dtype=np.int8)
+    for covenant, ladder in ladders(rules).items():
+        scored = score_covenant(ladder, values[covenant], np.asarray(standards[ladder['standard']], dtype=np.float64))
+        total += scored['risk_score']
+        for code in range(len(LEVELS)):
+            counts[code] += scored['risk_level'] == code
+    overall = np.minimum(total, 10)
+    label = np.select([overall >= 7, overall >= 3], [2, 1], default=0).astype(np.int8)
+    return {
+        'overall_score': overall,
+        'risk_label': label,
+        'low_count': counts[0],
+        'medium_count': counts[1],
+        'high_count': counts[2],
+        'is_red_flag': (overall >= 7) | (counts[2] >= 2),
+    }
+
+
+class PortfolioColumns:
+    """Covenant values of the whole book as NumPy columns.
+
+    Loaded from PortfolioStore.covenant_rows() and kept in memory, with the
+    standard each covenant was scored against as '<covenant>_standard'. New deals
+    are appended on refresh() by reading only rows past the last id seen;
+    a bulk import (store.generation changes) triggers a full reload.
+    """
+
+    def __init__(self, store: PortfolioStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._generation: Optional[int] = None
+        self._last_id = 0
+        self.columns: Dict[str, np.ndarray] = self._empty()
+
+    def refresh(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            if self._generation != self.store.generation:
+                self._generation = self.store.generation
+                self._last_id = 0
+                self.columns = self._empty()
+            rows = self.store.covenant_rows(self._last_id)
+            if rows:
+                batch = self._to_columns(rows)
+                self.columns = {name: np.concatenate([self.columns[name], batch[name]]) for name in self.columns}
+                self._last_id = int(batch['id'][-1])
+            return self.columns
+
+    @staticmethod
+    def _empty() -> Dict[str, np.ndarray]:
+        return PortfolioColumns._to_columns([])
+
+    @staticmethod
+    def _to_columns(rows: List[tuple]) -> Dict[str, np.ndarray]:
+        ids, risk_scores, labels, red_flags, *covenants = zip(*rows) if rows else ((),) * (4 + len(COVENANT_COLUMNS) + len(STANDARD_COLUMNS))
+        columns = {
+            'id': np.array(ids, dtype=np.int64),
+            'risk_score': np.array(risk_scores, dtype=np.float64),
+            'risk_label': np.array([LEVELS.index(label) if label in LEVELS else -1 for label in labels], dtype=np.int8),
+            'is_red_flag': np.array(red_flags, dtype=bool),
+        }
+        for name, column in zip(COVENANT_COLUMNS + STANDARD_COLUMNS, covenants):
+            columns[name] = np.array(column, dtype=np.float64)  # None -> nan
+        return columns
+
+
+def standard_keys(rules: ScoringRules) -> List[str]:
+    """The standards the ladders score against - the keys book_standards() returns"""
+    return sorted({ladder['standard'] for ladder in ladders(rules).values()})
+
+
+def book_standards(columns: Dict[str, np.ndarray], defaults: Dict[str, Any], rules: ScoringRules, changes: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """
+    Per-row standards for score_book: the standard each deal was scored
+    against where stored, else `defaults` (RiskScoringEngine.standards), with
+    `changes` applied to every row.
+    """
+    changes = changes or {}
+    standards = {}
+    for covenant, ladder in ladders(rules).items():
+        key = ladder['standard']
+        if key in changes:
+            standards[key] = np.full(len(columns['id']), float(changes[key]))
+        else:
+            stored = columns[f'{covenant}_standard']
+            standards[key] = np.where(np.isnan(stored), float(defaults[key]), stored)
+    return standards
+
+
+def rescore(columns: Dict[str, np.ndarray], standards: Dict[str, np.ndarray], rules: ScoringRules) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (score, label code, red flag) per deal under `standards`. Deals with no
+    stored covenants can't be re-scored and keep their stored values.
+    """
+    values = {covenant: columns[covenant] for covenant in ladders(rules)}
+    rescorable = np.zeros(len(columns['id']), dtype=bool)
+    for column in values.values():
+        rescorable |= ~np.isnan(column)
+    scored = score_book(values, standards, rules)
+    return (
+        np.where(rescorable, scored['overall_score'], columns['risk_score']),
+        np.where(rescorable, scored['risk_label'], columns['risk_label']),
+        np.where(rescorable, scored['is_red_flag'], columns['is_red_flag']),
+    )
+
+
+def what_if(columns: Dict[str, np.ndarray], defaults: Dict[str, Any], changes: Dict[str, Any], rules: ScoringRules, movers: int = 20) -> Dict[str, Any]:
+    """
+    Portfolio impact of changing the standards in `changes`. The current
+    scenario re-scores every deal under the standards it was analyzed with,
+    so it reproduces the stored scores; the proposed one applies `changes`
+    to every deal on top of those.
+    """
+    rescorable = np.zeros(len(columns['id']), dtype=bool)
+    for covenant in ladders(rules):
+        rescorable |= ~np.isnan(columns[covenant])
+
+    before = rescore(columns, book_standards(columns, defaults, rules), rules)
+    after = rescore(columns, book_standards(columns, defaults, rules, changes), rules)
+
+    def summary(score, label, red_flag):
+        return {
+            'average_risk_score': round(float(score.mean()), 2) if len(score) else 0.0,
+            'labels': {level: int((label == code).sum()) for code, level in enumerate(LEVELS)},
+            'red_flags': int(red_flag.sum()),
+        }
+
+    delta = after[0] - before[0]
+    order = np.argsort(-np.abs(delta), kind='stable')[:movers]
+    return {
+        'deals': int(len(columns['id'])),
+        'rescorable': int(rescorable.sum()),
+        'current': summary(*before),
+        'proposed': summary(*after),
+        'label_changes': {
+            'riskier': int((after[1] > before[1]).sum()),
+            'safer': int((after[1] < before[1]).sum()),
+            'unchanged': int((after[1] == before[1]).sum()),
+        },
+        'largest_moves': [
+            {
+                'id': str(columns['id'][i]),
+                'current_score': float(before[0][i]),
+                'proposed_score': float(after[0][i]),
+                'current_label': LEVELS[before[1][i]] if before[1][i] >= 0 else None,
+                'proposed_label': LEVELS[after[1][i]] if after[1][i] >= 0 else None,
+            }
+            for i in order if delta[i] != 0
+        ],
+    }
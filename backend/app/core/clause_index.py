@@ -0,0 +1,285 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Optional
+
+from app.core.risk_engine import LMADocumentParser
+
+logger = logging.getLogger(__name__)
+
+CLAUSE_INDEX_DB = os.getenv(
+    "CLAUSE_INDEX_DB",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "clause_index.db"),
+)
+
+# Longest clause snippet kept per entry; enough for the operative sentence
+SNIPPET_CHARS = 600
+
+_SCHEMA = """
+-- clauses: the clause types the document was parsed for, comma-separated
+CREATE TABLE IF NOT EXISTS clause_documents (
+    doc_hash TEXT PRIMARY KEY,
+    indexed_at TEXT NOT NULL,
+    clauses TEXT
+);
+CREATE TABLE IF NOT EXISTS clause_entries (
+    id INTEGER PRIMARY KEY,
+    doc_hash TEXT NOT NULL,
+    clause TEXT NOT NULL,
+    value REAL,
+    raw_value TEXT,
+    position INTEGER NOT NULL,
+    snippet TEXT NOT NULL,
+    UNIQUE (doc_hash, clause)
+);
+CREATE INDEX IF NOT EXISTS idx_clause_entries_value ON clause_entries (clause, value);
+
+-- A deal is a portfolio entry ("portfolio:<id>") or a file in the deals directory ("file:<name>")
+CREATE TABLE IF NOT EXISTS clause_deals (
+    deal TEXT PRIMARY KEY,
+    doc_hash TEXT NOT NULL,
+    source TEXT NOT NULL,
+    name TEXT,
+    jurisdiction TEXT,
+    linked_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_clause_deals_doc ON clause_deals (doc_hash);
+CREATE INDEX IF NOT EXISTS idx_clause_deals_jurisdiction ON clause_deals (source, jurisdiction);
+"""
+
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS clause_text USING fts5(snippet, content='clause_entries', content_rowid='id')"
+
+
+class ClauseIndex:
+    """Inverted index of extracted clauses across every analyzed document.
+
+    Maps clause type to (deal, extracted value, position, clause text).
+    Entries belong to a document's content hash, so a document is indexed
+    once however many deals or filenames point at it; deals are linked to
+    a hash separately. Numeric covenant values are indexed on
+    (clause, value) for range queries, and clause text goes into an FTS5
+    table when SQLite has it (a LIKE scan otherwise). A document parsed
+    before the parser knew some clause type is re-indexed the next time it
+    is added with that type.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.fts = False
+
+    def has_document(self, doc_hash: str, clauses: Optional[Iterable[str]] = None) -> bool:
+        """Whether the document is indexed - with `clauses`, parsed for at least those clause types"""
+        row = self._conn().execute("SELECT clauses FROM clause_documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        if row is None:
+            return False
+        return clauses is None or set(clauses) <= set((row['clauses'] or '').split(','))
+
+    def parsed(self, doc_hash: str) -> Dict[str, Any]:
+        """The indexed clauses of a document, shaped like parse_document output (found clauses only)"""
+        rows = self._conn().execute(
+            "SELECT clause, raw_value, position, snippet FROM clause_entries WHERE doc_hash = ?", (doc_hash,),
+        )
+        return {
+            row['clause']: {'found': True, 'value': row['raw_value'], 'full_text': row['snippet'], 'position': row['position']}
+            for row in rows
+        }
+
+    def add_document(self, doc_hash: str, parsed: Dict[str, Any]) -> bool:
+        """
+        Index parse_document output for a document, unless its hash is
+        already indexed for the same clause types. Returns True if entries
+        were written.
+        """
+        rows = []
+        for clause, entry in parsed.items():
+            if not entry or not entry.get('found'):
+                continue
+            raw = entry.get('value')
+            convert = LMADocumentParser.VALUE_TYPES.get(clause)
+            value = float(convert(raw.replace(',', ''))) if convert and raw else None
+            rows.append((doc_hash, clause, value, raw, entry['position'], entry['full_text'][:SNIPPET_CHARS]))
+
+        conn = self._conn()
+        with self._write_lock, conn:
+            existing = conn.execute("SELECT clauses FROM clause_documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+            if existing is not None:
+                if set(parsed) <= set((existing['clauses'] or '').split(',')):
+                    return False
+                self._delete_entries(conn, doc_hash)
+            conn.execute(
+                "INSERT OR REPLACE INTO clause_documents (doc_hash, indexed_at, clauses) VALUES (?, ?, ?)",
+                (doc_hash, time.strftime("%Y-%m-%dT%H:%M:%S"), ','.join(sorted(parsed))),
+            )
+            for row in rows:
+                entry_id = conn.execute(
+                    "INSERT INTO clause_entries (doc_hash, clause, value, raw_value, position, snippet) VALUES (?, ?, ?, ?, ?, ?)",
+                    row,
+                ).lastrowid
+                if self.fts:
+                    conn.execute("INSERT INTO clause_text (rowid, snippet) VALUES (?, ?)", (entry_id, row[5]))
+        return True
+
+    def link(self, deal: str, doc_hash: str, source: str, name: Optional[str] = None, jurisdiction: Optional[str] = None):
+        """Point `deal` at an indexed document (replacing whatever it pointed at)"""
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO clause_deals (deal, doc_hash, source, name, jurisdiction, linked_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (deal, doc_hash, source, name, jurisdiction, time.strftime("%Y-%m-%dT%H:%M:%S")),
+            )
+
+    def unlink(self, deal: str) -> bool:
+        conn = self._conn()
+        with self._write_lock, conn:
+            return conn.execute("DELETE FROM clause_deals WHERE deal = ?", (deal,)).rowcount > 0
+
+    def linked(self, source: str) -> Dict[str, str]:
+        """{deal: doc_hash} for every deal from `source`"""
+        rows = self._conn().execute("SELECT deal, doc_hash FROM clause_deals WHERE source = ?", (source,))
+        return {deal: doc_hash for deal, doc_hash in rows}
+
+    def query(
+        self,
+        clause: str,
+        gt: Optional[float] = None,
+        gte: Optional[float] = None,
+        lt: Optional[float] = None,
+        lte: Optional[float] = None,
+        jurisdiction: Optional[str] = None,
+        source: Optional[str] = None,
+        text: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Deals whose `clause` matches: value bounds (numeric covenants), then
+        optionally jurisdiction, deal source and a full-text query over the
+        clause text. Ordered by value, then deal.
+        """
+        conn = self._conn()
+        clauses, params = ["e.clause = ?"], [clause]
+        for op, bound in (('>', gt), ('>=', gte), ('<', lt), ('<=', lte)):
+            if bound is not None:
+                clauses.append(f"e.value {op} ?")
+                params.append(bound)
+        if jurisdiction is not None:
+            clauses.append("d.jurisdiction = ?")
+            params.append(jurisdiction)
+        if source is not None:
+            clauses.append("d.source = ?")
+            params.append(source)
+        if text:
+            clauses.append(self._text_filter())
+            params.append(self._text_param(text))
+        sql = (
+            "SELECT d.deal, d.source, d.name, d.jurisdiction, e.clause, e.value, e.raw_value, e.position, e.snippet "
+            "FROM clause_entries e JOIN clause_deals d ON d.doc_hash = e.doc_hash "
+            f"WHERE {' AND '.join(clauses)} ORDER BY e.value, d.deal LIMIT ?"
+        )
+        return [dict(row) for row in conn.execute(sql, params + [limit])]
+
+    def search(self, text: str, clause: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Full-text lookup over clause text, across all clause types unless `clause` is given"""
+        conn = self._conn()
+        clauses, params = [self._text_filter()], [self._text_param(text)]
+        if clause is not None:
+            clauses.append("e.clause = ?")
+            params.append(clause)
+        sql = (
+            "SELECT d.deal, d.source, d.name, d.jurisdiction, e.clause, e.value, e.raw_value, e.position, e.snippet "
+            "FROM clause_entries e JOIN clause_deals d ON d.doc_hash = e.doc_hash "
+            f"WHERE {' AND '.join(clauses)} ORDER BY d.deal, e.clause LIMIT ?"
+        )
+        return [dict(row) for row in conn.execute(sql, params + [limit])]
+
+    def trends(self, clause: str, source: Optional[str] = 'portfolio') -> List[Dict[str, Any]]:
+        """
+        Per-jurisdiction figures for one clause type: deals indexed, deals
+        where the clause was found, and min / average / max of its value.
+        """
+        where, params = ("WHERE d.source = ?", [source]) if source else ("", [])
+        sql = (
+            "SELECT d.jurisdiction, COUNT(*) AS deals, COUNT(e.id) AS with_clause, "
+            "MIN(e.value) AS min_value, AVG(e.value) AS avg_value, MAX(e.value) AS max_value "
+            "FROM clause_deals d LEFT JOIN clause_entries e ON e.doc_hash = d.doc_hash AND e.clause = ? "
+            f"{where} GROUP BY d.jurisdiction ORDER BY deals DESC, d.jurisdiction"
+        )
+        return [dict(row) for row in self._conn().execute(sql, [clause] + params)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        return {
+            'documents': conn.execute("SELECT COUNT(*) FROM clause_documents").fetchone()[0],
+            'entries': conn.execute("SELECT COUNT(*) FROM clause_entries").fetchone()[0],
+            'deals': dict(conn.execute("SELECT source, COUNT(*) FROM clause_deals GROUP BY source").fetchall()),
+            'full_text': 'fts5' if self.fts else 'like',
+        }
+
+    def _delete_entries(self, conn: sqlite3.Connection, doc_hash: str):
+        if self.fts:
+            # External-content FTS rows are removed by replaying their original text
+            conn.execute(
+                "INSERT INTO clause_text (clause_text, rowid, snippet) "
+                "SELECT 'delete', id, snippet FROM clause_entries WHERE doc_hash = ?",
+                (doc_hash,),
+            )
+        conn.execute("DELETE FROM clause_entries WHERE doc_hash = ?", (doc_hash,))
+
+    def _text_filter(self) -> str:
+        if self.fts:
+            return "e.id IN (SELECT rowid FROM clause_text WHERE clause_text MATCH ?)"
+        return "e.snippet LIKE ? ESCAPE '\\'"
+
+    def _text_param(self, text: str) -> str:
+        if not text.strip():
+            # An empty MATCH expression is an FTS5 syntax error
+            raise ValueError("Search text is empty")
+        text = text.strip()
+        if self.fts:
+            # Each word as a quoted term, so user input can't inject FTS query syntax
+            return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self._initialize()
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _initialize(self):
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                with conn:
+                    conn.executescript(_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(clause_documents)")}
+                if 'clauses' not in columns:
+                    # Index created before clause types were recorded - its documents count as stale
+                    with conn:
+                        conn.execute("ALTER TABLE clause_documents ADD COLUMN clauses TEXT")
+                try:
+                    with conn:
+                        conn.execute(_FTS_SCHEMA)
+                    self.fts = True
+                except sqlite3.OperationalError:
+                    logger.warning("SQLite built without FTS5 - clause text search will use LIKE scans")
+            finally:
+                conn.close()
+            self._initialized = True
+
+
+clause_index = ClauseIndex(CLAUSE_INDEX_DB)
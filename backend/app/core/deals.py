@@ -0,0 +1,299 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Callable, Optional, TYPE_CHECKING
+
+from app.core.risk_engine import LMADocumentParser
+
+if TYPE_CHECKING:
+    from app.core.clause_index import ClauseIndex
+
+logger = logging.getLogger(__name__)
+
+# "Deal_Delta_Orig.txt" / "Deal_Delta_Amend12.txt". Anything else is a standalone document.
+_VERSION_NAME = re.compile(r"^(?P<base>.+?)_(?:(?P<orig>Orig)|Amend(?P<amend>\d+))\.txt$", re.IGNORECASE)
+_VALID_NAME = re.compile(r"^[\w\-.]+\.txt$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deal_versions (
+    filename TEXT PRIMARY KEY,
+    base TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    covenants TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deal_versions_lineage ON deal_versions (base, seq, filename);
+CREATE INDEX IF NOT EXISTS idx_deal_versions_hash ON deal_versions (hash);
+"""
+
+
+def parse_version_name(filename: str) -> Dict[str, Any]:
+    """
+    Split a filename into its base deal, version kind and sequence number.
+    Orig is version 0 and AmendN is version N, so Amend10 sorts after Amend2.
+    """
+    match = _VERSION_NAME.match(filename)
+    if not match:
+        return {'base': filename[:-len('.txt')] if filename.endswith('.txt') else filename, 'kind': 'document', 'seq': 0}
+    if match.group('orig'):
+        return {'base': match.group('base'), 'kind': 'orig', 'seq': 0}
+    return {'base': match.group('base'), 'kind': 'amendment', 'seq': int(match.group('amend'))}
+
+
+class DealVersionIndex:
+    """Persistent index of deal lineages (Orig, Amend1..N).
+
+    Each document is stored with its base deal, version number, content hash
+    and covenant snapshot, in SQLite so the index survives restarts. On
+    sync() only files whose mtime or size changed are re-read, and parses are
+    memoized by content hash, so a document is parsed once however many
+    filenames or re-indexes it goes through.
+    After that the index follows the directory through watch events
+    (watchfiles, when installed); without a watcher it re-lists the directory
+    only when the directory's own mtime moves. Listing a lineage is an indexed
+    lookup on (base, seq). Listeners registered with add_listener() are
+    called with the base deal name whenever one of its versions is added,
+    changed or removed. With a `clause_index`, every file is also linked
+    there as "file:<filename>", its clauses indexed from the same parse.
+    """
+
+    def __init__(self, data_dir: str, db_path: str, parser: Optional[LMADocumentParser] = None, clause_index: Optional['ClauseIndex'] = None):
+        self.data_dir = data_dir
+        self.db_path = db_path
+        self.parser = parser or LMADocumentParser()
+        self.clause_index = clause_index
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._dir_mtime = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def lineage(self, base: str) -> List[Dict[str, Any]]:
+        """Versions of `base` in order, with hash and covenant snapshot"""
+        self._ensure_current()
+        sql = "SELECT * FROM deal_versions WHERE base = ? ORDER BY seq, filename"
+        rows = self._conn().execute(sql, (base,)).fetchall()
+        if self._watcher is None:
+            # In-place edits don't touch the directory mtime; re-stat just this lineage
+            if sum(1 for row in rows if self.update(row['filename'])):
+                rows = self._conn().execute(sql, (base,)).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def versions(self, base: str) -> List[str]:
+        """Filenames of `base` in lineage order"""
+        return [version['filename'] for version in self.lineage(base)]
+
+    def bases(self) -> List[str]:
+        """Base deals with more than one version"""
+        self._ensure_current()
+        rows = self._conn().execute("SELECT base FROM deal_versions GROUP BY base HAVING COUNT(*) > 1 ORDER BY base")
+        return [row['base'] for row in rows]
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        self._ensure_current()
+        if self._watcher is None:
+            self.update(filename)
+        row = self._conn().execute("SELECT * FROM deal_versions WHERE filename = ?", (filename,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def sync(self) -> Dict[str, int]:
+        """Reconcile the index with the directory; returns counts of files indexed and removed"""
+        self._initialize()
+        self._dir_mtime = self._stat_dir()
+        try:
+            names = {f for f in os.listdir(self.data_dir) if _VALID_NAME.match(f)}
+        except FileNotFoundError:
+            names = set()
+        known = {row['filename'] for row in self._conn().execute("SELECT filename FROM deal_versions")}
+        indexed = sum(1 for name in names if self.update(name))
+        removed = sum(1 for name in known - names if self.remove(name))
+        if self.clause_index is not None:
+            self._sync_clause_index()
+        return {'indexed': indexed, 'removed': removed}
+
+    def update(self, filename: str) -> bool:
+        """(Re)index one file if it changed since it was last indexed. Returns True if it was written."""
+        if not _VALID_NAME.match(filename):
+            return False
+        path = os.path.join(self.data_dir, filename)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return self.remove(filename)
+
+        conn = self._conn()
+        row = conn.execute("SELECT mtime, size FROM deal_versions WHERE filename = ?", (filename,)).fetchone()
+        if row is not None and (row['mtime'], row['size']) == (st.st_mtime_ns, st.st_size):
+            return False
+
+        with open(path, "rb") as f:
+            content = f.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+        covenants = self._covenants_for(content_hash, content)
+        name = parse_version_name(filename)
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO deal_versions (filename, base, kind, seq, hash, mtime, size, covenants, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    filename, name['base'], name['kind'], name['seq'],
+                    content_hash, st.st_mtime_ns, st.st_size,
+                    covenants, time.strftime("%Y-%m-%dT%H:%M:%S"),
+                ),
+            )
+        if self.clause_index is not None:
+            self._link_file(filename, content_hash)
+        self._notify(name['base'])
+        return True
+
+    def add_listener(self, listener: Callable[[str], None]):
+        self._listeners.append(listener)
+
+    def _covenants_for(self, content_hash: str, content: bytes) -> str:
+        # Covenant snapshot as stored JSON; only parses content the indexes haven't seen before
+        row = self._conn().execute("SELECT covenants FROM deal_versions WHERE hash = ? LIMIT 1", (content_hash,)).fetchone()
+        if row is not None and (self.clause_index is None or self.clause_index.has_document(content_hash, self.parser.clause_patterns)):
+            return row['covenants']
+        parsed = self.parser.parse_document(content.decode("utf-8", errors="replace"))
+        if self.clause_index is not None:
+            self.clause_index.add_document(content_hash, parsed)
+        return json.dumps(self.parser.covenant_values(parsed))
+
+    def _sync_clause_index(self):
+        # Catch up files indexed before the clause index (or one of its clause types) existed, and drop links to removed files
+        linked = self.clause_index.linked('file')
+        rows = self._conn().execute("SELECT filename, hash FROM deal_versions").fetchall()
+        for filename, content_hash in rows:
+            current = self.clause_index.has_document(content_hash, self.parser.clause_patterns)
+            if linked.pop(f"file:{filename}", None) == content_hash and current:
+                continue
+            if not current:
+                try:
+                    with open(os.path.join(self.data_dir, filename), "rb") as f:
+                        self._covenants_for(content_hash, f.read())
+                except FileNotFoundError:
+                    continue
+            self._link_file(filename, content_hash)
+        for deal in linked:
+            self.clause_index.unlink(deal)
+
+    def _link_file(self, filename: str, content_hash: str):
+        # Jurisdiction comes from the governing-law clause already in the index
+        metadata = self.parser.deal_metadata(self.clause_index.parsed(content_hash))
+        jurisdiction = metadata['jurisdiction'] or self.parser.UNKNOWN_JURISDICTION
+        self.clause_index.link(f"file:{filename}", content_hash, source='file', name=filename, jurisdiction=jurisdiction)
+
+    def remove(self, filename: str) -> bool:
+        conn = self._conn()
+        with self._write_lock, conn:
+            cursor = conn.execute("DELETE FROM deal_versions WHERE filename = ?", (filename,))
+        if cursor.rowcount == 0:
+            return False
+        if self.clause_index is not None:
+            self.clause_index.unlink(f"file:{filename}")
+        self._notify(parse_version_name(filename)['base'])
+        return True
+
+    def _notify(self, base: str):
+        for listener in self._listeners:
+            try:
+                listener(base)
+            except Exception:
+                logger.warning("Deal index listener failed for %s", base, exc_info=True)
+
+    def start_watching(self):
+        """Follow directory changes in a background thread (needs watchfiles)"""
+        try:
+            import watchfiles
+        except ImportError:
+            logger.info("watchfiles not installed - deal index will poll the directory mtime instead")
+            return
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(watchfiles,), name="deal-index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self, watchfiles):
+        try:
+            for changes in watchfiles.watch(self.data_dir, stop_event=self._stop, recursive=False):
+                for _, path in changes:
+                    filename = os.path.basename(path)
+                    try:
+                        # update() also handles deletions: a missing file is removed from the index
+                        self.update(filename)
+                    except Exception:
+                        logger.warning("Deal index update failed for %s", filename, exc_info=True)
+                self._dir_mtime = self._stat_dir()
+        except Exception:
+            logger.error("Deal index watcher stopped", exc_info=True)
+        finally:
+            self._watcher = None
+
+    def _ensure_current(self):
+        self._initialize()
+        if self._watcher is not None:
+            return
+        # Not watching: one stat tells us whether files were added, removed or renamed
+        if self._stat_dir() != self._dir_mtime:
+            self.sync()
+
+    def _stat_dir(self) -> Optional[int]:
+        try:
+            return os.stat(self.data_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self._initialize()
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _initialize(self):
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                with conn:
+                    conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            self._initialized = True
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'filename': row['filename'],
+            'base': row['base'],
+            'kind': row['kind'],
+            'version': row['seq'],
+            'hash': row['hash'],
+            'covenants': json.loads(row['covenants']),
+            'indexed_at': row['indexed_at'],
+        }
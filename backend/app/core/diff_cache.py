@@ -0,0 +1,74 @@
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+DiffKey = Tuple[str, str]
+
+
+class DiffCache:
+    """LRU cache of amendment diffs under a memory budget.
+
+    Keyed by (content hash of the old version, content hash of the new one),
+    so a cached diff stays valid across renames and is never served for
+    edited content. Entries are stored as zlib-compressed JSON; the budget
+    counts compressed bytes and the least recently used diffs are evicted
+    once it is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[DiffKey, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: DiffKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(zlib.decompress(blob))
+
+    def put(self, key: DiffKey, diff: Dict[str, Any]):
+        blob = zlib.compress(json.dumps(diff, separators=(',', ':')).encode(), 6)
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = blob
+            self._bytes += len(blob)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def __contains__(self, key: DiffKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
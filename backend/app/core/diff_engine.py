@@ -0,0 +1,164 @@
+import difflib
+import hashlib
+import re
+from typing import List, Dict, Any, Optional
+
+from app.core.risk_engine import LMADocumentParser
+
+# Clause headings: "SECTION 8.", "8.1 Financial Covenants", "23. Events of Default"
+_CLAUSE_HEADING = re.compile(r'^(SECTION\s+\d+\.|\d+(?:\.\d+)+\.?(?=\s)|\d+\.(?=\s))', re.MULTILINE | re.IGNORECASE)
+
+# Whether a higher value gives the borrower more room (i.e. weakens lender protection)
+LOOSER_WHEN_HIGHER = {
+    'leverage_ratio': True,
+    'interest_cover': False,
+    'grace_period': True,
+    'cross_default': True,
+}
+
+COVENANT_LABELS = {
+    'leverage_ratio': 'Leverage Ratio',
+    'interest_cover': 'Interest Cover',
+    'grace_period': 'Non-payment Grace Period',
+    'cross_default': 'Cross Default Threshold',
+}
+
+
+def split_clauses(text: str) -> List[Dict[str, Any]]:
+    """
+    Split a document into numbered clauses. Text before the first heading
+    becomes a 'preamble' clause. Repeated numbers get an occurrence suffix
+    so every key is unique.
+    """
+    starts = [m.start() for m in _CLAUSE_HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+
+    clauses = []
+    seen: Dict[str, int] = {}
+    for begin, end in zip(starts, starts[1:]):
+        body = text[begin:end]
+        if not body.strip():
+            continue
+        match = _CLAUSE_HEADING.match(body)
+        number = ' '.join(match.group(1).rstrip('.').split()).upper() if match else 'preamble'
+        seen[number] = seen.get(number, 0) + 1
+        key = number if seen[number] == 1 else f"{number}#{seen[number]}"
+        clauses.append({
+            'key': key,
+            'number': number,
+            'heading': body[:body.find('\n')].strip() if '\n' in body else body.strip(),
+            'text': body,
+            'start': begin,
+            'end': end,
+            'hash': hashlib.sha1(body.strip().encode()).hexdigest(),
+        })
+    return clauses
+
+
+def direction(covenant: str, old: Optional[float], new: Optional[float]) -> str:
+    """'loosened', 'tightened', 'added', 'removed' or 'unchanged' from the lender's point of view"""
+    if old == new:
+        return 'unchanged'
+    if old is None:
+        return 'added'
+    if new is None:
+        return 'removed'
+    return 'loosened' if (new > old) == LOOSER_WHEN_HIGHER[covenant] else 'tightened'
+
+
+class ClauseDiffEngine:
+    """Clause-level semantic diff between two versions of an agreement.
+
+    Both versions are split into numbered clauses and each clause is hashed.
+    Clauses whose content hash appears in both versions are skipped outright;
+    the line diff only runs inside clauses that actually changed. Covenant
+    values are extracted with LMADocumentParser and reported as structured
+    changes, tagged with the clause they sit in.
+    """
+
+    def __init__(self, parser: Optional[LMADocumentParser] = None):
+        self.parser = parser or LMADocumentParser()
+
+    def compare(self, text1: str, text2: str, values1: Optional[Dict[str, Any]] = None, values2: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Diff two documents. `values1`/`values2` may carry already-extracted
+        covenant values (LMADocumentParser.covenant_values) to skip re-parsing.
+        """
+        clauses1 = split_clauses(text1)
+        clauses2 = split_clauses(text2)
+        hashes1 = {c['hash'] for c in clauses1}
+        hashes2 = {c['hash'] for c in clauses2}
+
+        clause_changes = []
+        unchanged = 0
+        matcher = difflib.SequenceMatcher(None, [c['key'] for c in clauses1], [c['key'] for c in clauses2], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                for old, new in zip(clauses1[i1:i2], clauses2[j1:j2]):
+                    if old['hash'] == new['hash']:
+                        unchanged += 1
+                    else:
+                        clause_changes.append(self._clause_change(new['key'], new['heading'], 'modified', old['text'], new['text']))
+                continue
+            # Renumbered or moved clauses keep their hash - treat them as unchanged
+            for old in clauses1[i1:i2]:
+                if old['hash'] in hashes2:
+                    unchanged += 1
+                else:
+                    clause_changes.append(self._clause_change(old['key'], old['heading'], 'removed', old['text'], ''))
+            for new in clauses2[j1:j2]:
+                if new['hash'] not in hashes1:
+                    clause_changes.append(self._clause_change(new['key'], new['heading'], 'added', '', new['text']))
+
+        covenant_changes = []
+        if clause_changes:
+            parsed = {}
+            if values1 is None:
+                parsed[1] = self.parser.parse_document(text1)
+                values1 = self.parser.covenant_values(parsed[1])
+            if values2 is None:
+                parsed[2] = self.parser.parse_document(text2)
+                values2 = self.parser.covenant_values(parsed[2])
+            for covenant in LOOSER_WHEN_HIGHER:
+                old, new = values1.get(covenant), values2.get(covenant)
+                if old == new:
+                    continue
+                # Locate the clause holding the new value (or the old one, if it was removed)
+                side, clauses, text = (2, clauses2, text2) if new is not None else (1, clauses1, text1)
+                if side not in parsed:
+                    parsed[side] = self.parser.parse_document(text)
+                covenant_changes.append({
+                    'covenant': covenant,
+                    'label': COVENANT_LABELS[covenant],
+                    'from': old,
+                    'to': new,
+                    'direction': direction(covenant, old, new),
+                    'clause': self._clause_at(clauses, parsed[side].get(covenant)),
+                })
+
+        return {
+            'changes': [line for change in clause_changes for line in change['changes']],
+            'clauses': clause_changes,
+            'covenant_changes': covenant_changes,
+            'unchanged_clauses': unchanged,
+        }
+
+    @staticmethod
+    def _clause_change(key: str, heading: str, status: str, old_text: str, new_text: str) -> Dict[str, Any]:
+        lines = []
+        for line in difflib.unified_diff(old_text.splitlines(), new_text.splitlines(), lineterm='', n=0):
+            if line.startswith('---') or line.startswith('+++') or line.startswith('@@'):
+                continue
+            lines.append(line)
+        return {'clause': key, 'heading': heading, 'status': status, 'changes': lines}
+
+    @staticmethod
+    def _clause_at(clauses: List[Dict[str, Any]], match: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not match:
+            return None
+        for clause in clauses:
+            if clause['start'] <= match['position'] < clause['end']:
+                return clause['key']
+        return None
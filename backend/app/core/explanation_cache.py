@@ -0,0 +1,106 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# The only risk_data fields an explanation depends on
+KEY_FIELDS = ('clause_type', 'extracted_value', 'standard_value', 'risk_level', 'severity')
+
+
+class ExplanationCache:
+    """Content-addressed cache for AI explanations.
+    
+    Keyed by a hash of the explanation-relevant risk_data fields plus the
+    model name, so the same finding across deals is only ever sent to the
+    LLM once. Two tiers:
+    - in-memory LRU (`max_entries`)
+    - optional SQLite file (`db_path`) shared across processes and restarts
+    In both, entries older than `ttl` seconds are treated as missing.
+    """
+    
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None, ttl: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.ttl = ttl
+        # key -> (text, expiry time)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0, 'evictions': 0}
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS explanations (key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+    
+    @staticmethod
+    def key(risk_data: Dict[str, Any], model: str) -> str:
+        payload = {field: risk_data.get(field) for field in KEY_FIELDS}
+        payload['model'] = model
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            now = time.time()
+            entry = self._entries.get(key)
+            if entry is not None:
+                text, expires_at = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    self.stats['memory_hits'] += 1
+                    return text
+                del self._entries[key]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT text, created_at FROM explanations WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0], row[1])
+                    self.stats['hits'] += 1
+                    self.stats['disk_hits'] += 1
+                    return row[0]
+            
+            self.stats['misses'] += 1
+            return None
+    
+    def put(self, key: str, text: str):
+        with self._lock:
+            created_at = time.time()
+            self._remember(key, text, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO explanations (key, text, created_at) VALUES (?, ?, ?)",
+                    (key, text, created_at),
+                )
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM explanations")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'persistent': self._db is not None,
+            }
+    
+    def _remember(self, key: str, text: str, created_at: float):
+        # Caller holds the lock
+        self._entries[key] = (text, created_at + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
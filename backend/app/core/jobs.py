@@ -0,0 +1,175 @@
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, Any, Callable, Optional
+
+# Lanes in priority order. Interactive work always runs before bulk work.
+LANES = ('interactive', 'bulk')
+
+STAGES = ('parse', 'score', 'explain')
+
+
+class JobQueue:
+    """In-process analysis job queue with priority lanes.
+
+    Jobs wait in one FIFO per lane. General workers take the oldest
+    interactive job first and only fall back to bulk work when no interactive
+    job is waiting. `reserved_workers` threads take interactive jobs only, so
+    a single-deal request starts immediately even while every general worker
+    is busy with a bulk re-score.
+
+    `runner(payload, progress)` does the work. It calls `progress(stage)` as
+    it enters each of STAGES and returns the result. Finished jobs are kept
+    (up to `history`) so results can be fetched later. Nothing is persisted:
+    queued jobs are lost on restart.
+    """
+
+    def __init__(self, runner: Callable[[Dict[str, Any], Callable[[str], None]], Any], workers: int = 2, reserved_workers: int = 1, history: int = 1000):
+        self.runner = runner
+        self.workers = workers
+        self.reserved_workers = reserved_workers
+        self.history = history
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._finished = deque()
+        self._lanes = {lane: deque() for lane in LANES}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = 0
+        self._stopping = False
+        self._seq = itertools.count(1)
+
+    def submit(self, payload: Dict[str, Any], priority: str = 'interactive') -> Dict[str, Any]:
+        if priority not in self._lanes:
+            raise ValueError(f"Unknown priority: {priority}")
+        self._start()
+        job = {
+            'id': uuid.uuid4().hex,
+            'seq': next(self._seq),
+            'priority': priority,
+            'status': 'queued',
+            'progress': {stage: 'pending' for stage in STAGES},
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+            'result': None,
+            'payload': payload,
+        }
+        with self._cond:
+            self._jobs[job['id']] = job
+            self._lanes[priority].append(job)
+            self._cond.notify_all()
+        return self.status(job['id'])
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = {k: v for k, v in job.items() if k not in ('payload', 'result', 'seq')}
+            status['progress'] = dict(job['progress'])
+            if job['status'] == 'queued':
+                status['queue_position'] = self._position(job)
+            return status
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job record including its result, or None for an unknown id"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {'status': job['status'], 'error': job['error'], 'result': job['result']}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return {
+                'workers': self.workers,
+                'reserved_interactive_workers': self.reserved_workers,
+                'running': self._running,
+                'queued': {lane: len(queue) for lane, queue in self._lanes.items()},
+                'jobs': counts,
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def _start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers + self.reserved_workers):
+                lanes = LANES if i < self.workers else ('interactive',)
+                thread = threading.Thread(target=self._work, args=(lanes,), name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self, lanes):
+        while True:
+            with self._cond:
+                job = None
+                while job is None:
+                    if self._stopping:
+                        return
+                    for lane in lanes:
+                        if self._lanes[lane]:
+                            job = self._lanes[lane].popleft()
+                            break
+                    else:
+                        self._cond.wait()
+                job['status'] = 'running'
+                job['started_at'] = time.time()
+                self._running += 1
+
+            try:
+                result = self.runner(job['payload'], lambda stage: self._progress(job, stage))
+                error = None
+            except Exception as e:
+                result, error = None, getattr(e, 'detail', None) or str(e) or type(e).__name__
+
+            with self._cond:
+                self._running -= 1
+                job['finished_at'] = time.time()
+                job['payload'] = None
+                if error is None:
+                    job['status'] = 'done'
+                    job['result'] = result
+                    for stage in STAGES:
+                        job['progress'][stage] = 'done'
+                else:
+                    job['status'] = 'failed'
+                    job['error'] = error
+                    for stage, state in job['progress'].items():
+                        if state == 'running':
+                            job['progress'][stage] = 'failed'
+                self._finished.append(job['id'])
+                # Keep the most recent `history` finished jobs
+                while len(self._finished) > self.history:
+                    self._jobs.pop(self._finished.popleft(), None)
+
+    def _progress(self, job: Dict[str, Any], stage: str):
+        with self._cond:
+            progress = job['progress']
+            # Entering a stage completes every earlier one
+            for earlier in STAGES[:STAGES.index(stage)]:
+                progress[earlier] = 'done'
+            progress[stage] = 'running'
+
+    def _position(self, job: Dict[str, Any]) -> int:
+        # Caller holds the lock. 0 means next to run.
+        ahead = 0
+        for lane in LANES:
+            if lane == job['priority']:
+                return ahead + sum(1 for queued in self._lanes[lane] if queued['seq'] < job['seq'])
+            ahead += len(self._lanes[lane])
+        return ahead
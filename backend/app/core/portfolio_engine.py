@@ -0,0 +1,575 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from app.core.metrics import span
+
+_COLUMNS = (
+    'id', 'deal_name', 'jurisdiction', 'vintage', 'risk_score', 'risk_label',
+    'high_risk_count', 'medium_risk_count', 'low_risk_count', 'is_red_flag', 'analyzed_at', 'facility_type',
+    'vintage_year',
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolio (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deal_name TEXT NOT NULL,
+    jurisdiction TEXT NOT NULL,
+    vintage TEXT NOT NULL,
+    risk_score REAL NOT NULL,
+    risk_label TEXT NOT NULL,
+    high_risk_count INTEGER NOT NULL,
+    medium_risk_count INTEGER NOT NULL,
+    low_risk_count INTEGER NOT NULL,
+    is_red_flag INTEGER NOT NULL,
+    analyzed_at TEXT NOT NULL,
+    facility_type TEXT,
+    -- vintage_year(vintage), so vintage ranges compare years and 'N/A' sits at 0
+    vintage_year INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_portfolio_jurisdiction ON portfolio (jurisdiction);
+CREATE INDEX IF NOT EXISTS idx_portfolio_risk_label ON portfolio (risk_label);
+CREATE INDEX IF NOT EXISTS idx_portfolio_is_red_flag ON portfolio (is_red_flag);
+CREATE INDEX IF NOT EXISTS idx_portfolio_risk_score ON portfolio (risk_score, id);
+
+CREATE TABLE IF NOT EXISTS portfolio_aggregates (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS portfolio_jurisdictions (
+    jurisdiction TEXT PRIMARY KEY,
+    deals INTEGER NOT NULL,
+    first_id INTEGER NOT NULL
+);
+
+-- Extracted covenant values and the standards each was scored against, kept
+-- so the book can be re-scored without the documents
+CREATE TABLE IF NOT EXISTS portfolio_covenants (
+    deal_id INTEGER PRIMARY KEY,
+    leverage_ratio REAL,
+    interest_cover REAL,
+    grace_period REAL,
+    cross_default REAL,
+    leverage_ratio_standard REAL,
+    interest_cover_standard REAL,
+    grace_period_standard REAL,
+    cross_default_standard REAL
+);
+
+-- Full analysis result per deal (deviations, counts), so reports never re-parse the document
+CREATE TABLE IF NOT EXISTS portfolio_analyses (
+    deal_id INTEGER PRIMARY KEY,
+    deal_hash TEXT NOT NULL,
+    rules_version TEXT NOT NULL,
+    analysis TEXT NOT NULL
+);
+"""
+
+COVENANT_COLUMNS = ('leverage_ratio', 'interest_cover', 'grace_period', 'cross_default')
+# Standard in force when each covenant was scored (template values override the rule table's)
+STANDARD_COLUMNS = tuple(f'{covenant}_standard' for covenant in COVENANT_COLUMNS)
+
+# sort name -> (column, direction). Every order ends on id so keyset cursors are unambiguous.
+SORTS = {
+    'id': (None, 'ASC'),
+    'risk_score': ('risk_score', 'ASC'),
+    '-risk_score': ('risk_score', 'DESC'),
+}
+
+# Deal fields extracted from the document, which backfill_metadata() may fill in later
+METADATA_COLUMNS = ('jurisdiction', 'vintage', 'facility_type')
+
+# Vintages before this year count as legacy documentation
+LEGACY_VINTAGE = 2020
+
+
+def vintage_year(vintage: Any) -> int:
+    """Year of a stored vintage; 0 (so legacy) when it isn't a number, e.g. 'N/A'"""
+    try:
+        return int(str(vintage).strip())
+    except ValueError:
+        return 0
+
+
+def build_filters(
+    jurisdiction: Optional[str] = None,
+    vintage_from: Optional[int] = None,
+    vintage_to: Optional[int] = None,
+    risk_label: Optional[str] = None,
+    is_red_flag: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Listing filters for PortfolioStore.page() and stream(); None means unfiltered"""
+    return {
+        'jurisdiction': jurisdiction,
+        'vintage_from': vintage_from,
+        'vintage_to': vintage_to,
+        'risk_label': risk_label,
+        'is_red_flag': is_red_flag,
+    }
+
+
+# Full-scan aggregates, used on bulk import and by verify_stats(). The stored
+# vintage_year column is the same vintage_year() the incremental path in
+# _apply_to_aggregates applies, so the two agree
+_RECOMPUTE_AGGREGATES = f"""
+SELECT
+    COUNT(*) AS total_deals,
+    COALESCE(SUM(risk_label = 'High'), 0) AS high_risk_count,
+    COALESCE(SUM(risk_score), 0) AS risk_score_sum,
+    COALESCE(SUM(vintage_year < {LEGACY_VINTAGE}), 0) AS pre_2020_documentation,
+    COALESCE(SUM(is_red_flag), 0) AS red_flags
+FROM portfolio
+"""
+
+_RECOMPUTE_JURISDICTIONS = """
+SELECT jurisdiction, COUNT(*) AS deals, MIN(id) AS first_id
+FROM portfolio
+GROUP BY jurisdiction
+"""
+
+
+class PortfolioStore:
+    """SQLite-backed portfolio storage.
+
+    - WAL journal: readers never block the writer
+    - IDs come from INTEGER PRIMARY KEY AUTOINCREMENT, so concurrent adds can't collide
+    - Appends are a single-row INSERT, independent of book size
+    - Indexed on jurisdiction, vintage year, risk_label and is_red_flag for filtering
+    - Listing uses keyset (cursor) pagination and can stream rows straight
+      from the database cursor without materialising the book
+    - Dashboard aggregates are kept in side tables, updated in the same
+      transaction as each add and recomputed only on bulk import, so
+      stats() costs the same regardless of book size
+
+    On first use an empty database is populated from `legacy_json` (the old
+    portfolio.json) if it exists, otherwise from `seed()`.
+    """
+
+    def __init__(self, db_path: str, seed: Optional[Callable[[], List[Dict[str, Any]]]] = None, legacy_json: Optional[str] = None):
+        self.db_path = db_path
+        self.seed = seed
+        self.legacy_json = legacy_json
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        # Bumped whenever existing rows may have changed (not on appends)
+        self.generation = 0
+
+    def add(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Append one deal; returns it with the allocated id. An optional
+        'covenants' dict (see COVENANT_COLUMNS) is stored alongside for re-scoring,
+        with an optional 'standards' dict giving, per covenant, the standard it
+        was scored against, and an optional 'analysis' dict (the full result) for reports.
+        """
+        conn = self._conn()
+        row = self._to_row(item)
+        with span('portfolio_save'), conn:
+            cursor = conn.execute(
+                f"INSERT INTO portfolio ({', '.join(_COLUMNS[1:])}) VALUES ({', '.join('?' * (len(_COLUMNS) - 1))})",
+                row[1:],
+            )
+            self._apply_to_aggregates(conn, cursor.lastrowid, row)
+            if item.get('covenants'):
+                self._write_covenants(conn, [(cursor.lastrowid, item['covenants'], item.get('standards'))])
+            if item.get('analysis'):
+                self._write_analyses(conn, [(cursor.lastrowid, item['analysis'])])
+        return {'id': str(cursor.lastrowid), **{k: v for k, v in item.items() if k not in ('id', 'covenants', 'standards', 'analysis')}}
+
+    def bulk_import(self, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert many deals in one transaction, keeping ids where given. Returns rows written.
+        Covenants (with their 'standards', if given) and analyses are stored for
+        items that carry both an id and a 'covenants' / 'analysis' dict.
+        """
+        conn = self._conn()
+        items = list(items)
+        rows = [self._to_row(item) for item in items]
+        with span('portfolio_save'), conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO portfolio ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+            # Replaced rows lose whatever covenants they had unless new ones are given
+            replaced = [(row[0],) for row in rows if row[0] is not None]
+            conn.executemany("DELETE FROM portfolio_covenants WHERE deal_id = ?", replaced)
+            conn.executemany("DELETE FROM portfolio_analyses WHERE deal_id = ?", replaced)
+            self._write_covenants(conn, [
+                (row[0], item['covenants'], item.get('standards'))
+                for row, item in zip(rows, items) if row[0] is not None and item.get('covenants')
+            ])
+            self._write_analyses(conn, [
+                (row[0], item['analysis']) for row, item in zip(rows, items) if row[0] is not None and item.get('analysis')
+            ])
+            # Rows may have been replaced, so increments can't be trusted here
+            self._recompute_aggregates(conn)
+        self.generation += 1
+        return len(rows)
+
+    def update_metadata(self, updates: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Set extracted fields (see METADATA_COLUMNS) on existing deals, as
+        {id: {column: value}}; None values leave the column as it is.
+        Returns rows changed.
+        """
+        rows = [
+            (
+                *(fields.get(column) for column in METADATA_COLUMNS),
+                vintage_year(fields['vintage']) if fields.get('vintage') is not None else None,
+                deal_id,
+            )
+            for deal_id, fields in updates.items()
+        ]
+        if not rows:
+            return 0
+        conn = self._conn()
+        with span('portfolio_save'), conn:
+            changed = conn.executemany(
+                f"UPDATE portfolio SET {', '.join(f'{c} = COALESCE(?, {c})' for c in METADATA_COLUMNS + ('vintage_year',))} WHERE id = ?",
+                rows,
+            ).rowcount
+            # Jurisdictions and vintages feed the aggregates
+            self._recompute_aggregates(conn)
+        self.generation += 1
+        return changed
+
+    def document_hashes(self) -> Dict[int, str]:
+        """{id: hash of the analyzed document} for deals with a stored analysis that records one"""
+        rows = self._conn().execute(
+            "SELECT deal_id, json_extract(analysis, '$.document_hash') FROM portfolio_analyses "
+            "WHERE json_extract(analysis, '$.document_hash') IS NOT NULL"
+        )
+        return {deal_id: document_hash for deal_id, document_hash in rows}
+
+    def get(self, deal_id: int) -> Optional[Dict[str, Any]]:
+        with span('portfolio_load'):
+            row = self._conn().execute("SELECT * FROM portfolio WHERE id = ?", (deal_id,)).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    def analyses(self, deal_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Stored analyses for `deal_ids`, as {id: {'deal_hash', 'rules_version', 'analysis'}}.
+        Deals added without one (e.g. seeded or imported rows) are absent.
+        """
+        result = {}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(deal_ids), 500):
+            chunk = deal_ids[start:start + 500]
+            rows = self._conn().execute(
+                f"SELECT deal_id, deal_hash, rules_version, analysis FROM portfolio_analyses "
+                f"WHERE deal_id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for deal_id, deal_hash, rules_version, analysis in rows:
+                result[deal_id] = {'deal_hash': deal_hash, 'rules_version': rules_version, 'analysis': json.loads(analysis)}
+        return result
+
+    def all(self) -> List[Dict[str, Any]]:
+        with span('portfolio_load'):
+            return [self._from_row(row) for row in self._conn().execute("SELECT * FROM portfolio ORDER BY id")]
+
+    def page(self, filters: Optional[Dict[str, Any]] = None, sort: str = 'id', limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of deals matching `filters`, ordered by `sort` (see SORTS).
+        Pass the returned `next_cursor` back to get the following page; it is
+        None on the last page.
+        """
+        sql, params = self._select(filters, sort, cursor)
+        with span('portfolio_load'):
+            rows = self._conn().execute(sql + " LIMIT ?", params + [limit + 1]).fetchall()
+        items = [self._from_row(row) for row in rows[:limit]]
+        next_cursor = self._encode_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+        return {'items': items, 'next_cursor': next_cursor}
+    
+    def stream(self, filters: Optional[Dict[str, Any]] = None, sort: str = 'id', batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield matching deals in batches as they are read from the database.
+        Uses its own connection, so the generator may be advanced from any thread.
+        """
+        self._initialize()
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            sql, params = self._select(filters, sort, None)
+            rows = conn.execute(sql, params)
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield [self._from_row(row) for row in batch]
+        finally:
+            conn.close()
+    
+    def covenant_rows(self, after_id: int = 0) -> List[tuple]:
+        """
+        (id, risk_score, risk_label, is_red_flag, *COVENANT_COLUMNS, *STANDARD_COLUMNS)
+        for deals with id > after_id, in id order. Covenants and standards are
+        NULL where not stored.
+        """
+        return self._conn().execute(
+            f"SELECT p.id, p.risk_score, p.risk_label, p.is_red_flag, {', '.join('c.' + c for c in COVENANT_COLUMNS + STANDARD_COLUMNS)} "
+            "FROM portfolio p LEFT JOIN portfolio_covenants c ON c.deal_id = p.id "
+            "WHERE p.id > ? ORDER BY p.id",
+            (after_id,),
+        ).fetchall()
+    
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM portfolio").fetchone()[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Maintained aggregates - O(1) in the number of deals"""
+        conn = self._conn()
+        # One read transaction so the two tables are consistent with each other
+        with span('portfolio_load'), conn:
+            conn.execute("BEGIN")
+            return self._read_stats(conn)
+    
+    def verify_stats(self) -> Dict[str, Any]:
+        """Compare the maintained aggregates against a full recompute"""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            maintained = self._read_stats(conn)
+            recomputed = self._format_stats(
+                dict(conn.execute(_RECOMPUTE_AGGREGATES).fetchone()),
+                [(row['jurisdiction'], row['deals']) for row in conn.execute(_RECOMPUTE_JURISDICTIONS + " ORDER BY first_id")],
+            )
+        mismatches = {
+            key: {'maintained': maintained[key], 'recomputed': recomputed[key]}
+            for key in recomputed
+            if maintained[key] != recomputed[key]
+        }
+        return {'consistent': not mismatches, 'mismatches': mismatches}
+    
+    def rebuild_stats(self):
+        """Recompute the maintained aggregates from scratch"""
+        conn = self._conn()
+        with conn:
+            self._recompute_aggregates(conn)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self._initialize()
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _initialize(self):
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executescript(_SCHEMA)
+                if 'facility_type' not in {row[1] for row in conn.execute("PRAGMA table_info(portfolio)")}:
+                    # Database created before facility types were extracted
+                    with conn:
+                        conn.execute("ALTER TABLE portfolio ADD COLUMN facility_type TEXT")
+                if 'vintage_year' not in {row[1] for row in conn.execute("PRAGMA table_info(portfolio)")}:
+                    # Database created before vintage years were stored; older versions indexed the
+                    # vintage text, or vintage_year(vintage) through a function this connection lacks
+                    with conn:
+                        conn.execute("DROP INDEX IF EXISTS idx_portfolio_vintage")
+                        conn.execute("DROP INDEX IF EXISTS idx_portfolio_vintage_year")
+                        conn.execute("ALTER TABLE portfolio ADD COLUMN vintage_year INTEGER NOT NULL DEFAULT 0")
+                        conn.executemany(
+                            "UPDATE portfolio SET vintage_year = ? WHERE id = ?",
+                            [(vintage_year(vintage), row_id) for row_id, vintage in conn.execute("SELECT id, vintage FROM portfolio").fetchall()],
+                        )
+                with conn:
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_vintage_year ON portfolio (vintage_year)")
+                covenant_columns = {row[1] for row in conn.execute("PRAGMA table_info(portfolio_covenants)")}
+                for column in STANDARD_COLUMNS:
+                    if column not in covenant_columns:
+                        # Database created before standards were stored; those deals are re-scored under the defaults
+                        with conn:
+                            conn.execute(f"ALTER TABLE portfolio_covenants ADD COLUMN {column} REAL")
+                if conn.execute("SELECT COUNT(*) FROM portfolio").fetchone()[0] == 0:
+                    items = self._initial_items()
+                    with conn:
+                        conn.executemany(
+                            f"INSERT INTO portfolio ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                            [self._to_row(item) for item in items],
+                        )
+                        self._recompute_aggregates(conn)
+                elif conn.execute("SELECT COUNT(*) FROM portfolio_aggregates").fetchone()[0] == 0:
+                    # Database created before aggregates were maintained
+                    with conn:
+                        self._recompute_aggregates(conn)
+            finally:
+                conn.close()
+            self._initialized = True
+
+    @staticmethod
+    def _apply_to_aggregates(conn: sqlite3.Connection, row_id: int, row: tuple):
+        _, _, jurisdiction, _, risk_score, risk_label, _, _, _, is_red_flag, _, _, year = row
+        increments = {
+            'total_deals': 1,
+            'high_risk_count': int(risk_label == 'High'),
+            'risk_score_sum': risk_score,
+            'pre_2020_documentation': int(year < LEGACY_VINTAGE),
+            'red_flags': is_red_flag,
+        }
+        conn.executemany(
+            "INSERT INTO portfolio_aggregates (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            list(increments.items()),
+        )
+        conn.execute(
+            "INSERT INTO portfolio_jurisdictions (jurisdiction, deals, first_id) VALUES (?, 1, ?) "
+            "ON CONFLICT (jurisdiction) DO UPDATE SET deals = deals + 1",
+            (jurisdiction, row_id),
+        )
+    
+    @staticmethod
+    def _write_covenants(conn: sqlite3.Connection, entries: List[Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]]):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO portfolio_covenants (deal_id, {', '.join(COVENANT_COLUMNS + STANDARD_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * (len(COVENANT_COLUMNS) + len(STANDARD_COLUMNS)))})",
+            [
+                (deal_id, *(covenants.get(c) for c in COVENANT_COLUMNS), *((standards or {}).get(c) for c in COVENANT_COLUMNS))
+                for deal_id, covenants, standards in entries
+            ],
+        )
+    
+    @staticmethod
+    def _write_analyses(conn: sqlite3.Connection, entries: List[Tuple[int, Dict[str, Any]]]):
+        # deal_hash covers the whole stored result (including the document hash),
+        # so it changes whenever anything a report shows could change
+        rows = []
+        for deal_id, analysis in entries:
+            payload = json.dumps(analysis, sort_keys=True, separators=(',', ':'))
+            rows.append((deal_id, hashlib.sha256(payload.encode()).hexdigest(), analysis.get('rules_version', ''), payload))
+        conn.executemany(
+            "INSERT OR REPLACE INTO portfolio_analyses (deal_id, deal_hash, rules_version, analysis) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    
+    @staticmethod
+    def _select(filters: Optional[Dict[str, Any]], sort: str, cursor: Optional[str]) -> Tuple[str, List[Any]]:
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        filters = filters or {}
+        clauses, params = [], []
+        if filters.get('jurisdiction') is not None:
+            clauses.append("jurisdiction = ?")
+            params.append(filters['jurisdiction'])
+        if filters.get('risk_label') is not None:
+            clauses.append("risk_label = ?")
+            params.append(filters['risk_label'])
+        if filters.get('is_red_flag') is not None:
+            clauses.append("is_red_flag = ?")
+            params.append(int(filters['is_red_flag']))
+        # Compared as years, like the aggregates, so undated deals ('N/A') sit at year 0
+        if filters.get('vintage_from') is not None:
+            clauses.append("vintage_year >= ?")
+            params.append(int(filters['vintage_from']))
+        if filters.get('vintage_to') is not None:
+            clauses.append("vintage_year <= ?")
+            params.append(int(filters['vintage_to']))
+        
+        column, direction = SORTS[sort]
+        op = '>' if direction == 'ASC' else '<'
+        if cursor is not None:
+            position = PortfolioStore._decode_cursor(cursor)
+            if column is not None and len(position) != 2:
+                raise ValueError("Cursor does not match sort")
+            if column is None:
+                clauses.append(f"id {op} ?")
+                params.append(position[-1])
+            else:
+                clauses.append(f"({column}, id) {op} (?, ?)")
+                params.extend(position)
+        
+        order = f"id {direction}" if column is None else f"{column} {direction}, id {direction}"
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"SELECT * FROM portfolio{where} ORDER BY {order}", params
+    
+    @staticmethod
+    def _encode_cursor(row: sqlite3.Row, sort: str) -> str:
+        column, _ = SORTS[sort]
+        position = [row['id']] if column is None else [row[column], row['id']]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List[Any]:
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(position, list) or not position:
+            raise ValueError("Invalid cursor")
+        return position
+    
+    def _read_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        aggregates = {name: value for name, value in conn.execute("SELECT name, value FROM portfolio_aggregates")}
+        jurisdictions = conn.execute(
+            "SELECT jurisdiction, deals FROM portfolio_jurisdictions ORDER BY first_id"
+        ).fetchall()
+        return self._format_stats(aggregates, jurisdictions)
+    
+    @staticmethod
+    def _recompute_aggregates(conn: sqlite3.Connection):
+        aggregates = dict(conn.execute(_RECOMPUTE_AGGREGATES).fetchone())
+        conn.execute("DELETE FROM portfolio_aggregates")
+        conn.executemany("INSERT INTO portfolio_aggregates (name, value) VALUES (?, ?)", list(aggregates.items()))
+        conn.execute("DELETE FROM portfolio_jurisdictions")
+        conn.execute(f"INSERT INTO portfolio_jurisdictions (jurisdiction, deals, first_id) {_RECOMPUTE_JURISDICTIONS}")
+    
+    @staticmethod
+    def _format_stats(aggregates: Dict[str, float], jurisdictions: List[tuple]) -> Dict[str, Any]:
+        return {
+            'total_deals': int(aggregates.get('total_deals', 0)),
+            'high_risk_count': int(aggregates.get('high_risk_count', 0)),
+            # Rounded so float drift from incremental sums can't show up as a mismatch
+            'risk_score_sum': round(aggregates.get('risk_score_sum', 0.0), 6),
+            'pre_2020_documentation': int(aggregates.get('pre_2020_documentation', 0)),
+            'red_flags': int(aggregates.get('red_flags', 0)),
+            'jurisdiction_breakdown': {jurisdiction: int(deals) for jurisdiction, deals in jurisdictions},
+        }
+    
+    def _initial_items(self) -> List[Dict[str, Any]]:
+        if self.legacy_json and os.path.exists(self.legacy_json):
+            with open(self.legacy_json, 'r') as f:
+                return json.load(f)
+        return self.seed() if self.seed else []
+
+    @staticmethod
+    def _to_row(item: Dict[str, Any]) -> tuple:
+        return (
+            int(item['id']) if item.get('id') is not None else None,
+            item['deal_name'],
+            item['jurisdiction'],
+            str(item['vintage']),
+            float(item['risk_score']),
+            item['risk_label'],
+            int(item['high_risk_count']),
+            int(item['medium_risk_count']),
+            int(item['low_risk_count']),
+            int(bool(item['is_red_flag'])),
+            item['analyzed_at'],
+            item.get('facility_type'),
+            vintage_year(item['vintage']),
+        )
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        del item['vintage_year']
+        item['id'] = str(item['id'])
+        item['is_red_flag'] = bool(item['is_red_flag'])
+        return item
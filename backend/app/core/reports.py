@@ -0,0 +1,267 @@
+import hashlib
+import html
+import json
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+FORMATS = {
+    'text': ('txt', 'text/plain; charset=utf-8'),
+    'html': ('html', 'text/html; charset=utf-8'),
+    'pdf': ('pdf', 'application/pdf'),
+}
+
+ReportKey = Tuple[str, str, str, str, str]
+
+_RULE = "=" * 50
+
+
+def _text_lines(item: Dict[str, Any], analysis: Optional[Dict[str, Any]]) -> List[str]:
+    """The report as plain lines; text and PDF output are both built from these"""
+    lines = [
+        _RULE,
+        "LMA COMPLIANCE REPORT - DO NOT DISTRIBUTE",
+        _RULE,
+        f"Deal Ref: {item['id']}",
+        f"Deal: {item['deal_name']}",
+        f"Jurisdiction: {item['jurisdiction']}    Vintage: {item['vintage']}",
+        f"Analyzed: {item['analyzed_at']}",
+        f"Status: {'REQUIRES APPROVAL' if item['is_red_flag'] else 'STANDARD REVIEW'}",
+        "",
+        "EXECUTIVE SUMMARY",
+        "-----------------",
+    ]
+    if analysis is not None:
+        lines.append(f"Compared against: {analysis.get('template_name') or 'LMA template'}")
+    lines += [
+        f"Risk Score: {item['risk_score']:g}/10 ({item['risk_label'].upper()})",
+        f"Findings: {item['high_risk_count']} High, {item['medium_risk_count']} Medium, {item['low_risk_count']} Low",
+        "",
+        "KEY RISKS IDENTIFIED",
+        "--------------------",
+    ]
+    if analysis is None:
+        lines.append("Detailed findings were not stored for this deal. Re-analyze it to include them.")
+    else:
+        deviations = analysis.get('deviations') or []
+        if not deviations:
+            lines.append("No deviations from the LMA standard were found.")
+        for n, deviation in enumerate(deviations, 1):
+            metadata = deviation.get('metadata') or {}
+            lines.append(f"{n}. [{deviation['risk_level'].upper()}] {deviation['clause']}: {deviation['type']}")
+            if 'extracted_value' in metadata:
+                lines.append(f"   Deal: {metadata['extracted_value']}    Standard: {metadata.get('standard_value')}")
+            if deviation.get('description'):
+                lines.append(f"   {deviation['description']}")
+            if deviation.get('recommendation'):
+                lines.append(f"   Recommendation: {deviation['recommendation']}")
+    lines += [
+        "",
+        "RECOMMENDATION",
+        "--------------",
+        "Refer to Credit Committee for Level 2 Approval." if item['is_red_flag']
+        else "Within delegated authority; no committee referral required.",
+    ]
+    return lines
+
+
+def render_text(item: Dict[str, Any], analysis: Optional[Dict[str, Any]]) -> bytes:
+    return ("\n".join(_text_lines(item, analysis)) + "\n").encode()
+
+
+def render_html(item: Dict[str, Any], analysis: Optional[Dict[str, Any]]) -> bytes:
+    e = html.escape
+    rows = []
+    for deviation in (analysis or {}).get('deviations') or []:
+        metadata = deviation.get('metadata') or {}
+        rows.append(
+            f"<tr><td>{e(deviation['risk_level'])}</td><td>{e(deviation['clause'])}</td><td>{e(deviation['type'])}</td>"
+            f"<td>{e(str(metadata.get('extracted_value', '')))}</td><td>{e(str(metadata.get('standard_value', '')))}</td>"
+            f"<td>{e(deviation.get('description') or '')}</td><td>{e(deviation.get('recommendation') or '')}</td></tr>"
+        )
+    if analysis is None:
+        findings = "<p>Detailed findings were not stored for this deal. Re-analyze it to include them.</p>"
+    elif not rows:
+        findings = "<p>No deviations from the LMA standard were found.</p>"
+    else:
+        findings = (
+            "<table><tr><th>Risk</th><th>Clause</th><th>Type</th><th>Deal</th><th>Standard</th>"
+            "<th>Explanation</th><th>Recommendation</th></tr>" + "".join(rows) + "</table>"
+        )
+    document = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>LMA Compliance Report - {e(item['deal_name'])}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}td,th{{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}}</style>
+</head><body>
+<h1>LMA Compliance Report</h1>
+<p><strong>{e(item['deal_name'])}</strong> (Deal Ref {e(item['id'])}) - {e(item['jurisdiction'])}, vintage {e(item['vintage'])}, analyzed {e(item['analyzed_at'])}</p>
+<h2>Executive Summary</h2>
+<p>Risk score {item['risk_score']:g}/10 ({e(item['risk_label'])}): {item['high_risk_count']} High, {item['medium_risk_count']} Medium, {item['low_risk_count']} Low findings.
+{'Requires credit committee approval.' if item['is_red_flag'] else 'Within delegated authority.'}</p>
+<h2>Key Risks Identified</h2>
+{findings}
+</body></html>
+"""
+    return document.encode()
+
+
+def render_pdf(item: Dict[str, Any], analysis: Optional[Dict[str, Any]]) -> bytes:
+    """The text report laid out as a minimal PDF (Courier, A4), no PDF library needed"""
+    lines = []
+    for line in _text_lines(item, analysis):
+        # Courier 9pt fits ~95 characters across the page
+        while len(line) > 95:
+            cut = line.rfind(' ', 0, 95)
+            cut = cut if cut > 0 else 95
+            lines.append(line[:cut])
+            line = "   " + line[cut:].lstrip()
+        lines.append(line)
+    pages = [lines[i:i + 70] for i in range(0, len(lines), 70)] or [[]]
+
+    def escape(line: str) -> str:
+        line = line.encode('latin-1', 'replace').decode('latin-1')
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"]
+    kids = []
+    for page in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td\n" + "".join(f"({escape(line)}) '\n" for line in page) + "ET"
+        stream = stream.encode('latin-1')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects) + 2} 0 R >>".encode())
+        kids.append(f"{len(objects)} 0 R")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+_RENDERERS = {'text': render_text, 'html': render_html, 'pdf': render_pdf}
+
+
+class ReportCache:
+    """LRU cache of rendered reports under a memory budget.
+
+    Keyed by (deal id, deal hash, rules version, row hash, format). The deal
+    hash is the content hash of the stored analysis and the row hash that of
+    the portfolio row, so a report is re-rendered only when the deal is
+    re-analyzed, scored under different rules, or its row fields (e.g.
+    jurisdiction and vintage after a metadata backfill) change.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[ReportKey, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: ReportKey) -> Optional[bytes]:
+        with self._lock:
+            report = self._entries.get(key)
+            if report is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return report
+
+    def put(self, key: ReportKey, report: bytes):
+        if len(report) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = report
+            self._bytes += len(report)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+
+class ReportRenderer:
+    """Renders committee reports from stored portfolio rows and analyses, through a ReportCache"""
+
+    def __init__(self, cache: ReportCache):
+        self.cache = cache
+
+    def render(self, item: Dict[str, Any], stored: Optional[Dict[str, Any]], fmt: str) -> bytes:
+        """
+        `stored` is the PortfolioStore.analyses() entry for the deal, or None
+        for deals added without one (the report then has the summary only).
+        """
+        if stored is None:
+            # Summary-only reports are cheap to render and have no content hash to key on
+            return _RENDERERS[fmt](item, None)
+        key = (item['id'], stored['deal_hash'], stored['rules_version'], _row_hash(item), fmt)
+        report = self.cache.get(key)
+        if report is None:
+            report = _RENDERERS[fmt](item, stored['analysis'])
+            self.cache.put(key, report)
+        return report
+
+    def filename(self, item: Dict[str, Any], fmt: str) -> str:
+        name = "".join(c if c.isalnum() or c in '-_' else '_' for c in item['deal_name']).strip('_') or 'deal'
+        return f"{item['id']}_{name}.{FORMATS[fmt][0]}"
+
+    def zip_stream(self, batches: Iterable[Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]], fmt: str) -> Iterator[bytes]:
+        """
+        Zip of reports for (items, stored analyses) batches, yielded as each
+        file is written so the archive is never held in memory whole.
+        """
+        buffer = _ChunkBuffer()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for items, stored in batches:
+                for item in items:
+                    archive.writestr(self.filename(item, fmt), self.render(item, stored.get(int(item['id'])), fmt))
+                    yield buffer.take()
+        yield buffer.take()
+
+
+def _row_hash(item: Dict[str, Any]) -> str:
+    # The report prints row fields as well as the analysis
+    return hashlib.sha256(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class _ChunkBuffer:
+    """Write-only, unseekable file object for ZipFile; take() drains what was written"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
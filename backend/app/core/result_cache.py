@@ -0,0 +1,86 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+CacheKey = Tuple[str, str, str]
+
+
+def document_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """LRU cache of full analysis results.
+    
+    Keyed by (sha256 of deal text, template key, scoring rules version), so
+    repeat analyses of an unchanged document are answered without parsing or
+    scoring. The template key should change with the template content (e.g.
+    id plus content hash). Hit/miss counters are kept per endpoint.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._endpoint_stats: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+    
+    @staticmethod
+    def key(deal_text: str, template_key: str, rules_version: str) -> CacheKey:
+        return (document_hash(deal_text), template_key, rules_version)
+    
+    @staticmethod
+    def key_from_hash(doc_hash: str, template_key: str, rules_version: str) -> CacheKey:
+        """Same key as key(), for callers that hashed the document incrementally"""
+        return (doc_hash, template_key, rules_version)
+    
+    def get(self, key: CacheKey, endpoint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stats = self._endpoint_stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            result = self._entries.get(key)
+            if result is None:
+                stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            stats['hits'] += 1
+            return result
+    
+    def put(self, key: CacheKey, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, rules_version: Optional[str] = None) -> int:
+        """
+        Drop cached results. With `rules_version`, only entries scored under a
+        different version are dropped. Returns the number of entries removed.
+        """
+        with self._lock:
+            if rules_version is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [key for key in self._entries if key[2] != rules_version]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._endpoint_stats.items():
+                lookups = stats['hits'] + stats['misses']
+                endpoints[endpoint] = {
+                    **stats,
+                    'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'endpoints': endpoints,
+            }
@@ -1,17 +1,37 @@
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import threading
+
+from app.core.explanation_cache import ExplanationCache
+from app.core.metrics import LLM_CALLS, current_trace, span
+from app.core.scoring_rules import ScoringRules
+
+logger = logging.getLogger(__name__)
 
 class LMADocumentParser:
     """Regex-based pattern matching for structured LMA covenants.
     
+    Patterns are compiled once. A single pass over the document locates every
+    clause anchor (the literal each pattern starts with), and the full clause
+    pattern is then matched only within a bounded window after each anchor,
+    so lazy ``.*?`` patterns never backtrack across a whole agreement.
+    Governing law, agreement date and facility type are extracted the same
+    way, as clauses of their own (see deal_metadata()).
+    
     Production Roadmap: 
     - Expand to 20+ clause types
     - Implement ML-based entity recognition for robustness against formatting variations
     - Support PDF/OCR pipeline integration
     """
     
-    def __init__(self):
+    FLAGS = re.IGNORECASE | re.DOTALL
+    
+    def __init__(self, window: int = 4000):
         # LMA standard clause patterns
         # Updated regexes to be more robust for the provided sample deals
         self.clause_patterns = {
@@ -21,35 +41,270 @@ class LMADocumentParser:
             'cross_default': r'(?:aggregate\s+amount.*?exceeds?|exceeding)\s+(?:EUR|USD|GBP)\s+([\d,]+)',
             'negative_pledge': r'(Negative\s+Pledge.*?)(?=\n\n|\n\d+\.|\Z)',
             'disposals': r'(Disposals.*?)(?=\n\n|\n\d+\.|\Z)',
+            # Deal metadata rather than covenants - see deal_metadata()
+            'governing_law': r'governed\s+by\b[,\s]*([^.;]{0,200}?\blaws?\b[^.;]{0,80})',
+            'agreement_date': r'agreement\s+(?:is\s+)?(?:dated|made\s+on)\s+((?:(?:\[[^\]]*\]|\d{1,2}(?:st|nd|rd|th)?|[a-z]+),?\s+){0,8}(?:19|20)\d{2})(?!\d)',
+            'facility_type': r'(term\s+loan(?:\s+[a-d](?![a-z]))?|revolving\s+(?:credit\s+)?facilit(?:y|ies)|bridge\s+(?:loan|facilit(?:y|ies)))',
+        }
+        # Leading keywords of each pattern - a clause can only match where one of its anchors starts
+        self.clause_anchors = {
+            'leverage_ratio': ('leverage ratio',),
+            'interest_cover': ('interest cover',),
+            'grace_period': ('payment is made within',),
+            'cross_default': ('aggregate amount', 'exceeding'),
+            'negative_pledge': ('negative pledge',),
+            'disposals': ('disposals',),
+            'governing_law': ('governed by',),
+            'agreement_date': ('agreement dated', 'agreement is dated', 'agreement made on', 'agreement is made on'),
+            'facility_type': ('term loan', 'revolving', 'bridge'),
+        }
+        # Maximum span (in characters) a clause match may cover after its anchor
+        self.window = window
+        self.compile()
+    
+    def compile(self):
+        """Compile clause patterns and the anchor scanners"""
+        self._compiled = {key: re.compile(pattern, self.FLAGS) for key, pattern in self.clause_patterns.items()}
+        self._anchor_keys = {
+            phrase: key for key, phrases in self.clause_anchors.items() for phrase in phrases
         }
+        # First word of each phrase -> (declaration order, phrase pattern, clause type)
+        self._anchor_words: Dict[str, List[tuple]] = {}
+        for order, (phrase, key) in enumerate(self._anchor_keys.items()):
+            words = phrase.split()
+            pattern = re.compile(r'\s+'.join(re.escape(word) for word in words))
+            self._anchor_words.setdefault(words[0], []).append((order, pattern, key))
+        # No capture groups: sre alternation with groups is several times slower
+        alternation = '|'.join(
+            r'\s+'.join(re.escape(word) for word in phrase.split()) for phrase in self._anchor_keys
+        )
+        self._anchor_scanner_ci = re.compile(alternation, re.IGNORECASE)
     
-    def extract_covenant(self, text: str, pattern_key: str) -> Optional[Dict[str, Any]]:
+    def scan_anchors(self, text: str) -> Dict[str, List[int]]:
+        """Single pass over the text returning anchor offsets per clause type"""
+        anchors: Dict[str, List[int]] = {key: [] for key in self.clause_anchors}
+        for start, _, key in self._scan(text):
+            anchors[key].append(start)
+        return anchors
+    
+    def _scan(self, text: str, pos: int = 0, limit: Optional[int] = None) -> List[tuple]:
+        """
+        (start, end, clause type) of the anchors starting in text[pos:limit],
+        in order and non-overlapping - what one left-to-right scan with the
+        alternation of all anchor phrases reports.
+        """
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Some characters change length when lowered - offsets would drift
+            found = []
+            for match in self._anchor_scanner_ci.finditer(text, pos):
+                if limit is not None and match.start() >= limit:
+                    break
+                found.append((match.start(), match.end(), self._anchor_keys[' '.join(match.group().lower().split())]))
+            return found
+        
+        # str.find per distinct first word is much faster than an sre alternation,
+        # whose cost grows with every phrase's first letter it has to try
+        if limit is None:
+            limit = len(lowered)
+        hits = []
+        for word, phrases in self._anchor_words.items():
+            bound = limit + len(word) - 1
+            start = lowered.find(word, pos, bound)
+            while start != -1:
+                for order, pattern, key in phrases:
+                    match = pattern.match(lowered, start)
+                    if match:
+                        hits.append((start, order, match.end(), key))
+                        break
+                start = lowered.find(word, start + 1, bound)
+        hits.sort()
+        found, end = [], pos
+        for start, _, stop, key in hits:
+            # Leftmost first, then the earliest declared phrase; overlapped matches are skipped
+            if start >= end:
+                found.append((start, stop, key))
+                end = stop
+        return found
+    
+    def extract_covenant(self, text: str, pattern_key: str, anchors: Optional[Dict[str, List[int]]] = None) -> Optional[Dict[str, Any]]:
         """Extract a specific covenant and return structured data"""
-        pattern = self.clause_patterns.get(pattern_key)
+        pattern = self._compiled.get(pattern_key)
         if not pattern:
             return None
         
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if not match:
-            return None
+        if anchors is None:
+            anchors = self.scan_anchors(text)
         
-        return {
-            'found': True,
-            'value': match.group(1) if match.groups() else None,
-            'full_text': match.group(0),
-            'position': match.start()
-        }
+        for start in anchors.get(pattern_key, []):
+            match = pattern.match(text, start, min(start + self.window, len(text)))
+            if match:
+                return {
+                    'found': True,
+                    'value': match.group(1) if match.groups() else None,
+                    'full_text': match.group(0),
+                    'position': match.start()
+                }
+        
+        return None
     
     def parse_document(self, doc_text: str) -> Dict[str, Any]:
         """Parse document into structured covenant data"""
-        return {
-            'leverage_ratio': self.extract_covenant(doc_text, 'leverage_ratio'),
-            'interest_cover': self.extract_covenant(doc_text, 'interest_cover'),
-            'grace_period': self.extract_covenant(doc_text, 'grace_period'),
-            'cross_default': self.extract_covenant(doc_text, 'cross_default'),
-            'negative_pledge': self.extract_covenant(doc_text, 'negative_pledge'),
-            'disposals': self.extract_covenant(doc_text, 'disposals'),
-        }
+        with span('parse.anchors'):
+            anchors = self.scan_anchors(doc_text)
+        parsed = {}
+        for key in self.clause_patterns:
+            with span(f'parse.{key}'):
+                parsed[key] = self.extract_covenant(doc_text, key, anchors)
+        return parsed
+
+    def incremental(self) -> 'IncrementalParse':
+        """Parser for a document that arrives in pieces - see IncrementalParse"""
+        return IncrementalParse(self)
+
+    # Clause types that carry a numeric value, and how to convert it
+    VALUE_TYPES = {
+        'leverage_ratio': float,
+        'interest_cover': float,
+        'grace_period': int,
+        'cross_default': float,
+    }
+    
+    def covenant_values(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """Numeric covenant values from parse_document output (None where not found)"""
+        values = {}
+        for key, convert in self.VALUE_TYPES.items():
+            clause = parsed.get(key)
+            values[key] = convert(clause['value'].replace(',', '')) if clause and clause['value'] else None
+        return values
+
+    # Keyword in the governing-law phrase -> portfolio jurisdiction label, first match wins
+    JURISDICTIONS = (
+        ('new york', 'New York'),
+        ('delaware', 'Delaware'),
+        ('england', 'English Law'),
+        ('english', 'English Law'),
+        ('wales', 'English Law'),
+        ('ireland', 'Irish Law'),
+        ('irish', 'Irish Law'),
+        ('scotland', 'Scots Law'),
+        ('scots', 'Scots Law'),
+        ('luxembourg', 'Luxembourg'),
+        ('german', 'German Law'),
+        ('france', 'French Law'),
+        ('french', 'French Law'),
+        ('netherlands', 'Dutch Law'),
+        ('dutch', 'Dutch Law'),
+        ('united arab emirates', 'UAE'),
+        ('uae', 'UAE'),
+        ('dubai', 'UAE'),
+        ('abu dhabi', 'UAE'),
+        ('singapore', 'Singapore'),
+        ('hong kong', 'Hong Kong'),
+    )
+    # Stored for a document whose governing law is missing or not one of the above
+    UNKNOWN_JURISDICTION = 'Unknown'
+
+    def deal_metadata(self, parsed: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """
+        Jurisdiction, vintage (year of the agreement date) and facility type
+        from parse_document output, None where not found or not recognised.
+        """
+        def value(key):
+            clause = parsed.get(key)
+            return ' '.join(clause['value'].split()) if clause and clause['value'] else None
+
+        law = value('governing_law')
+        jurisdiction = None
+        if law:
+            lowered = law.lower()
+            jurisdiction = next((label for keyword, label in self.JURISDICTIONS if keyword in lowered), None)
+
+        date = value('agreement_date')
+        facility = value('facility_type')
+        if facility:
+            words = facility.lower().split()
+            if words[0] == 'term':
+                facility = ' '.join(['Term Loan'] + [w.upper() for w in words[2:]])
+            elif words[0] == 'revolving':
+                facility = 'Revolving Credit Facility'
+            else:
+                facility = 'Bridge Facility'
+        return {'jurisdiction': jurisdiction, 'vintage': date[-4:] if date else None, 'facility_type': facility}
+
+class IncrementalParse:
+    """Runs LMADocumentParser over a document fed in chunks.
+
+    Only a tail of the text is kept: anchors are scanned as text arrives, and
+    a clause is matched once the parser's window after its anchor has been
+    received (or the document has ended). Because every match is bounded by
+    that window, the retained text is at most about one window plus the
+    latest chunk, and finish() returns exactly what parse_document() would
+    for the whole text.
+    """
+
+    # Longest anchor phrase, including its whitespace, that may straddle a chunk boundary
+    ANCHOR_SLACK = 256
+
+    def __init__(self, parser: LMADocumentParser):
+        self.parser = parser
+        self.results: Dict[str, Any] = {key: None for key in parser.clause_patterns}
+        self._pending: Dict[str, List[int]] = {key: [] for key in parser.clause_patterns}
+        self._resolved = set()
+        self._buffer = ''
+        self._offset = 0    # absolute position of _buffer[0]
+        self._scan_pos = 0  # absolute position the next anchor scan starts from
+        self.length = 0
+
+    def feed(self, text: str):
+        if text:
+            self._buffer += text
+            self.length += len(text)
+            self._advance(final=False)
+
+    def finish(self) -> Dict[str, Any]:
+        """Structured covenant data, as from LMADocumentParser.parse_document"""
+        self._advance(final=True)
+        self._buffer = ''
+        return self.results
+
+    def _advance(self, final: bool):
+        parser = self.parser
+        buffer, offset = self._buffer, self._offset
+        # Anchors starting this close to the end may still be incomplete
+        limit = len(buffer) if final else max(len(buffer) - self.ANCHOR_SLACK, 0)
+        position = self._scan_pos - offset
+        for start, end, key in parser._scan(buffer, position, limit):
+            if key not in self._resolved:
+                self._pending[key].append(offset + start)
+            position = end
+        self._scan_pos = offset + max(position, limit)
+
+        end = offset + len(buffer)
+        for key, starts in self._pending.items():
+            pattern = parser._compiled[key]
+            while starts:
+                start = starts[0]
+                if not final and start + parser.window > end:
+                    break  # window not fully received yet
+                match = pattern.match(buffer, start - offset, min(start + parser.window, end) - offset)
+                if match:
+                    self.results[key] = {
+                        'found': True,
+                        'value': match.group(1) if match.groups() else None,
+                        'full_text': match.group(0),
+                        'position': offset + match.start(),
+                    }
+                    self._resolved.add(key)
+                    starts.clear()
+                    break
+                starts.pop(0)
+
+        # Keep only what a later scan or match can still reach
+        keep = min([self._scan_pos] + [starts[0] for starts in self._pending.values() if starts])
+        if keep > offset:
+            self._buffer = buffer[keep - offset:]
+            self._offset = keep
 
 class RiskScoringEngine:
     """Deterministic, rule-based risk scoring against LMA market standards.
@@ -57,137 +312,52 @@ class RiskScoringEngine:
     Current Scope:
     - Benchmarked against standard LMA Leveraged Facility terms
     - Scores deviations on Low/Medium/High scale based on market practice
+    
+    Bands, risk scores, severity texts, recommendations and the default
+    standards all come from the rule table (app/data/scoring_rules.json, see
+    ScoringRules), compiled once into per-clause bisect lookups.
     """
     
-    def __init__(self):
+    def __init__(self, rules: Optional[ScoringRules] = None):
+        self.rules = rules or ScoringRules.load()
         # LMA market standards (calibrated to actual market practice)
-        self.standards = {
-            'leverage_ratio_investment_grade': 3.0,
-            'leverage_ratio_leveraged': 4.0,
-            'leverage_ratio_aggressive': 5.0,
-            'interest_cover_standard': 4.0,
-            'interest_cover_minimum': 3.0,
-            'grace_period_standard': 3,
-            'grace_period_max_acceptable': 5,
-            'cross_default_threshold_standard': 0,  # Zero floor is standard
-        }
+        self.standards = dict(self.rules.standards)
+    
+    # Bump when scoring code (not the rule table) changes behaviour
+    RULES_REVISION = 2
+    
+    @property
+    def rules_version(self) -> str:
+        """Identifies the scoring rules in force; changes whenever `standards` or the rule table change"""
+        payload = json.dumps(
+            {'revision': self.RULES_REVISION, 'table': self.rules.version, 'standards': self.standards},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+    
+    def score(self, key: str, value: Any, standard: Optional[Any] = None) -> Dict[str, Any]:
+        """Score one extracted value for clause type `key`; `standard` defaults to self.standards"""
+        clause = self.rules.by_key[key]
+        if standard is None and clause.presence is None:
+            standard = self.standards[clause.standard_key]
+        with span(f'score.{key}'):
+            return clause.score(value, standard)
     
-    def score_leverage_ratio(self, extracted_value: float, deal_type: str = 'leveraged') -> Dict[str, Any]:
+    def score_leverage_ratio(self, extracted_value: float, deal_type: str = 'leveraged', standard: Optional[float] = None) -> Dict[str, Any]:
         """Score leverage covenant deviation"""
-        standard = self.standards['leverage_ratio_leveraged']
-        
-        if extracted_value <= standard:
-            risk_level = 'Low'
-            risk_score = 0
-            severity = 'Compliant with LMA standard'
-        elif extracted_value <= 4.5:
-            risk_level = 'Medium'
-            risk_score = 4
-            severity = 'Moderately looser than standard'
-        elif extracted_value <= 5.5:
-            risk_level = 'High'
-            risk_score = 7
-            severity = 'Significantly weaker protection'
-        else:
-            risk_level = 'High'
-            risk_score = 9
-            severity = 'Extremely weak covenant package'
-        
-        return {
-            'clause_type': 'Leverage Ratio',
-            'extracted_value': extracted_value,
-            'standard_value': standard,
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'severity': severity,
-            'deviation_pct': ((extracted_value - standard) / standard * 100),
-        }
+        return self.score('leverage_ratio', extracted_value, standard)
     
-    def score_interest_cover(self, extracted_value: float) -> Dict[str, Any]:
+    def score_interest_cover(self, extracted_value: float, standard: Optional[float] = None) -> Dict[str, Any]:
         """Score interest cover deviation"""
-        standard = self.standards['interest_cover_standard']
-        
-        if extracted_value >= standard:
-            risk_level = 'Low'
-            risk_score = 0
-            severity = 'Meets or exceeds standard'
-        elif extracted_value >= 3.5:
-            risk_level = 'Medium'
-            risk_score = 3
-            severity = 'Slightly below standard'
-        elif extracted_value >= 2.5:
-            risk_level = 'High'
-            risk_score = 7
-            severity = 'Weak debt service coverage'
-        else:
-            risk_level = 'High'
-            risk_score = 9
-            severity = 'Very weak protection - high default risk'
-        
-        return {
-            'clause_type': 'Interest Cover',
-            'extracted_value': extracted_value,
-            'standard_value': standard,
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'severity': severity,
-            'deviation_pct': ((standard - extracted_value) / standard * 100),
-        }
+        return self.score('interest_cover', extracted_value, standard)
     
-    def score_grace_period(self, extracted_days: int) -> Dict[str, Any]:
+    def score_grace_period(self, extracted_days: int, standard: Optional[int] = None) -> Dict[str, Any]:
         """Score grace period deviation"""
-        standard = self.standards['grace_period_standard']
-        
-        if extracted_days <= standard:
-            risk_level = 'Low'
-            risk_score = 0
-            severity = 'Standard grace period'
-        elif extracted_days <= 5:
-            risk_level = 'Medium'
-            risk_score = 3
-            severity = 'Extended cure period'
-        else:
-            risk_level = 'High'
-            risk_score = 6
-            severity = 'Excessive cure period - reduces lender protection'
-        
-        return {
-            'clause_type': 'Non-payment Grace Period',
-            'extracted_value': extracted_days,
-            'standard_value': standard,
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'severity': severity,
-            'deviation_days': extracted_days - standard,
-        }
+        return self.score('grace_period', extracted_days, standard)
     
-    def score_cross_default(self, threshold_value: float) -> Dict[str, Any]:
+    def score_cross_default(self, threshold_value: float, standard: Optional[float] = None) -> Dict[str, Any]:
         """Score cross default threshold"""
-        if threshold_value == 0:
-            risk_level = 'Low'
-            risk_score = 0
-            severity = 'Zero-floor standard (most protective)'
-        elif threshold_value <= 1_000_000:
-            risk_level = 'Low'
-            risk_score = 1
-            severity = 'Low threshold - acceptable'
-        elif threshold_value <= 5_000_000:
-            risk_level = 'Medium'
-            risk_score = 4
-            severity = 'Material threshold - reduces cross-default protection'
-        else:
-            risk_level = 'High'
-            risk_score = 7
-            severity = 'Very high threshold - significant gap in lender protection'
-        
-        return {
-            'clause_type': 'Cross Default Threshold',
-            'extracted_value': threshold_value,
-            'standard_value': 0,
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'severity': severity,
-        }
+        return self.score('cross_default', threshold_value, standard)
 
 class AIExplanationEngine:
     """Optional AI layer for plain-English explanations.
@@ -196,31 +366,141 @@ class AIExplanationEngine:
     - Does NOT determine risk (handled deterministically by RiskScoringEngine)
     - Provides context and "why it matters" explanations for credit committees
     - Graceful fallback to template-based explanations if API offline
+    
+    All explanations for a deal are requested concurrently through one
+    long-lived AsyncAnthropic client (pooled connections), which runs on a
+    dedicated background event loop so synchronous callers can use it from
+    any thread. Concurrency is capped by `max_concurrency` and every call is
+    bounded by `timeout` seconds; a failed or timed-out call falls back for
+    that item only.
+    
+    Successful completions are stored in an ExplanationCache, so a finding
+    that has been explained before never triggers another API call.
+    
+    Configuration is read from the environment as it stands when the engine
+    is built (app.main loads .env before importing anything that builds
+    one). The anthropic SDK is only imported with the first client - call
+    warm() to pay that ahead of the first request.
     """
     
-    def __init__(self):
-        from dotenv import load_dotenv
-        load_dotenv()
+    model = "claude-3-sonnet-20240229"
+    
+    def __init__(self, max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
         self.api_key = os.environ.get('ANTHROPIC_API_KEY')
         self.enabled = bool(self.api_key)
+        self.max_concurrency = max_concurrency or int(os.environ.get('AI_MAX_CONCURRENCY', '4'))
+        self.timeout = timeout or float(os.environ.get('AI_TIMEOUT', '10'))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.cache = ExplanationCache(
+            max_entries=int(os.environ.get('EXPLANATION_CACHE_SIZE', '1024')),
+            db_path=os.environ.get('EXPLANATION_CACHE_DB') or None,
+            ttl=float(os.environ.get('EXPLANATION_CACHE_TTL', str(7 * 24 * 3600))),
+        )
+    
+    def warm(self):
+        """Start the background loop and create the client (importing the SDK) now rather than on first use"""
         if self.enabled:
-            print("AI explanations enabled")
-        else:
-            print("AI explanations disabled - using fallback mode")
+            asyncio.run_coroutine_threadsafe(self._warm_client(), self._ensure_loop()).result()
     
     def generate_explanation(self, risk_data: Dict[str, Any], template_context: str = '') -> str:
         """Generate plain-English explanation of risk finding"""
+        return self.generate_explanations([risk_data], template_context)[0]
+    
+    def generate_explanations(self, risk_items: List[Dict[str, Any]], template_context: str = '') -> List[str]:
+        """Generate explanations for all findings of a deal concurrently, in input order"""
+        if not risk_items:
+            return []
         
         if not self.enabled:
             # Fallback: template-based explanation if no API key
-            return self._fallback_explanation(risk_data)
+            return [self._fallback_explanation(risk_data) for risk_data in risk_items]
+        
+        keys = [self.cache.key(risk_data, self.model) for risk_data in risk_items]
+        explanations = [self.cache.get(key) for key in keys]
+        
+        # Identical findings within a deal share one call
+        pending = {key: risk_data for key, risk_data, text in zip(keys, risk_items, explanations) if text is None}
+        if pending:
+            # The background loop doesn't share this context, so hand it the request's trace
+            future = asyncio.run_coroutine_threadsafe(self._explain_all(list(pending.values()), current_trace()), self._ensure_loop())
+            fresh = dict(zip(pending, future.result()))
+            for key, text in fresh.items():
+                if text is not None:
+                    self.cache.put(key, text)
+            explanations = [text if text is not None else fresh[key] for key, text in zip(keys, explanations)]
         
+        return [
+            text if text is not None else self._fallback_explanation(risk_data)
+            for risk_data, text in zip(risk_items, explanations)
+        ]
+    
+    def close(self):
+        """Close the shared client and stop the background loop"""
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop = self._client = self._semaphore = None
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="ai-explanations", daemon=True).start()
+                self._loop = loop
+            return self._loop
+    
+    def _get_client(self):
+        # Only ever called on the background loop, so no locking needed
+        if self._client is None:
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(api_key=self.api_key, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+    
+    async def _warm_client(self):
+        self._get_client()
+    
+    async def _explain_all(self, risk_items: List[Dict[str, Any]], trace=None) -> List[Optional[str]]:
+        return await asyncio.gather(*[self._explain_one(risk_data, trace) for risk_data in risk_items])
+    
+    async def _explain_one(self, risk_data: Dict[str, Any], trace=None) -> Optional[str]:
+        """Returns None if the call failed, so the caller can fall back without caching"""
         try:
-            from anthropic import Anthropic
+            client = self._get_client()
+            async with self._semaphore:
+                with span('llm_call', trace):
+                    message = await asyncio.wait_for(
+                        client.messages.create(
+                            model=self.model,
+                            max_tokens=150,
+                            messages=[{"role": "user", "content": self._build_prompt(risk_data)}]
+                        ),
+                        timeout=self.timeout,
+                    )
+            LLM_CALLS.inc(outcome='ok')
             
-            client = Anthropic(api_key=self.api_key)
+            return message.content[0].text.strip()
             
-            prompt = f"""You are a loan documentation expert. Provide a concise 2-3 sentence explanation for a credit committee.
+        except asyncio.TimeoutError:
+            LLM_CALLS.inc(outcome='timeout')
+            logger.warning("AI explanation for %s timed out after %gs", risk_data['clause_type'], self.timeout)
+            return None
+        except Exception as e:
+            LLM_CALLS.inc(outcome='error')
+            # One line per item - a revoked key or rate limit fails every clause of every deal at once
+            logger.warning("AI explanation for %s failed: %s: %s", risk_data['clause_type'], type(e).__name__, e)
+            logger.debug("AI explanation for %s failed", risk_data['clause_type'], exc_info=True)
+            return None
+    
+    def _build_prompt(self, risk_data: Dict[str, Any]) -> str:
+        return f"""You are a loan documentation expert. Provide a concise 2-3 sentence explanation for a credit committee.
 **Deviation Found:**
 - Clause: {risk_data['clause_type']}
 - Current Value: {risk_data['extracted_value']}
@@ -230,18 +510,6 @@ class AIExplanationEngine:
 
 Explain: (1) What this means practically, (2) Why it matters for lender protection.
 Keep it professional and fact-based. No preamble."""
-
-            message = client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=150,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return message.content[0].text.strip()
-            
-        except Exception as e:
-            print(f"AI explanation failed: {e}")
-            return self._fallback_explanation(risk_data)
     
     def _fallback_explanation(self, risk_data: Dict[str, Any]) -> str:
         """Deterministic fallback if AI unavailable"""
@@ -252,6 +520,14 @@ Keep it professional and fact-based. No preamble."""
         
         return f"{clause} is set at {current} compared to the LMA standard of {standard}. {severity}. This impacts lender protection by allowing the borrower more flexibility before covenant breach."
 
+# Template covenant -> RiskScoringEngine.standards key its value replaces
+TEMPLATE_STANDARD_KEYS = {
+    'leverage_ratio': 'leverage_ratio_leveraged',
+    'interest_cover': 'interest_cover_standard',
+    'grace_period': 'grace_period_standard',
+    'cross_default': 'cross_default_threshold_standard',
+}
+
 class RiskEngine:
     """Main engine - combines parsing, scoring, and optional AI"""
     
@@ -260,99 +536,99 @@ class RiskEngine:
         self.scorer = RiskScoringEngine()
         self.ai_explainer = AIExplanationEngine()
     
-    def analyze_deal(self, deal_text: str, template_text: str) -> Dict[str, Any]:
+    def template_standards(self, template_text: str) -> Dict[str, Any]:
+        """Standards stated by a template, keyed like RiskScoringEngine.standards"""
+        values = self.parser.covenant_values(self.parser.parse_document(template_text))
+        return {
+            TEMPLATE_STANDARD_KEYS[key]: value
+            for key, value in values.items()
+            if value is not None
+        }
+    
+    def analyze_deal(self, deal_text: str, template_text: str, template_standards: Optional[Dict[str, Any]] = None, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Full analysis pipeline:
         1. Parse both documents
         2. Compare structurally
         3. Score deviations
         4. Generate explanations
+        
+        Values stated in the template override RiskScoringEngine.standards.
+        Pass `template_standards` (e.g. from the TemplateRegistry) to skip
+        re-parsing the template. `progress`, if given, is called with 'parse',
+        'score' and 'explain' as each stage starts.
+        """
+        if progress:
+            progress('parse')
+        return self.analyze_parsed(self.parser.parse_document(deal_text), template_text, template_standards, progress)
+    
+    def analyze_parsed(self, deal_data: Dict[str, Any], template_text: str, template_standards: Optional[Dict[str, Any]] = None, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """analyze_deal for a document already parsed (e.g. incrementally during upload)"""
+        return self.analyze_templates(deal_data, [(template_text, template_standards)], progress)[0]
+    
+    def analyze_templates(self, deal_data: Dict[str, Any], templates: List[Tuple[str, Optional[Dict[str, Any]]]], progress: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
         """
+        analyze_parsed against several templates, given as (template_text,
+        template_standards) pairs: the parsed deal is scored once per
+        template, then the findings of all of them are explained in one
+        concurrent batch. Results are in template order.
+        """
+        if progress:
+            progress('score')
+        scored = []
+        for template_text, template_standards in templates:
+            if template_standards is None:
+                template_standards = self.template_standards(template_text) if template_text else {}
+            scored.append(self._score(deal_data, template_standards))
         
-        # Parse documents
-        deal_data = self.parser.parse_document(deal_text)
-        # template_data = self.parser.parse_document(template_text)
+        # Explain all findings concurrently - latency is bounded by the slowest call
+        if progress:
+            progress('explain')
+        deviations = [deviation for template_deviations, _ in scored for deviation in template_deviations]
+        with span('explain'):
+            descriptions = self.ai_explainer.generate_explanations([d['metadata'] for d in deviations])
+        for deviation, description in zip(deviations, descriptions):
+            deviation['description'] = description
+        # Findings the AI should have explained but that got the template text (call failed or timed out)
+        fallbacks = set()
+        if self.ai_explainer.enabled:
+            fallbacks = {
+                id(deviation) for deviation in deviations
+                if deviation['description'] == self.ai_explainer._fallback_explanation(deviation['metadata'])
+            }
         
+        return [
+            self._summarize(template_deviations, total_risk_score, sum(id(d) in fallbacks for d in template_deviations))
+            for template_deviations, total_risk_score in scored
+        ]
+    
+    def _score(self, deal_data: Dict[str, Any], template_standards: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], float]:
         deviations = []
         total_risk_score = 0
         
-        # Analyze Leverage Ratio
-        if deal_data['leverage_ratio'] and deal_data['leverage_ratio']['value']:
-            lev_value = float(deal_data['leverage_ratio']['value'])
-            risk_data = self.scorer.score_leverage_ratio(lev_value)
-            
-            description = self.ai_explainer.generate_explanation(risk_data)
-            recommendation = self._generate_recommendation(risk_data)
+        # One pass over the enabled clause types of the rule table, in table order
+        rules = self.scorer.rules
+        for clause in rules.clauses:
+            value = clause.extract(deal_data.get(clause.key))
+            if value is None:
+                continue
+            standard = None if clause.presence is not None else template_standards.get(clause.standard_key)
+            risk_data = self.scorer.score(clause.key, value, standard)
             
             deviations.append({
-                'clause': 'Financial Covenants',
-                'type': 'Leverage Ratio',
+                'clause': clause.clause,
+                'type': clause.type,
                 'risk_level': risk_data['risk_level'],
-                'description': description,
-                'recommendation': recommendation,
-                'metadata': risk_data
-            })
-            
-            total_risk_score += risk_data['risk_score']
-        
-        # Analyze Interest Cover
-        if deal_data['interest_cover'] and deal_data['interest_cover']['value']:
-            ic_value = float(deal_data['interest_cover']['value'])
-            risk_data = self.scorer.score_interest_cover(ic_value)
-            
-            description = self.ai_explainer.generate_explanation(risk_data)
-            recommendation = self._generate_recommendation(risk_data)
-            
-            deviations.append({
-                'clause': 'Financial Covenants',
-                'type': 'Interest Cover',
-                'risk_level': risk_data['risk_level'],
-                'description': description,
-                'recommendation': recommendation,
-                'metadata': risk_data
-            })
-            
-            total_risk_score += risk_data['risk_score']
-        
-        # Analyze Grace Period
-        if deal_data['grace_period'] and deal_data['grace_period']['value']:
-            grace_days = int(deal_data['grace_period']['value'])
-            risk_data = self.scorer.score_grace_period(grace_days)
-            
-            description = self.ai_explainer.generate_explanation(risk_data)
-            recommendation = self._generate_recommendation(risk_data)
-            
-            deviations.append({
-                'clause': 'Events of Default',
-                'type': 'Non-payment Grace Period',
-                'risk_level': risk_data['risk_level'],
-                'description': description,
-                'recommendation': recommendation,
-                'metadata': risk_data
-            })
-            
-            total_risk_score += risk_data['risk_score']
-        
-        # Analyze Cross Default
-        if deal_data['cross_default'] and deal_data['cross_default']['value']:
-            threshold_str = deal_data['cross_default']['value'].replace(',', '')
-            threshold = float(threshold_str)
-            risk_data = self.scorer.score_cross_default(threshold)
-            
-            description = self.ai_explainer.generate_explanation(risk_data)
-            recommendation = self._generate_recommendation(risk_data)
-            
-            deviations.append({
-                'clause': 'Events of Default',
-                'type': 'Cross Default Threshold',
-                'risk_level': risk_data['risk_level'],
-                'description': description,
-                'recommendation': recommendation,
+                'description': None,  # filled in below
+                'recommendation': rules.recommendation(clause, risk_data['risk_level']),
                 'metadata': risk_data
             })
             
             total_risk_score += risk_data['risk_score']
         
+        return deviations, total_risk_score
+    
+    def _summarize(self, deviations: List[Dict[str, Any]], total_risk_score: float, ai_fallbacks: int = 0) -> Dict[str, Any]:
         # Calculate overall metrics
         overall_score = min(total_risk_score, 10)
         
@@ -371,26 +647,8 @@ class RiskEngine:
                 'Medium': len([d for d in deviations if d['risk_level'] == 'Medium']),
                 'Low': len([d for d in deviations if d['risk_level'] == 'Low']),
             },
-            'ai_enabled': self.ai_explainer.enabled
+            'ai_enabled': self.ai_explainer.enabled,
+            'ai_fallbacks': ai_fallbacks,
         }
     
-    def _generate_recommendation(self, risk_data: Dict[str, Any]) -> str:
-        """Generate actionable recommendation"""
-        risk_level = risk_data['risk_level']
-        clause = risk_data['clause_type']
-        
-        if risk_level == 'High':
-            if 'Leverage' in clause:
-                return "Negotiate tighter covenant or add margin ratchet. Consider quarterly testing."
-            elif 'Interest Cover' in clause:
-                return "Request minimum 3.5:1 or add EBITDA adjustments to improve coverage."
-            elif 'Grace Period' in clause:
-                return "Reduce to 3 business days. Current period weakens default protection."
-            elif 'Cross Default' in clause:
-                return "Lower threshold or remove minimum. Current threshold creates protection gap."
-        elif risk_level == 'Medium':
-            return f"Monitor closely. Consider tightening in next amendment or for future similar deals."
-        else:
-            return "Acceptable. Complies with LMA market standard."
-        
-        return "Review with credit committee."
+
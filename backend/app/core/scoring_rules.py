@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional
+
+RULES_FILE = os.getenv(
+    "SCORING_RULES",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "scoring_rules.json"),
+)
+
+LEVELS = ('Low', 'Medium', 'High')
+_CONVERTERS = {'float': float, 'int': int}
+_BAND_FIELDS = ('risk_level', 'risk_score', 'severity')
+# Offset keys are rounded so float error (3.7 - 3.2 = 0.5000000000000004) can't cross a band edge
+OFFSET_DIGITS = 9
+
+
+class RuleError(ValueError):
+    """The scoring rule table is malformed"""
+
+
+class CompiledClause:
+    """One clause type of the rule table, ready to score a single value.
+
+    Numeric clauses hold their band bounds in ascending order (negated for
+    lower-is-worse ladders), so finding the band is one bisect whatever the
+    number of bands. Bands give either an absolute "bound" or an "offset"
+    from the standard the value is scored against, so that offset ladders
+    move with template standards. Presence clauses score whether the clause
+    was found.
+    """
+
+    def __init__(self, rule: Dict[str, Any]):
+        self.key = rule['key']
+        self.clause = rule['clause']
+        self.type = rule['type']
+        self.recommendations = rule.get('recommendations', {})
+        self.presence = rule.get('presence')
+        if self.presence is not None:
+            for outcome in ('found', 'missing'):
+                _check_band(rule, self.presence.get(outcome), outcome)
+            return
+
+        try:
+            self.convert = _CONVERTERS[rule['value']]
+            self.standard_key = rule['standard']
+            self.higher_is_worse = {'higher': True, 'lower': False}[rule['worse']]
+        except KeyError as e:
+            raise RuleError(f"Clause '{self.key}': missing or invalid {e}")
+        self.deviation = rule.get('deviation')
+        self.within = _check_band(rule, rule.get('within'), 'within')
+        bands = rule.get('bands') or []
+        if not bands or 'bound' in bands[-1] or 'offset' in bands[-1]:
+            raise RuleError(f"Clause '{self.key}': the last band must be open-ended (no bound or offset)")
+        self.relative = 'offset' in bands[0]
+        edge = 'offset' if self.relative else 'bound'
+        if any(edge not in band or ('bound' in band and 'offset' in band) for band in bands[:-1]):
+            raise RuleError(f"Clause '{self.key}': every band but the last needs a {edge}, and all the same kind")
+        bounds = [band[edge] for band in bands[:-1]]
+        keys = bounds if self.higher_is_worse else [-bound for bound in bounds]
+        if keys != sorted(keys):
+            raise RuleError(f"Clause '{self.key}': band bounds must run from least to most severe")
+        self.bounds = keys
+        self.bands = [_check_band(rule, band, 'band') for band in bands]
+
+    def band_index(self, value: float, standard: float) -> int:
+        """0 for 'within the standard', else 1 + the index into `bands`"""
+        if (value <= standard) if self.higher_is_worse else (value >= standard):
+            return 0
+        key = round(value - standard, OFFSET_DIGITS) if self.relative else value
+        return bisect_left(self.bounds, key if self.higher_is_worse else -key) + 1
+
+    def score(self, value: Any, standard: Any) -> Dict[str, Any]:
+        """risk_data for one extracted value, shaped like the old score_* methods"""
+        if self.presence is not None:
+            band = self.presence['found' if value else 'missing']
+            return {
+                'clause_type': self.type,
+                'extracted_value': 'Present' if value else 'Not found',
+                'standard_value': 'Present',
+                'risk_level': band['risk_level'],
+                'risk_score': band['risk_score'],
+                'severity': band['severity'],
+            }
+
+        index = self.band_index(value, standard)
+        band = self.within if index == 0 else self.bands[index - 1]
+        severity = band['severity']
+        if index == 0 and value == 0 and 'severity_if_zero' in band:
+            severity = band['severity_if_zero']
+        risk_data = {
+            'clause_type': self.type,
+            'extracted_value': value,
+            'standard_value': standard,
+            'risk_level': band['risk_level'],
+            'risk_score': band['risk_score'],
+            'severity': severity,
+        }
+        if self.deviation == 'pct':
+            gap = (value - standard) if self.higher_is_worse else (standard - value)
+            risk_data['deviation_pct'] = gap / standard * 100
+        elif self.deviation == 'days':
+            risk_data['deviation_days'] = value - standard
+        return risk_data
+
+    def extract(self, parsed: Optional[Dict[str, Any]]) -> Any:
+        """Value to score from a parse_document entry, or None if there is nothing to score"""
+        if self.presence is not None:
+            return bool(parsed and parsed.get('found'))
+        if parsed and parsed['value']:
+            return self.convert(parsed['value'].replace(',', ''))
+        return None
+
+
+def _check_band(rule: Dict[str, Any], band: Optional[Dict[str, Any]], name: str) -> Dict[str, Any]:
+    if not isinstance(band, dict) or any(field not in band for field in _BAND_FIELDS):
+        raise RuleError(f"Clause '{rule.get('key')}': {name} needs {', '.join(_BAND_FIELDS)}")
+    if band['risk_level'] not in LEVELS:
+        raise RuleError(f"Clause '{rule.get('key')}': unknown risk level {band['risk_level']!r}")
+    return band
+
+
+class ScoringRules:
+    """The scoring rule table (JSON, or YAML when PyYAML is installed), compiled.
+
+    Declares the default standards, every clause type's bands, risk scores,
+    severity texts and recommendations. Clauses with "enabled": false are
+    dropped at compile time and cost nothing per deal.
+    """
+
+    def __init__(self, table: Dict[str, Any]):
+        self.table = table
+        self.revision = table.get('revision', 1)
+        self.standards = dict(table.get('standards', {}))
+        self.recommendations = table.get('recommendations', {})
+        self.clauses: List[CompiledClause] = [
+            CompiledClause(rule) for rule in table.get('clauses', []) if rule.get('enabled', True)
+        ]
+        for clause in self.clauses:
+            if clause.presence is None and clause.standard_key not in self.standards:
+                raise RuleError(f"Clause '{clause.key}': no default for standard '{clause.standard_key}'")
+        self.by_key = {clause.key: clause for clause in self.clauses}
+        self.version = hashlib.sha256(json.dumps(table, sort_keys=True).encode()).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, path: str = RULES_FILE) -> 'ScoringRules':
+        with open(path, "r") as f:
+            if path.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError:
+                    raise RuleError("PyYAML is required for YAML rule tables")
+                table = yaml.safe_load(f)
+            else:
+                table = json.load(f)
+        return cls(table)
+
+    def recommendation(self, clause: CompiledClause, risk_level: str) -> str:
+        """Clause-specific text for the level, else the table-wide one, else the default"""
+        if risk_level in clause.recommendations:
+            return clause.recommendations[risk_level]
+        if risk_level in self.recommendations:
+            return self.recommendations[risk_level]
+        return self.recommendations.get('default', "Review with credit committee.")
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from app.core.risk_engine import RiskEngine, TEMPLATE_STANDARD_KEYS
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "templates")
+
+_VALID_ID = re.compile(r"^[\w\-.]+\.txt$")
+
+
+class TemplateRegistry:
+    """In-memory registry of LMA templates.
+
+    Each template is read and parsed once (at startup via preload(), or on
+    first use) and kept with its covenant values and the scoring standards
+    it implies. Files are re-stat'ed at most every `check_interval` seconds
+    and reloaded when their mtime or size changes, so the request path does
+    no file I/O in the steady state.
+    """
+
+    def __init__(self, engine: RiskEngine, templates_dir: str = TEMPLATES_DIR, check_interval: float = 2.0):
+        self.engine = engine
+        self.templates_dir = templates_dir
+        self.check_interval = check_interval
+        self._templates: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_scan = 0.0
+
+    def preload(self):
+        """Load every template in the directory"""
+        with self._lock:
+            self._scan()
+
+    def get(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """Parsed template, or None if no such template exists"""
+        if not _VALID_ID.match(template_id):
+            return None
+
+        with self._lock:
+            template = self._templates.get(template_id)
+            now = time.monotonic()
+            if template is None:
+                # Unknown id - a new file may have been added since the last scan
+                if now - self._last_scan >= self.check_interval:
+                    self._scan()
+                    template = self._templates.get(template_id)
+            elif now - template['checked_at'] >= self.check_interval:
+                template = self._refresh(template_id)
+            return template
+
+    def list_templates(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if time.monotonic() - self._last_scan >= self.check_interval:
+                self._scan()
+            return [
+                {
+                    'id': t['id'],
+                    'name': t['name'],
+                    'hash': t['hash'],
+                    'covenants': t['covenants'],
+                    'standards': t['standards'],
+                    'loaded_at': t['loaded_at'],
+                }
+                for t in sorted(self._templates.values(), key=lambda t: t['id'])
+            ]
+
+    def _scan(self):
+        # Caller holds the lock
+        self._last_scan = time.monotonic()
+        try:
+            names = {f for f in os.listdir(self.templates_dir) if _VALID_ID.match(f)}
+        except FileNotFoundError:
+            names = set()
+        for template_id in list(self._templates):
+            if template_id not in names:
+                del self._templates[template_id]
+        for template_id in names:
+            self._refresh(template_id)
+
+    def _refresh(self, template_id: str) -> Optional[Dict[str, Any]]:
+        # Caller holds the lock. Reloads the template if the file changed.
+        path = os.path.join(self.templates_dir, template_id)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._templates.pop(template_id, None)
+            return None
+
+        template = self._templates.get(template_id)
+        if template is not None and (template['mtime'], template['size']) == (st.st_mtime_ns, st.st_size):
+            template['checked_at'] = time.monotonic()
+            return template
+
+        with open(path, "r") as f:
+            text = f.read()
+        parser = self.engine.parser
+        covenants = parser.covenant_values(parser.parse_document(text))
+        template = {
+            'id': template_id,
+            'name': template_id.replace(".txt", "").replace("_", " "),
+            'text': text,
+            'hash': hashlib.sha256(text.encode()).hexdigest(),
+            'covenants': covenants,
+            'standards': {
+                TEMPLATE_STANDARD_KEYS[key]: value for key, value in covenants.items() if value is not None
+            },
+            'mtime': st.st_mtime_ns,
+            'size': st.st_size,
+            'loaded_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'checked_at': time.monotonic(),
+        }
+        self._templates[template_id] = template
+        return template
@@ -0,0 +1,105 @@
+from typing import AsyncIterator, List, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+
+class UploadError(ValueError):
+    """The request body is not a usable multipart upload"""
+
+
+class UploadTooLarge(UploadError):
+    pass
+
+
+class MultipartFileStream:
+    """Streams one file field out of a multipart/form-data request body.
+
+    The body is push-parsed with python-multipart as it arrives and the
+    file's bytes are yielded chunk by chunk, so callers can start work on the
+    document before the upload completes and nothing holds the whole file.
+    Other fields are ignored. `filename` is set once the part's headers
+    have been read.
+    """
+
+    def __init__(self, content_type: str, stream: AsyncIterator[bytes], field_name: str = "file", max_bytes: Optional[int] = None):
+        self.content_type = content_type
+        self.stream = stream
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.size = 0
+        self._pending: List[bytes] = []
+        self._in_file = False
+        self._found = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        _, params = parse_options_header(self.content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadError("Expected multipart/form-data with a boundary")
+
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+        try:
+            async for chunk in self.stream:
+                parser.write(chunk)
+                for data in self._drain():
+                    yield data
+            parser.finalize()
+        except MultipartParseError as e:
+            raise UploadError(f"Malformed multipart body: {e}")
+        for data in self._drain():
+            yield data
+
+        if not self._found:
+            raise UploadError(f"No file field named '{self.field_name}'")
+
+    def _drain(self) -> List[bytes]:
+        pending, self._pending = self._pending, []
+        for data in pending:
+            self.size += len(data)
+            if self.max_bytes is not None and self.size > self.max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        return pending
+
+    def _on_part_begin(self):
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        # Only the first matching file part is streamed
+        self._in_file = not self._found and name == self.field_name and b"filename" in options
+        if self._in_file:
+            self._found = True
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self):
+        self._in_file = False
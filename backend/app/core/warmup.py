@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Start-up work run in the background once the app is serving.
+
+    Stages run in order on one daemon thread, so the process accepts
+    connections (and answers liveness probes) straight away, while
+    readiness waits for every stage to finish. A failed stage is recorded
+    and the remaining stages still run; the app then never reports ready,
+    which keeps it out of rotation rather than serving half-initialised.
+    """
+
+    def __init__(self):
+        self._stages: List[Tuple[str, Callable[[], Any]]] = []
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def add(self, name: str, fn: Callable[[], Any]):
+        self._stages.append((name, fn))
+        self._status[name] = {'state': 'pending', 'ms': None, 'error': None}
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every stage has run; False on timeout"""
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._done.is_set() and all(s['state'] == 'done' for s in self._status.values())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: dict(status) for name, status in self._status.items()}
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round(((self.finished_at or time.perf_counter()) - self.started_at) * 1000, 1)
+        return {
+            'ready': self.ready,
+            'finished': self._done.is_set(),
+            'elapsed_ms': elapsed,
+            'stages': stages,
+        }
+
+    def _run(self):
+        for name, fn in self._stages:
+            with self._lock:
+                self._status[name]['state'] = 'running'
+            started = time.perf_counter()
+            try:
+                fn()
+                state, error = 'done', None
+            except Exception as e:
+                state, error = 'failed', repr(e)
+                logger.error("Warm-up stage %s failed", name, exc_info=True)
+            with self._lock:
+                self._status[name].update(state=state, ms=round((time.perf_counter() - started) * 1000, 1), error=error)
+        self.finished_at = time.perf_counter()
+        self._done.set()
+        status = self.status()
+        logger.info(
+            "Warm-up finished in %.0f ms (%s) - %s", status['elapsed_ms'],
+            ", ".join(f"{name} {stage['ms']:.0f} ms {stage['state']}" for name, stage in status['stages'].items()),
+            "ready" if status['ready'] else "not ready",
+        )
@@ -0,0 +1,165 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, TypeVar
+
+from app.core.risk_engine import RiskEngine
+
+T = TypeVar("T")
+
+# Per-process engine, created lazily inside each worker
+_worker_engine: Optional[RiskEngine] = None
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_background_pool: Optional[ThreadPoolExecutor] = None
+
+# Pool workers share explanations through this SQLite file unless EXPLANATION_CACHE_DB names one
+WORKER_EXPLANATION_CACHE_DB = os.getenv(
+    "WORKER_EXPLANATION_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "worker_explanations.db"),
+)
+
+# Documents at least this long are parsed in the process pool (override with PROCESS_PARSE_BYTES)
+PROCESS_PARSE_BYTES = int(os.getenv("PROCESS_PARSE_BYTES", str(1024 * 1024)))
+
+
+def analyze_in_worker(
+    deal_text: str,
+    template_text: str,
+    standards: Optional[Dict[str, Any]] = None,
+    template_standards: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full RiskEngine pipeline inside a pool worker.
+    `standards` carries the parent's scoring standards so results match its rules version.
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = RiskEngine()
+    if standards is not None:
+        _worker_engine.scorer.standards = dict(standards)
+    return _worker_engine.analyze_deal(deal_text, template_text, template_standards)
+
+
+def parse_in_worker(deal_text: str) -> Dict[str, Any]:
+    """LMADocumentParser.parse_document inside a pool worker"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = RiskEngine()
+    return _worker_engine.parser.parse_document(deal_text)
+
+
+def parse_document(engine: RiskEngine, deal_text: str) -> Dict[str, Any]:
+    """
+    engine.parser.parse_document, from a worker thread. Parsing is pure
+    Python and holds the GIL, so a multi-megabyte document parsed on a thread
+    slows every other request in the process; those go to the parse pool
+    and this thread just waits for the result.
+    """
+    if len(deal_text) < PROCESS_PARSE_BYTES:
+        return engine.parser.parse_document(deal_text)
+    return get_parse_pool().submit(parse_in_worker, deal_text).result()
+
+
+def _init_worker(explanation_cache_db: str):
+    # Before the worker's engine (and so its ExplanationCache) is created
+    os.environ.setdefault("EXPLANATION_CACHE_DB", explanation_cache_db)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared process pool sized to the available cores (override with BATCH_WORKERS).
+
+    Workers are started from a fork server (spawned where there is none), never
+    forked from the API process: it runs warm-up, explanation, job and
+    file-watcher threads and holds SQLite connections, which a forked child
+    could inherit mid-operation and deadlock on.
+
+    Each worker has its own RiskEngine, so its in-memory explanation cache is
+    its own. Workers share explanations through the SQLite tier at
+    EXPLANATION_CACHE_DB, or WORKER_EXPLANATION_CACHE_DB when that is unset.
+    Set EXPLANATION_CACHE_DB to share them with the API process too. Worker
+    lookups are never counted in the API process's /cache/stats.
+    """
+    global _process_pool
+    if _process_pool is None:
+        workers = int(os.getenv("BATCH_WORKERS", "0")) or os.cpu_count() or 1
+        _process_pool = _new_process_pool(workers)
+    return _process_pool
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Small process pool for parsing large interactive documents (override size
+    with PARSE_WORKERS). Kept apart from the batch pool so an upload or
+    analysis never queues behind every deal of a running batch.
+    """
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = _new_process_pool(int(os.getenv("PARSE_WORKERS", "2")))
+    return _parse_pool
+
+
+def _new_process_pool(workers: int) -> ProcessPoolExecutor:
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+        initargs=(WORKER_EXPLANATION_CACHE_DB,),
+    )
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Bounded thread pool for blocking file I/O, parsing and LLM calls made from
+    async handlers (override size with ANALYZE_WORKERS).
+    Kept separate from Starlette's default threadpool so a burst of slow
+    analyses cannot starve the sync portfolio/amendments routes.
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        workers = int(os.getenv("ANALYZE_WORKERS", "4"))
+        _thread_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze")
+    return _thread_pool
+
+
+def get_background_pool() -> ThreadPoolExecutor:
+    """
+    Small pool for precompute work nobody is waiting on (override size with
+    BACKGROUND_WORKERS). Separate from the analysis pool so it never delays a request.
+    """
+    global _background_pool
+    if _background_pool is None:
+        workers = int(os.getenv("BACKGROUND_WORKERS", "1"))
+        _background_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="background")
+    return _background_pool
+
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Await a blocking call on the bounded analysis thread pool"""
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the caller's context so timing spans reach the request's trace
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(context.run, fn, *args, **kwargs))
+
+
+def shutdown_pools():
+    global _process_pool, _parse_pool, _thread_pool, _background_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _background_pool is not None:
+        _background_pool.shutdown(wait=False, cancel_futures=True)
+        _background_pool = None
@@ -1,16 +1,60 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.api import analyze, portfolio, report, amendments
-
-app = FastAPI(title="DocCompare LMA", version="1.0.0")
-
-# Allow CORS for frontend
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-# Load environment variables from .env file if present
+# Load environment variables from .env file if present - before the app
+# modules are imported, since they read their settings at import time
 load_dotenv()
 
+# App loggers go to stderr alongside uvicorn's own output
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+# The anthropic SDK's HTTP client logs every request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.api import analyze, portfolio, report, amendments, clauses
+from app.core.workers import shutdown_pools
+from app.core.amendments import deal_index, diff_cache, schedule_precompute
+from app.core.metrics import REQUEST_SECONDS, registry, request_trace
+from app.core.warmup import Warmup
+
+def _warm_deal_index():
+    deal_index.sync()
+    deal_index.start_watching()
+    schedule_precompute()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Serve immediately and warm up in the background: templates, the deal
+    directory index and the explanation client (whose SDK import alone
+    takes a few hundred ms). /health/ready reports when that is done.
+    """
+    explainer = analyze.risk_engine.ai_explainer
+    logger.info("AI explanations enabled" if explainer.enabled else "AI explanations disabled - using fallback mode")
+    warmup = Warmup()
+    warmup.add("templates", analyze.template_registry.preload)
+    warmup.add("deal_index", _warm_deal_index)
+    warmup.add("explanations", explainer.warm)
+    app.state.warmup = warmup
+    warmup.start()
+    yield
+    analyze.job_queue.shutdown()
+    shutdown_pools()
+    deal_index.stop_watching()
+    explainer.close()
+
+app = FastAPI(title="DocCompare LMA", version="1.0.0", lifespan=lifespan)
+
+# Allow CORS for frontend
 allowed_origins_env = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173")
 allowed_origins = [o.strip() for o in allowed_origins_env.split(",") if o.strip()]
 
@@ -22,10 +66,98 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Requests slower than this (ms) are logged with their stage breakdown; 0 disables
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency histogram, plus the slow-request log"""
+    with request_trace() as trace:
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Route template rather than the raw path, so ids don't explode the label set
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            elapsed = time.perf_counter() - trace.started
+            REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=status)
+            if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                stages = ", ".join(
+                    f"{stage} {entry['ms']:.1f} ms" + (f" x{entry['count']}" if entry['count'] > 1 else "")
+                    for stage, entry in trace.breakdown().items()
+                )
+                logger.warning("Slow request: %s %s %s %.0f ms [%s]", request.method, route, status, elapsed * 1000, stages or 'no spans')
+
 app.include_router(analyze.router, prefix="/api/analyze", tags=["Analyze"])
 app.include_router(portfolio.router, prefix="/api/portfolio", tags=["Portfolio"])
 app.include_router(report.router, prefix="/api/report", tags=["Report"])
 app.include_router(amendments.router, prefix="/api/amendments", tags=["Amendments"])
+app.include_router(clauses.router, prefix="/api/clauses", tags=["Clauses"])
+
+def _cache_stats():
+    return {
+        "results": analyze.result_cache.get_stats(),
+        "explanations": analyze.risk_engine.ai_explainer.cache.get_stats(),
+        "diffs": diff_cache.get_stats(),
+        "reports": report.report_renderer.cache.get_stats(),
+    }
+
+def _cache_lookups():
+    samples = []
+    for cache, stats in _cache_stats().items():
+        # The result cache counts per endpoint; the others only overall
+        for endpoint, counts in stats.get("endpoints", {"all": stats}).items():
+            samples.append(({"cache": cache, "endpoint": endpoint, "result": "hit"}, counts["hits"]))
+            samples.append(({"cache": cache, "endpoint": endpoint, "result": "miss"}, counts["misses"]))
+    return samples
+
+def _hit_ratio(stats):
+    # The result cache only keeps per-endpoint counters
+    counts = stats.get("endpoints", {"all": stats}).values()
+    hits, lookups = sum(c["hits"] for c in counts), sum(c["hits"] + c["misses"] for c in counts)
+    return hits / lookups if lookups else 0.0
+
+registry.add_collector("doccompare_cache_lookups_total", "Cache lookups by cache, endpoint and result", _cache_lookups, kind="counter")
+registry.add_collector(
+    "doccompare_cache_hit_ratio", "Hits over lookups since start, per cache",
+    lambda: [({"cache": cache}, _hit_ratio(stats)) for cache, stats in _cache_stats().items()],
+)
+registry.add_collector(
+    "doccompare_cache_entries", "Entries held per cache",
+    lambda: [({"cache": cache}, stats["entries"]) for cache, stats in _cache_stats().items()],
+)
+registry.add_collector(
+    "doccompare_clause_index_entries", "Clauses held in the clause index",
+    lambda: [({}, clauses.clause_index.get_stats()["entries"])],
+)
+registry.add_collector(
+    "doccompare_jobs_queued", "Analysis jobs waiting, per priority lane",
+    lambda: [({"lane": lane}, queued) for lane, queued in analyze.job_queue.get_stats()["queued"].items()],
+)
+
+def _warmup_status():
+    warmup = getattr(app.state, "warmup", None)
+    return warmup.status() if warmup is not None else {"ready": False, "finished": False, "elapsed_ms": None, "stages": {}}
+
+registry.add_collector("doccompare_ready", "1 once start-up warm-up has finished", lambda: [({}, float(_warmup_status()["ready"]))])
+
+@app.get("/health/live", include_in_schema=False)
+def liveness():
+    """The process is up and serving; says nothing about warm-up"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", include_in_schema=False)
+def readiness():
+    """200 once every warm-up stage has finished, 503 (with per-stage state) until then"""
+    status = _warmup_status()
+    return JSONResponse({"status": "ready" if status["ready"] else "warming", **status}, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition: route latencies, stage timings, LLM calls, cache and queue figures"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/")
 def read_root():
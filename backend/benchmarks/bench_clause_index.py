@@ -0,0 +1,59 @@
+"""
+Corpus questions ("deals with a grace period above 5 days", "cross-default
+threshold above EUR 10M") answered by re-parsing every document vs a range
+query on the clause index.
+
+Each deal is a synthetic `--pages`-page agreement with random covenant
+values, indexed into a throwaway database.
+
+Usage (from backend/):
+    python -m benchmarks.bench_clause_index [--pages 50] [deals ...]
+"""
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+from app.core.clause_index import ClauseIndex
+from app.core.risk_engine import LMADocumentParser
+from benchmarks.synthetic import generate_agreement, random_values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('deals', type=int, nargs='*', default=[100, 1000])
+    args = parser.parse_args()
+
+    lma = LMADocumentParser()
+    rng = random.Random(0)
+    print(f"{'deals':>6} {'re-parse s':>11} {'index ms':>9} {'matches':>8} {'same':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.deals:
+            index = ClauseIndex(os.path.join(tmp, f"bench_{n}.db"))
+            documents = []
+            for i in range(n):
+                text = generate_agreement(args.pages, values=random_values(rng), seed=i)['text']
+                doc_hash = hashlib.sha256(text.encode()).hexdigest()
+                index.add_document(doc_hash, lma.parse_document(text))
+                index.link(f"portfolio:{i}", doc_hash, 'portfolio')
+                documents.append(text)
+
+            start = time.perf_counter()
+            rescan = {
+                f"portfolio:{i}" for i, text in enumerate(documents)
+                if (lma.covenant_values(lma.parse_document(text))['grace_period'] or 0) > 5
+            }
+            reparse = time.perf_counter() - start
+
+            start = time.perf_counter()
+            matches = index.query('grace_period', gt=5, limit=n)
+            lookup = (time.perf_counter() - start) * 1000
+            same = rescan == {m['deal'] for m in matches}
+            print(f"{n:>6} {reparse:>11.2f} {lookup:>9.2f} {len(matches):>8} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
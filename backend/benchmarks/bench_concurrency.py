@@ -0,0 +1,76 @@
+"""
+p50/p99 latency of GET /api/portfolio/ while deal analyses are in flight.
+
+Each deal's explanation batch is replaced with a fixed sleep that stands
+in for the (concurrent) Anthropic round-trips, so the numbers show whether
+analysis work stalls other routes on the event loop. Every in-flight
+analysis gets its own copy of the deal text, so none is answered from the
+result cache.
+
+Usage (from backend/):
+    python -m benchmarks.bench_concurrency [llm_latency_s] [in_flight]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+from app.api import analyze
+from app.main import app
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _portfolio_latencies(client: httpx.AsyncClient, requests: int):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        resp = await client.get("/api/portfolio/")
+        resp.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def main(llm_latency: float, in_flight: int):
+    explainer = analyze.risk_engine.ai_explainer
+
+    def slow_explanations(risk_items, template_context=''):
+        time.sleep(llm_latency)
+        return [explainer._fallback_explanation(risk_data) for risk_data in risk_items]
+
+    explainer.generate_explanations = slow_explanations
+    with open(os.path.join(analyze.DATA_DIR, "sample_deals", "Deal_Leveraged_Aggressive.txt")) as f:
+        text = f.read()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        idle = await _portfolio_latencies(client, 100)
+
+        # A unique trailer per request defeats the result cache, so every analysis takes the slow path
+        started = time.perf_counter()
+        analyses = [
+            asyncio.create_task(client.post("/api/analyze/", json={"deal_text": f"{text}\n\nBenchmark copy {time.time_ns()}-{i}\n"}))
+            for i in range(in_flight)
+        ]
+        await asyncio.sleep(0)
+        loaded = await _portfolio_latencies(client, 100)
+        in_flight_after = sum(not task.done() for task in analyses)
+        for response in await asyncio.gather(*analyses):
+            response.raise_for_status()
+        analysis_time = time.perf_counter() - started
+
+    print(f"{'phase':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, samples in (("idle", idle), ("loaded", loaded)):
+        print(f"{name:>8} {_percentile(samples, 50):>8.2f} {_percentile(samples, 99):>8.2f}")
+    print(f"{in_flight} analyses took {analysis_time:.2f} s ({llm_latency:.2f} s simulated LLM latency each); "
+          f"{in_flight_after} still in flight when sampling ended")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(float(args[0]) if args else 0.5, int(args[1]) if len(args) > 1 else 8))
@@ -0,0 +1,57 @@
+"""
+Amendment diff time: whole-document difflib vs the clause-level ClauseDiffEngine.
+
+The amendment changes the leverage covenant and rewrites a handful of
+clauses; everything else is identical, as in a typical amendment. Text is
+hard-wrapped as extracted from PDF, so boilerplate produces many
+near-duplicate lines.
+
+Usage (from backend/):
+    python -m benchmarks.bench_diff [pages ...]
+"""
+import difflib
+import random
+import sys
+import time
+
+from app.core.diff_engine import ClauseDiffEngine
+from benchmarks.synthetic import DEFAULT_VALUES, generate_agreement
+
+
+def _legacy_diff(text1: str, text2: str):
+    # Previous compare_versions: unified_diff over every line of both versions
+    diff = difflib.unified_diff(text1.splitlines(True), text2.splitlines(True), lineterm='', n=0)
+    return [line for line in diff if not line.startswith(('---', '+++', '@@'))]
+
+
+def _amend(text: str, edits: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    paragraphs = text.split("\n\n")
+    for idx in rng.sample(range(len(paragraphs)), edits):
+        paragraphs[idx] = paragraphs[idx].replace("the Agent", "the Security Agent")
+    return "\n\n".join(paragraphs)
+
+
+def main(page_counts):
+    engine = ClauseDiffEngine()
+    print(f"{'pages':>6} {'clauses':>8} {'clause diff ms':>15} {'legacy ms':>10}")
+    for pages in page_counts:
+        original = generate_agreement(pages, wrap=80)['text']
+        amended = generate_agreement(pages, values={**DEFAULT_VALUES, 'leverage_ratio': '5.25'}, wrap=80)['text']
+        amended = _amend(amended, edits=5)
+
+        start = time.perf_counter()
+        result = engine.compare(original, amended)
+        clause_ms = (time.perf_counter() - start) * 1000
+        assert any(c['covenant'] == 'leverage_ratio' and c['to'] == 5.25 for c in result['covenant_changes'])
+
+        start = time.perf_counter()
+        _legacy_diff(original, amended)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        clauses = result['unchanged_clauses'] + len(result['clauses'])
+        print(f"{pages:>6} {clauses:>8} {clause_ms:>15.2f} {legacy_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main([int(p) for p in sys.argv[1:]] or [10, 50, 200])
@@ -0,0 +1,87 @@
+"""
+Per-deal explanation latency: serial per-call clients vs the shared,
+concurrent AIExplanationEngine, and repeat explanations served from the
+explanation cache, against a local fake Anthropic server.
+
+Usage (from backend/):
+    python -m benchmarks.bench_explanations [delay_s] [deals]
+"""
+import os
+import sys
+import time
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+
+
+def _serial_explanations(engine, risk_items):
+    # Previous behaviour: a fresh synchronous client per deviation, one call at a time
+    from anthropic import Anthropic
+    out = []
+    for risk_data in risk_items:
+        client = Anthropic(api_key=engine.api_key)
+        message = client.messages.create(
+            model=engine.model,
+            max_tokens=150,
+            messages=[{"role": "user", "content": engine._build_prompt(risk_data)}]
+        )
+        out.append(message.content[0].text.strip())
+    return out
+
+
+def main(delay: float, deals: int):
+    server = FakeAnthropicServer(delay=delay, hang_on="Clause: Cross Default").start()
+    os.environ["ANTHROPIC_BASE_URL"] = server.base_url
+    os.environ["ANTHROPIC_API_KEY"] = "fake-key"
+
+    from app.core.risk_engine import RiskEngine
+
+    engine = RiskEngine()
+    explainer = engine.ai_explainer
+    explainer.timeout = delay * 3
+    with open(os.path.join("app", "data", "sample_deals", "Deal_Leveraged_Aggressive.txt")) as f:
+        text = f.read()
+    # Score without explaining, to get the deal's findings
+    explainer.enabled = False
+    risk_items = [d['metadata'] for d in engine.analyze_deal(text, '')['deviations']]
+    explainer.enabled = True
+
+    healthy = [r for r in risk_items if r['clause_type'] != 'Cross Default Threshold']
+    print(f"{len(healthy)} findings per deal, {delay * 1000:.0f} ms simulated LLM latency, {deals} deals")
+
+    start = time.perf_counter()
+    for _ in range(deals):
+        _serial_explanations(explainer, healthy)
+    serial = (time.perf_counter() - start) / deals
+
+    server.requests, server.connections = 0, set()
+    start = time.perf_counter()
+    for _ in range(deals):
+        explainer.cache.clear()
+        explainer.generate_explanations(healthy)
+    concurrent = (time.perf_counter() - start) / deals
+    print(f"serial per-call clients : {serial * 1000:8.1f} ms/deal")
+    print(f"shared concurrent client: {concurrent * 1000:8.1f} ms/deal "
+          f"({server.requests} requests over {len(server.connections)} connections)")
+
+    # One finding hangs past the per-call timeout - only that item falls back
+    start = time.perf_counter()
+    explanations = explainer.generate_explanations(risk_items)
+    elapsed = time.perf_counter() - start
+    fallbacks = sum(1 for e in explanations if e != "Fake explanation.")
+    print(f"with one hung call      : {elapsed * 1000:8.1f} ms, {fallbacks}/{len(explanations)} fell back")
+
+    # Unchanged findings are answered from the explanation cache
+    before = server.requests
+    start = time.perf_counter()
+    explainer.generate_explanations(healthy)
+    elapsed = time.perf_counter() - start
+    print(f"re-analysis (cached)    : {elapsed * 1000:8.3f} ms, {server.requests - before} outbound calls")
+    print(explainer.cache.get_stats())
+
+    explainer.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 0.2, int(args[1]) if len(args) > 1 else 5)
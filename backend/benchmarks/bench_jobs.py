@@ -0,0 +1,61 @@
+"""
+Queue wait of interactive analysis jobs while a bulk re-score is queued.
+
+Each job sleeps for `--job-ms` to stand in for parse + score + AI
+explanation. The same workload is run twice: once through a single FIFO
+(every job in one lane, no reserved worker) and once with priority lanes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_jobs [--bulk 200] [--interactive 10] [--job-ms 50]
+"""
+import argparse
+import statistics
+import time
+
+from app.core.jobs import JobQueue
+
+
+def _run(bulk: int, interactive: int, job_ms: float, lanes: bool):
+    def runner(payload, progress):
+        for stage in ('parse', 'score', 'explain'):
+            progress(stage)
+        time.sleep(job_ms / 1000)
+        return payload
+
+    queue = JobQueue(runner, workers=2 if lanes else 3, reserved_workers=1 if lanes else 0)
+    for i in range(bulk):
+        queue.submit({'n': i}, priority='bulk' if lanes else 'interactive')
+
+    # Interactive requests trickle in while the bulk backlog is being worked through
+    jobs = []
+    for _ in range(interactive):
+        jobs.append(queue.submit({'interactive': True}, priority='interactive')['id'])
+        time.sleep(job_ms / 1000)
+
+    waits = []
+    for job_id in jobs:
+        while True:
+            status = queue.status(job_id)
+            if status['status'] == 'done':
+                waits.append((status['started_at'] - status['submitted_at']) * 1000)
+                break
+            time.sleep(0.002)
+    queue.shutdown()
+    return waits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bulk', type=int, default=200)
+    parser.add_argument('--interactive', type=int, default=10)
+    parser.add_argument('--job-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"{'queue':>8} {'p50 wait ms':>12} {'max wait ms':>12}")
+    for name, lanes in (('fifo', False), ('lanes', True)):
+        waits = _run(args.bulk, args.interactive, args.job_ms, lanes)
+        print(f"{name:>8} {statistics.median(waits):>12.1f} {max(waits):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
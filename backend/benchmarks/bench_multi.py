@@ -0,0 +1,57 @@
+"""
+One deal against K templates: a full analyze_deal per template vs parsing
+once and scoring the extracted covenants against every template
+(RiskEngine.analyze_templates, behind POST /api/analyze/multi).
+
+The templates are the bundled LMA template with its standards scaled per
+copy, so every template produces different findings.
+
+Usage (from backend/):
+    python -m benchmarks.bench_multi [--pages 300] [--repeat 5] [K ...]
+"""
+import argparse
+import os
+import time
+
+from app.core.risk_engine import RiskEngine
+from benchmarks.synthetic import generate_agreement
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "data", "templates", "LMA_Leveraged_2023.txt")
+
+
+def _best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('templates', type=int, nargs='*', default=[1, 3, 5, 10])
+    args = parser.parse_args()
+
+    engine = RiskEngine()
+    engine.ai_explainer.enabled = False
+    text = generate_agreement(args.pages)['text']
+    with open(TEMPLATE) as f:
+        template_text = f.read()
+    base = engine.template_standards(template_text)
+
+    print(f"{args.pages}-page deal, best of {args.repeat}")
+    print(f"{'K':>4} {'K x analyze ms':>15} {'multi ms':>10} {'parse ms':>10} {'score ms':>10} {'speedup':>8}")
+    for k in args.templates:
+        templates = [(template_text, {key: value * (1 + 0.25 * i) for key, value in base.items()}) for i in range(k)]
+        separate = _best(lambda: [engine.analyze_deal(text, t, standards) for t, standards in templates], args.repeat)
+        parse = _best(lambda: engine.parser.parse_document(text), args.repeat)
+        deal_data = engine.parser.parse_document(text)
+        score = _best(lambda: engine.analyze_templates(deal_data, templates), args.repeat)
+        print(f"{k:>4} {separate:>15.2f} {parse + score:>10.2f} {parse:>10.2f} {score:>10.2f} {separate / (parse + score):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
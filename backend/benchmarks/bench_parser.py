@@ -0,0 +1,54 @@
+"""
+Per-document parse time of LMADocumentParser on large synthetic agreements.
+
+Usage (from backend/):
+    python -m benchmarks.bench_parser [pages ...]
+"""
+import re
+import sys
+import time
+
+from app.core.risk_engine import LMADocumentParser
+from benchmarks.synthetic import generate_agreement
+
+
+def _legacy_parse(parser: LMADocumentParser, text: str):
+    # Previous implementation: one unanchored re.search per clause over the full text
+    return {
+        key: re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        for key, pattern in parser.clause_patterns.items()
+    }
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(page_counts):
+    parser = LMADocumentParser()
+    # "full": every covenant present. "cov-lite": no financial covenants, but the
+    # covenant names are cross-referenced throughout (worst case for lazy .*?)
+    scenarios = {
+        'full': lambda pages: generate_agreement(pages, mentions=pages),
+        'cov-lite': lambda pages: generate_agreement(pages, values={}, mentions=pages),
+    }
+    print(f"{'scenario':>9} {'pages':>6} {'chars':>10} {'scanner ms':>12} {'legacy ms':>12}")
+    for name, build in scenarios.items():
+        for pages in page_counts:
+            doc = build(pages)
+            text = doc['text']
+            parsed = parser.parse_document(text)
+            for key, value in doc['values'].items():
+                assert parsed[key] and parsed[key]['value'] == value, key
+            scanner = _time(lambda: parser.parse_document(text))
+            legacy = _time(lambda: _legacy_parse(parser, text), repeat=1)
+            print(f"{name:>9} {pages:>6} {len(text):>10} {scanner * 1000:>12.2f} {legacy * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main([int(p) for p in sys.argv[1:]] or [10, 100, 300])
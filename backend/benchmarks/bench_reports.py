@@ -0,0 +1,76 @@
+"""
+Committee pack export: reports for a portfolio slice rendered from stored
+analyses vs re-running the analysis of every document on demand.
+
+Each deal is a synthetic `--pages`-page agreement analyzed once and added
+with its full result to a throwaway portfolio database. The export is run
+cold (empty report cache) and warm.
+
+Usage (from backend/):
+    python -m benchmarks.bench_reports [--pages 150] [--format pdf] [deals ...]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.core.portfolio_engine import PortfolioStore
+from app.core.reports import ReportCache, ReportRenderer
+from app.core.risk_engine import RiskEngine
+from benchmarks.synthetic import generate_agreement
+
+_VALUES = [
+    {'leverage_ratio': '5.75', 'interest_cover': '2.75', 'grace_period': '10', 'cross_default': '10,000,000'},
+    {'leverage_ratio': '4.25', 'interest_cover': '3.75', 'grace_period': '5', 'cross_default': '2,500,000'},
+    {'leverage_ratio': '3.00', 'interest_cover': '4.50', 'grace_period': '3', 'cross_default': '0'},
+]
+
+
+def _export(store: PortfolioStore, renderer: ReportRenderer, fmt: str) -> int:
+    def batches():
+        for items in store.stream():
+            yield items, store.analyses([int(item['id']) for item in items])
+    return sum(len(chunk) for chunk in renderer.zip_stream(batches(), fmt))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=150)
+    parser.add_argument('--format', default='pdf', choices=['text', 'html', 'pdf'])
+    parser.add_argument('deals', type=int, nargs='*', default=[50, 200])
+    args = parser.parse_args()
+
+    engine = RiskEngine()
+    engine.ai_explainer.enabled = False
+    documents = [generate_agreement(args.pages, values=values, seed=n)['text'] for n, values in enumerate(_VALUES)]
+
+    print(f"{'deals':>6} {'re-analyze s':>13} {'cold s':>8} {'warm s':>8} {'zip KB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.deals:
+            store = PortfolioStore(os.path.join(tmp, f"bench_{n}.db"))
+            start = time.perf_counter()
+            for i in range(n):
+                result = engine.analyze_deal(documents[i % len(documents)], '')
+                store.add({
+                    'deal_name': f"Synthetic Facility {i}", 'jurisdiction': 'English Law', 'vintage': '2024',
+                    'risk_score': result['overall_score'], 'risk_label': result['risk_label'],
+                    'high_risk_count': result['counts']['High'], 'medium_risk_count': result['counts']['Medium'],
+                    'low_risk_count': result['counts']['Low'], 'is_red_flag': result['overall_score'] >= 7,
+                    'analyzed_at': '2024-12-01',
+                    'analysis': {**result, 'deal_name': f"Synthetic Facility {i}", 'rules_version': engine.scorer.rules_version},
+                })
+            # Analysis dominates adding, so this stands in for re-analyzing every deal at export time
+            reanalyze = time.perf_counter() - start
+
+            renderer = ReportRenderer(ReportCache())
+            start = time.perf_counter()
+            size = _export(store, renderer, args.format)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            _export(store, renderer, args.format)
+            warm = time.perf_counter() - start
+            print(f"{n:>6} {reanalyze:>13.2f} {cold:>8.3f} {warm:>8.3f} {size / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Re-scoring a synthetic book with the vectorized scorer vs the scalar
+RiskScoringEngine functions, checking that both agree row for row.
+
+Values cluster on and around every ladder boundary so the comparison
+operators are exercised at equality.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rescore [deals ...]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.core.bulk_scoring import LEVELS, score_book
+from app.core.risk_engine import RiskScoringEngine
+
+_SCALAR = {
+    'leverage_ratio': ('score_leverage_ratio', 'leverage_ratio_leveraged'),
+    'interest_cover': ('score_interest_cover', 'interest_cover_standard'),
+    'grace_period': ('score_grace_period', 'grace_period_standard'),
+    'cross_default': ('score_cross_default', 'cross_default_threshold_standard'),
+}
+
+_CANDIDATES = {
+    'leverage_ratio': [2.5, 3.0, 3.5, 4.0, 4.25, 4.5, 4.75, 5.0, 5.5, 5.75, 6.5],
+    'interest_cover': [1.5, 2.5, 2.75, 3.0, 3.5, 3.75, 4.0, 4.5],
+    'grace_period': [0, 1, 2, 3, 4, 5, 6, 10],
+    'cross_default': [0, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000],
+}
+
+
+def _book(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return {
+        covenant: np.array([
+            rng.choice(values) if rng.random() > 0.15 else np.nan for _ in range(n)
+        ])
+        for covenant, values in _CANDIDATES.items()
+    }
+
+
+def _scalar_book(scorer: RiskScoringEngine, book, standards):
+    # Same totals as RiskEngine.analyze_deal / add_to_portfolio, one deal at a time
+    n = len(book['leverage_ratio'])
+    out = []
+    for i in range(n):
+        total, levels = 0, []
+        for covenant, (method, key) in _SCALAR.items():
+            value = book[covenant][i]
+            if np.isnan(value):
+                continue
+            scored = getattr(scorer, method)(float(value), standard=standards[key])
+            total += scored['risk_score']
+            levels.append(scored['risk_level'])
+        overall = min(total, 10)
+        label = 'High' if overall >= 7 else 'Medium' if overall >= 3 else 'Low'
+        out.append((overall, label, levels.count('High'), levels.count('Medium'), levels.count('Low'),
+                    overall >= 7 or levels.count('High') >= 2))
+    return out
+
+
+def main(sizes):
+    scorer = RiskScoringEngine()
+    proposed = {**scorer.standards, 'leverage_ratio_leveraged': 3.5, 'interest_cover_standard': 3.5, 'cross_default_threshold_standard': 1_000_000}
+    print(f"{'deals':>8} {'vector ms':>10} {'scalar ms':>10} {'identical':>10}")
+    for n in sizes:
+        book = _book(n)
+        start = time.perf_counter()
+        vector = score_book(book, proposed, scorer.rules)
+        vector_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scalar = _scalar_book(scorer, book, proposed)
+        scalar_time = time.perf_counter() - start
+
+        identical = all(
+            (int(vector['overall_score'][i]), LEVELS[vector['risk_label'][i]], int(vector['high_count'][i]),
+             int(vector['medium_count'][i]), int(vector['low_count'][i]), bool(vector['is_red_flag'][i])) == row
+            for i, row in enumerate(scalar)
+        )
+        print(f"{n:>8} {vector_time * 1000:>10.1f} {scalar_time * 1000:>10.1f} {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 100_000])
@@ -0,0 +1,75 @@
+"""
+Per-deal scoring cost as the rule table grows.
+
+Synthetic tables declare N numeric clause types (cycling through the four
+shipped ladders, each with `--bands` bands) plus as many disabled ones.
+Every clause is present in the synthetic parse, so each enabled clause is
+extracted, banded and given a recommendation. The AI explainer is off, so
+the timing is the rule evaluation plus the fallback descriptions.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rules [--deals 2000] [--bands 3] [clause types ...]
+"""
+import argparse
+import copy
+import time
+
+from app.core.risk_engine import RiskEngine, RiskScoringEngine
+from app.core.scoring_rules import ScoringRules, RULES_FILE
+
+_VALUES = {'float': ['2.5', '4.25', '4.75', '5.75', '6.5'], 'int': ['2', '3', '5', '7', '10']}
+
+
+def _table(base, clause_types: int, bands: int):
+    numeric = [rule for rule in base['clauses'] if 'presence' not in rule]
+    table = {**base, 'clauses': []}
+    for i in range(clause_types * 2):
+        rule = copy.deepcopy(numeric[i % len(numeric)])
+        rule['key'] = f"{rule['key']}_{i}"
+        rule['enabled'] = i < clause_types
+        # Stretch the ladder to `bands` bands between the first and last edge.
+        # Offsets already point the worse way; absolute bounds step by the clause's direction
+        first, last = rule['bands'][0], rule['bands'][-1]
+        edge = 'offset' if 'offset' in first else 'bound'
+        step = first[edge] * 0.1 * (1 if edge == 'offset' or rule['worse'] == 'higher' else -1)
+        rule['bands'] = [{**first, edge: first[edge] + step * n} for n in range(bands - 1)] + [last]
+        table['clauses'].append(rule)
+    return table
+
+
+def _deals(rules: ScoringRules, n: int):
+    deals = []
+    for d in range(n):
+        deals.append({
+            clause.key: {'found': True, 'value': _VALUES['int' if clause.convert is int else 'float'][(d + i) % 5]}
+            for i, clause in enumerate(rules.clauses)
+        })
+    return deals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deals', type=int, default=2000)
+    parser.add_argument('--bands', type=int, default=3)
+    parser.add_argument('clause_types', type=int, nargs='*', default=[4, 8, 12, 20, 32])
+    args = parser.parse_args()
+
+    base = ScoringRules.load(RULES_FILE).table
+    engine = RiskEngine()
+    engine.ai_explainer.enabled = False
+
+    print(f"{'clauses':>8} {'disabled':>9} {'bands':>6} {'us/deal':>9} {'us/clause':>10}")
+    for clause_types in args.clause_types:
+        rules = ScoringRules(_table(base, clause_types, args.bands))
+        engine.scorer = RiskScoringEngine(rules)
+        deals = _deals(rules, args.deals)
+
+        start = time.perf_counter()
+        for deal in deals:
+            engine.analyze_parsed(deal, '')
+        per_deal = (time.perf_counter() - start) / len(deals) * 1e6
+        print(f"{clause_types:>8} {clause_types:>9} {args.bands:>6} {per_deal:>9.1f} {per_deal / clause_types:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
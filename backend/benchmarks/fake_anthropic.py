@@ -0,0 +1,89 @@
+"""
+Minimal local stand-in for the Anthropic Messages API.
+
+Answers POST /v1/messages after a fixed delay with a canned completion, so
+explanation latency and connection reuse can be measured without network
+access or an API key. Point the client at it with ANTHROPIC_BASE_URL.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class FakeAnthropicServer:
+    def __init__(self, delay: float = 0.2, hang_on: Optional[str] = None, hang_for: float = 30.0, fail_on: Optional[str] = None):
+        # Requests whose prompt contains `hang_on` sleep for `hang_for` instead of `delay`;
+        # those containing `fail_on` get an API error
+        self.delay = delay
+        self.hang_on = hang_on
+        self.hang_for = hang_for
+        self.fail_on = fail_on
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAnthropicServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][0]["content"]
+                with server._lock:
+                    server.requests += 1
+                    server.connections.add(self.client_address)
+                hang = server.hang_on is not None and server.hang_on in prompt
+                time.sleep(server.hang_for if hang else server.delay)
+
+                if server.fail_on is not None and server.fail_on in prompt:
+                    # A 4xx, which the SDK does not retry
+                    self._reply(400, {
+                        "type": "error",
+                        "error": {"type": "invalid_request_error", "message": "Fake failure."},
+                    })
+                    return
+                self._reply(200, {
+                    "id": f"msg_{server.requests}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": body["model"],
+                    "content": [{"type": "text", "text": "Fake explanation."}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": 1, "output_tokens": 1},
+                })
+
+            def _reply(self, status: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
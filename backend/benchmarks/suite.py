@@ -0,0 +1,288 @@
+"""
+Benchmark suite: the yardstick for performance changes.
+
+Generates synthetic facility agreements (10 to 1000 pages, known covenant
+values planted at random positions) and a synthetic portfolio, then times:
+
+    parse      LMADocumentParser.parse_document (and checks the planted values)
+    analyze    RiskEngine.analyze_deal with the AI layer in fallback mode,
+               against the 2 s per deal budget
+    compare    compare_versions on an Orig/Amend1 pair, cold and cached
+    portfolio  the portfolio endpoints at 10 to 100k rows
+    startup    cold start in a fresh interpreter: importing app.main, and
+               from there until /health/ready reports warm-up done
+
+Results are written as JSON. Pass a previous run with --compare to list
+benchmarks whose median got slower than --threshold (exit status 1 if any).
+Runs against throwaway databases and a temporary deals directory, never
+the app's own data.
+
+Usage (from backend/):
+    python -m benchmarks.suite [--quick] [--only parse,analyze] [--output FILE] [--compare OLD.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import generate_agreement, random_values
+
+SUITES = ('parse', 'analyze', 'compare', 'portfolio', 'startup')
+ANALYZE_BUDGET_MS = 2000
+
+_SIZES = {
+    'pages': [10, 100, 1000],
+    'rows': [10, 1_000, 10_000, 100_000],
+}
+_QUICK_SIZES = {
+    'pages': [10, 100],
+    'rows': [10, 1_000],
+}
+
+
+# Run in a fresh interpreter; prints the import and time-to-ready in ms
+_STARTUP_PROBE = """
+import time
+from fastapi.testclient import TestClient  # test harness only, not part of the app's start-up
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+with TestClient(app.main.app) as client:
+    while client.get('/health/ready').status_code != 200:
+        time.sleep(0.002)
+    ready = time.perf_counter()
+print((imported - started) * 1000, (ready - imported) * 1000)
+"""
+
+
+def _timing(times: List[float]) -> Dict[str, float]:
+    return {
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'max_ms': round(max(times), 3),
+        'runs': len(times),
+    }
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    fn()  # warm-up, also surfaces errors before timing
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return _timing(times)
+
+
+class Suite:
+    def __init__(self, repeat: int, sizes: Dict[str, List[int]], workdir: str, seed: int = 0):
+        self.repeat = repeat
+        self.sizes = sizes
+        self.workdir = workdir
+        self.rng = random.Random(seed)
+        self.results: List[Dict[str, Any]] = []
+
+    def record(self, name: str, params: Dict[str, Any], timing: Dict[str, float], **extra):
+        result = {'benchmark': name, 'params': params, **timing, **extra}
+        self.results.append(result)
+        details = " ".join(f"{k}={v}" for k, v in extra.items())
+        print(f"{name:<28} {json.dumps(params):<32} {timing['median_ms']:>10.2f} ms  {details}")
+
+    def _agreement(self, pages: int) -> Dict[str, Any]:
+        return generate_agreement(pages, values=random_values(self.rng), mentions=pages // 10, seed=pages)
+
+    def parse(self):
+        from app.core.risk_engine import LMADocumentParser
+        parser = LMADocumentParser()
+        for pages in self.sizes['pages']:
+            doc = self._agreement(pages)
+            found = parser.covenant_values(parser.parse_document(doc['text']))
+            expected = {key: parser.VALUE_TYPES[key](value.replace(',', '')) for key, value in doc['values'].items()}
+            timing = _measure(lambda: parser.parse_document(doc['text']), self.repeat)
+            self.record('parse_document', {'pages': pages}, timing, chars=len(doc['text']), values_ok=found == expected)
+
+    def analyze(self):
+        from app.api.analyze import risk_engine, template_registry
+        template = template_registry.get("LMA_Leveraged_2023.txt")
+        for pages in self.sizes['pages']:
+            doc = self._agreement(pages)
+            timing = _measure(lambda: risk_engine.analyze_deal(doc['text'], template['text'], template['standards']), self.repeat)
+            self.record('analyze_deal', {'pages': pages}, timing, within_budget=timing['max_ms'] <= ANALYZE_BUDGET_MS)
+
+    def compare(self):
+        from app.core.amendments import compare_versions, deal_index, diff_cache
+        for pages in self.sizes['pages']:
+            base = f"Bench_{pages}p"
+            original = random_values(self.rng)
+            amended = {**original, 'leverage_ratio': f"{float(original['leverage_ratio']) + 0.5:.2f}"}
+            for suffix, values in (('Orig', original), ('Amend1', amended)):
+                doc = generate_agreement(pages, values=values, seed=pages, wrap=80)
+                with open(os.path.join(os.environ['DEALS_DIR'], f"{base}_{suffix}.txt"), 'w') as f:
+                    f.write(doc['text'])
+            deal_index.sync()
+            v1, v2 = f"{base}_Orig.txt", f"{base}_Amend1.txt"
+
+            def cold():
+                diff_cache.clear()
+                return compare_versions(v1, v2)
+            diff = cold()
+            changed = [c['covenant'] for c in diff.get('covenant_changes', [])] if isinstance(diff, dict) else []
+            self.record('compare_versions', {'pages': pages, 'cache': 'cold'}, _measure(cold, self.repeat), covenant_changes=changed)
+            self.record('compare_versions', {'pages': pages, 'cache': 'warm'}, _measure(lambda: compare_versions(v1, v2), self.repeat))
+
+    def portfolio(self):
+        from fastapi.testclient import TestClient
+        from app.api.portfolio import portfolio_store
+        from app.main import app
+        client = TestClient(app)
+
+        def get(path: str, **params):
+            response = client.get(path, params=params)
+            response.raise_for_status()
+            return response
+
+        imported = 0
+        for rows in self.sizes['rows']:
+            portfolio_store.bulk_import(self._deals(imported + 1, rows))
+            imported = rows
+            params = {'rows': rows}
+            self.record('portfolio_page', params, _measure(lambda: get('/api/portfolio/deals', limit=50), self.repeat))
+            self.record('portfolio_page_filtered', params, _measure(
+                lambda: get('/api/portfolio/deals', risk_label='High', sort='-risk_score', limit=50), self.repeat))
+            self.record('portfolio_stats', params, _measure(lambda: get('/api/portfolio/stats'), self.repeat))
+            self.record('portfolio_stream', params, _measure(lambda: get('/api/portfolio/deals/stream'), self.repeat))
+            self.record('portfolio_list_all', params, _measure(lambda: get('/api/portfolio/'), self.repeat))
+            what_if = {'standards': {'leverage_ratio_leveraged': 3.5}}
+            self.record('portfolio_what_if', params, _measure(
+                lambda: client.post('/api/portfolio/what-if', json=what_if).raise_for_status(), self.repeat))
+
+    def startup(self):
+        # Cold starts need fresh processes, so each run is one subprocess; the deals
+        # directory and databases are whatever the earlier suites left in the workdir
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        imports, ready = [], []
+        for _ in range(self.repeat):
+            out = subprocess.run(
+                [sys.executable, '-c', _STARTUP_PROBE], cwd=backend, env=os.environ,
+                capture_output=True, text=True, check=True, timeout=120,
+            ).stdout.split()
+            imports.append(float(out[-2]))
+            ready.append(float(out[-1]))
+        self.record('startup_import', {}, _timing(imports))
+        self.record('startup_ready', {}, _timing(ready))
+
+    def _deals(self, first_id: int, last_id: int) -> List[Dict[str, Any]]:
+        deals = []
+        for deal_id in range(first_id, last_id + 1):
+            values = random_values(self.rng)
+            score = self.rng.choice([0, 1, 2, 3, 4, 5, 7, 8, 10])
+            high = self.rng.randint(0, 3)
+            deals.append({
+                'id': deal_id,
+                'deal_name': f"Synthetic Facility {deal_id}",
+                'jurisdiction': self.rng.choice(['English Law', 'New York', 'Luxembourg', 'UAE']),
+                'vintage': str(self.rng.randint(2012, 2025)),
+                'risk_score': float(score),
+                'risk_label': 'High' if score >= 7 else 'Medium' if score >= 3 else 'Low',
+                'high_risk_count': high,
+                'medium_risk_count': self.rng.randint(0, 3),
+                'low_risk_count': self.rng.randint(0, 4),
+                'is_red_flag': score >= 7 or high >= 2,
+                'analyzed_at': '2024-12-01',
+                'covenants': {
+                    'leverage_ratio': float(values['leverage_ratio']),
+                    'interest_cover': float(values['interest_cover']),
+                    'grace_period': int(values['grace_period']),
+                    'cross_default': float(values['cross_default'].replace(',', '')),
+                },
+            })
+        return deals
+
+
+def _meta(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'quick': args.quick,
+    }
+
+
+def compare(current: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[Dict[str, Any]]:
+    """Benchmarks present in both runs whose median is more than `threshold` times the baseline's"""
+    with open(baseline_path) as f:
+        baseline = {
+            (r['benchmark'], json.dumps(r['params'], sort_keys=True)): r for r in json.load(f)['results']
+        }
+    regressions = []
+    print(f"\n{'benchmark':<28} {'params':<32} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for result in current:
+        before = baseline.get((result['benchmark'], json.dumps(result['params'], sort_keys=True)))
+        if before is None:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        flag = '  REGRESSION' if ratio > threshold else ''
+        print(f"{result['benchmark']:<28} {json.dumps(result['params']):<32} {before['median_ms']:>10.2f} {result['median_ms']:>10.2f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append({**result, 'baseline_median_ms': before['median_ms'], 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--only', default=','.join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument('--quick', action='store_true', help="smaller documents and books, for a fast sanity run")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="previous results file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="median slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    suites = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = sorted(set(suites) - set(SUITES))
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Must be set before the app modules are imported - they read these at import time
+        os.environ['ANTHROPIC_API_KEY'] = ''  # fallback explanations, no network
+        os.environ['PORTFOLIO_DB'] = os.path.join(workdir, 'portfolio.db')
+        os.environ['DEALS_DIR'] = os.path.join(workdir, 'deals')
+        os.environ['DEAL_INDEX_DB'] = os.path.join(workdir, 'deal_index.db')
+        os.environ['CLAUSE_INDEX_DB'] = os.path.join(workdir, 'clause_index.db')
+        os.makedirs(os.environ['DEALS_DIR'])
+
+        suite = Suite(args.repeat, _QUICK_SIZES if args.quick else _SIZES, workdir)
+        meta = _meta(args)
+        print(f"{'benchmark':<28} {'params':<32} {'median':>13}")
+        for name in suites:
+            getattr(suite, name)()
+
+    output = {'meta': meta, 'results': suite.results}
+    if args.compare:
+        output['regressions'] = compare(suite.results, args.compare, args.threshold)
+
+    path = args.output or os.path.join(os.path.dirname(__file__), 'results', time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {path}")
+    return 1 if output.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
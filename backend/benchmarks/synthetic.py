@@ -0,0 +1,87 @@
+import random
+import textwrap
+from typing import Dict, Any, Optional
+
+# Roughly one page of typeset facility agreement text
+PAGE_CHARS = 3000
+
+_FILLER = [
+    "The Agent shall promptly notify the Lenders of the contents of each notice received by it from an Obligor under this Agreement.",
+    "Each Obligor shall supply to the Agent, in sufficient copies for all the Lenders, all documents dispatched by it to its shareholders generally.",
+    "Any amount which is stated to be payable by an Obligor under a Finance Document shall be paid in the currency in which it is expressed.",
+    "The Borrower may not deliver a Utilisation Request if as a result of the proposed Utilisation more than ten Loans would be outstanding.",
+    "Each Party shall pay any stamp, registration and similar tax which is payable in connection with the entry into and performance of this Agreement.",
+    "The rights of each Finance Party under the Finance Documents may be exercised as often as necessary and are cumulative.",
+    "If a payment under a Finance Document is due on a day which is not a Business Day, the due date shall instead be the next Business Day.",
+    "No failure to exercise, nor any delay in exercising, on the part of any Finance Party, any right or remedy shall operate as a waiver.",
+]
+
+_CLAUSES = {
+    'leverage_ratio': "The Borrower shall ensure that the Leverage Ratio in respect of each Relevant Period shall not exceed {value}:1.",
+    'interest_cover': "The Borrower shall ensure that the Interest Cover in respect of each Relevant Period shall not be less than {value}:1.",
+    'grace_period': "An Event of Default occurs unless payment is made within {value} Business Days of its due date.",
+    'cross_default': "No Event of Default will occur unless the aggregate amount of Financial Indebtedness exceeds EUR {value}.",
+}
+
+# Cross-references to covenant names that do not themselves state a value
+_MENTIONS = [
+    "The Agent shall calculate the Leverage Ratio and the Interest Cover by reference to the latest Compliance Certificate.",
+    "Any Disposals permitted under this Agreement shall be notified to the Agent together with the Leverage Ratio calculation.",
+    "For the avoidance of doubt, the aggregate amount of any Permitted Financial Indebtedness shall be determined by the Agent.",
+]
+
+DEFAULT_VALUES = {
+    'leverage_ratio': '4.50',
+    'interest_cover': '3.25',
+    'grace_period': '5',
+    'cross_default': '10,000,000',
+}
+
+
+def random_values(rng: random.Random) -> Dict[str, str]:
+    """Covenant values spread across every risk band, formatted as they appear in agreements"""
+    return {
+        'leverage_ratio': f"{rng.choice([2.5, 3.0, 3.75, 4.0, 4.5, 5.0, 5.75, 6.5]):.2f}",
+        'interest_cover': f"{rng.choice([1.5, 2.5, 3.0, 3.25, 4.0, 4.5]):.2f}",
+        'grace_period': str(rng.choice([1, 3, 5, 10])),
+        'cross_default': f"{rng.choice([0, 500_000, 2_500_000, 10_000_000]):,}",
+    }
+
+
+def generate_agreement(pages: int, values: Optional[Dict[str, str]] = None, mentions: int = 0, seed: int = 0, wrap: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build a synthetic facility agreement of roughly `pages` pages with the
+    given covenant values planted at random clause positions. `mentions`
+    stray cross-references to covenant names are scattered through the text.
+    With `wrap`, paragraphs are hard-wrapped at that width, as in text
+    extracted from a typeset PDF.
+    Returns the text together with the planted values.
+    """
+    rng = random.Random(seed)
+    values = DEFAULT_VALUES if values is None else values
+
+    paragraphs = []
+    size = 0
+    clause_no = 1
+    while size < pages * PAGE_CHARS:
+        body = " ".join(rng.choice(_FILLER) for _ in range(rng.randint(2, 5)))
+        paragraph = f"{clause_no}. {body}"
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+        clause_no += 1
+
+    for _ in range(mentions):
+        idx = rng.randrange(len(paragraphs) + 1)
+        paragraphs.insert(idx, rng.choice(_MENTIONS))
+
+    for key, value in values.items():
+        idx = rng.randrange(len(paragraphs) + 1)
+        paragraphs.insert(idx, _CLAUSES[key].format(value=value))
+
+    if wrap:
+        paragraphs = [textwrap.fill(p, width=wrap) for p in paragraphs]
+
+    return {
+        'text': "\n\n".join(paragraphs),
+        'values': dict(values),
+    }
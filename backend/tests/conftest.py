@@ -0,0 +1,55 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Stores and caches are module-level instances configured from the environment
+# at import time, so point them at a scratch directory before the app is imported
+_scratch = tempfile.mkdtemp(prefix="doccompare-tests-")
+_deals = os.path.join(_scratch, "deals")
+shutil.copytree(os.path.join(BACKEND_DIR, "app", "data", "sample_deals"), _deals)
+os.environ.update({
+    "PORTFOLIO_DB": os.path.join(_scratch, "portfolio.db"),
+    "CLAUSE_INDEX_DB": os.path.join(_scratch, "clause_index.db"),
+    "DEAL_INDEX_DB": os.path.join(_scratch, "deal_index.db"),
+    "WORKER_EXPLANATION_CACHE_DB": os.path.join(_scratch, "worker_explanations.db"),
+    "DEALS_DIR": _deals,
+    # Fallback explanations unless a test builds its own engine
+    "ANTHROPIC_API_KEY": "",
+})
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as client:
+        app.state.warmup.wait(60)
+        yield client
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+
+@pytest.fixture
+def fake_anthropic(monkeypatch):
+    """Start a local fake Messages API (see benchmarks.fake_anthropic) with the given behaviour; the SDK is pointed at it"""
+    from benchmarks.fake_anthropic import FakeAnthropicServer
+    servers = []
+
+    def start(**options):
+        server = FakeAnthropicServer(**options).start()
+        servers.append(server)
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.base_url)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "fake-key")
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
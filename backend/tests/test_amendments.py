@@ -0,0 +1,89 @@
+from app.core.deals import DealVersionIndex
+
+
+def test_timeline_net_change(client):
+    response = client.get("/api/amendments/Deal_Delta/timeline")
+    assert response.status_code == 200
+    timeline = response.json()
+
+    assert [v['covenants']['leverage_ratio'] for v in timeline['versions']] == [3.0, 3.5, 4.0]
+    assert [len(step['changes']) for step in timeline['deltas']] == [1, 2]
+    net = {change['covenant']: change for change in timeline['net_changes']}
+    assert set(net) == {'leverage_ratio', 'interest_cover'}
+    assert (net['leverage_ratio']['from'], net['leverage_ratio']['to']) == (3.0, 4.0)
+    assert (net['interest_cover']['from'], net['interest_cover']['to']) == (4.0, 3.0)
+    assert {change['direction'] for change in net.values()} == {'loosened'}
+
+
+def test_net_change_skips_reverted_steps(tmp_path, monkeypatch):
+    from app.core import amendments
+
+    deals = tmp_path / "deals"
+    deals.mkdir()
+    for version, leverage in (("Orig", "3.00"), ("Amend1", "2.50"), ("Amend2", "3.00")):
+        (deals / f"Deal_Foxtrot_{version}.txt").write_text(
+            f"The Leverage Ratio in respect of any Relevant Period shall not exceed {leverage}:1.\n"
+        )
+    index = DealVersionIndex(str(deals), str(tmp_path / "deal_index.db"))
+    monkeypatch.setattr(amendments, "deal_index", index)
+
+    timeline = amendments.get_covenant_timeline("Deal_Foxtrot")
+    assert [step['changes'][0]['direction'] for step in timeline['deltas']] == ['tightened', 'loosened']
+    # Tightened then loosened back: no net change
+    assert timeline['net_changes'] == []
+
+
+def test_timeline_of_unknown_deal_is_404(client):
+    assert client.get("/api/amendments/Deal_Missing/timeline").status_code == 404
+
+
+def _diff(seed: int):
+    import random
+    rng = random.Random(seed)
+    # Random text, so compression can't shrink entries below the budget arithmetic
+    return {'changes': [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(2000))]}
+
+
+def test_diff_cache_hits_and_misses():
+    from app.core.diff_cache import DiffCache
+
+    cache = DiffCache()
+    assert cache.get(("a", "b")) is None
+    cache.put(("a", "b"), _diff(1))
+    assert cache.get(("a", "b")) == _diff(1)
+    # Keyed on content hashes in order: the reverse pair is a different diff
+    assert cache.get(("b", "a")) is None
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 1)
+
+
+def test_diff_cache_evicts_least_recently_used_over_budget():
+    from app.core.diff_cache import DiffCache
+
+    cache = DiffCache(max_bytes=10**9)
+    cache.put(("v0", "v1"), _diff(0))
+    entry_bytes = cache.get_stats()['bytes']
+    cache = DiffCache(max_bytes=entry_bytes * 3 + entry_bytes // 2)
+    for i in range(3):
+        cache.put((f"v{i}", f"v{i + 1}"), _diff(i))
+    cache.get(("v0", "v1"))
+    cache.put(("v3", "v4"), _diff(3))
+
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= cache.max_bytes
+    assert ("v1", "v2") not in cache
+    assert ("v0", "v1") in cache and ("v3", "v4") in cache
+    # A diff bigger than the whole budget is not cached at all
+    small = DiffCache(max_bytes=100)
+    small.put(("x", "y"), _diff(9))
+    assert ("x", "y") not in small and small.get_stats()['bytes'] == 0
+
+
+def test_repeated_compare_is_served_from_cache(client):
+    params = {"v1": "Deal_Delta_Orig.txt", "v2": "Deal_Delta_Amend2.txt"}
+    first = client.get("/api/amendments/compare", params=params).json()
+    hits = client.get("/api/amendments/cache/stats").json()['hits']
+    second = client.get("/api/amendments/compare", params=params).json()
+    assert second == first
+    assert client.get("/api/amendments/cache/stats").json()['hits'] == hits + 1
@@ -0,0 +1,49 @@
+import os
+
+SAMPLES = ["Deal_Leveraged_Aggressive.txt", "Deal_InvestmentGrade_Clean.txt"]
+
+
+def test_batch_matches_in_process_analysis(client):
+    from app.api.analyze import risk_engine, template_registry
+
+    template = template_registry.get("LMA_Leveraged_2023.txt")
+    texts = []
+    for sample in SAMPLES:
+        with open(os.path.join(os.environ["DEALS_DIR"], sample)) as f:
+            # Unique text, so every deal goes to the pool rather than the result cache
+            texts.append(f.read() + "\nBatch test copy\n")
+
+    response = client.post("/api/analyze/batch", json={"deals": [{"deal_text": text} for text in texts]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    for text, result in zip(texts, results):
+        expected = risk_engine.analyze_deal(text, template['text'], template['standards'])
+        assert result["overall_score"] == expected["overall_score"]
+        assert [d["type"] for d in result["deviations"]] == [d["type"] for d in expected["deviations"]]
+
+
+def test_pool_workers_are_not_forked():
+    from app.core.workers import get_process_pool
+
+    assert get_process_pool()._mp_context.get_start_method() != "fork"
+
+
+def test_large_parse_does_not_queue_behind_batch(monkeypatch):
+    import time
+    from app.api.analyze import risk_engine
+    from app.core import workers
+
+    monkeypatch.setattr(workers, "PROCESS_PARSE_BYTES", 0)
+    with open(os.path.join(os.environ["DEALS_DIR"], SAMPLES[0])) as f:
+        text = f.read()
+    # Warm the parse pool, then tie up every batch worker
+    workers.parse_document(risk_engine, text)
+    pool = workers.get_process_pool()
+    busy = [pool.submit(time.sleep, 2) for _ in range(pool._max_workers * 2)]
+
+    started = time.perf_counter()
+    parsed = workers.parse_document(risk_engine, text)
+    assert time.perf_counter() - started < 1
+    assert parsed == risk_engine.parser.parse_document(text)
+    for future in busy:
+        future.cancel()
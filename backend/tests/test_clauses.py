@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize("text", [" ", "   ", "\t\n"])
+def test_blank_search_text_is_rejected(client, text):
+    assert client.get("/api/clauses/search", params={"text": text}).status_code == 400
+    assert client.get("/api/clauses/query", params={"clause": "grace_period", "text": text}).status_code == 400
+
+
+def test_search_strips_text(client):
+    client.post("/api/analyze/", json={"sample_deal_id": "Deal_Leveraged_Aggressive.txt"})
+    padded = client.get("/api/clauses/search", params={"text": "  business days  "}).json()
+    assert padded["count"] > 0
+    assert padded == client.get("/api/clauses/search", params={"text": "business days"}).json()
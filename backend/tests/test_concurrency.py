@@ -0,0 +1,63 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+LLM_LATENCY = 1.0
+IN_FLIGHT = 8
+# Generous for shared CI machines; a stalled event loop shows up as ~LLM_LATENCY
+PORTFOLIO_P99_MS = 250
+# Large enough that hashing or parsing it on the event loop would show in the portfolio latencies
+DOCUMENT_BYTES = 2 * 1024 * 1024
+
+
+def _p99(samples):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def test_portfolio_stays_fast_while_analyses_are_in_flight(client, monkeypatch):
+    from app.api import analyze
+    from app.main import app
+
+    explainer = analyze.risk_engine.ai_explainer
+
+    def slow_explanations(risk_items, template_context=''):
+        time.sleep(LLM_LATENCY)
+        return [explainer._fallback_explanation(risk_data) for risk_data in risk_items]
+
+    monkeypatch.setattr(explainer, "generate_explanations", slow_explanations)
+    with open(os.path.join(os.environ["DEALS_DIR"], "Deal_Leveraged_Aggressive.txt")) as f:
+        text = f.read()
+    # Padded out with schedule boilerplate, as the largest real agreements are
+    filler = "This Schedule is intentionally left blank and forms part of this Agreement.\n"
+    text += filler * (DOCUMENT_BYTES // len(filler))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as http:
+            # Unique text per request, so none is answered from the result cache
+            analyses = [
+                asyncio.create_task(http.post("/api/analyze/", json={"deal_text": f"{text}\n\nConcurrency test copy {time.time_ns()}-{i}\n"}))
+                for i in range(IN_FLIGHT)
+            ]
+            await asyncio.sleep(0.05)
+            latencies = []
+            while len(latencies) < 50:
+                start = time.perf_counter()
+                response = await http.get("/api/portfolio/")
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+            still_running = sum(not task.done() for task in analyses)
+            responses = await asyncio.gather(*analyses)
+            return latencies, still_running, responses
+
+    started = time.perf_counter()
+    latencies, still_running, responses = asyncio.run(run())
+
+    assert all(response.status_code == 200 for response in responses)
+    # The analyses really were slow and in flight while the portfolio was read
+    assert time.perf_counter() - started >= LLM_LATENCY
+    assert still_running > 0
+    assert _p99(latencies) < PORTFOLIO_P99_MS, latencies
@@ -0,0 +1,36 @@
+import os
+
+from app.core.deals import DealVersionIndex, parse_version_name
+
+
+def test_version_names():
+    assert parse_version_name("Deal_Delta_Orig.txt") == {'base': 'Deal_Delta', 'kind': 'orig', 'seq': 0}
+    assert parse_version_name("Deal_Delta_Amend12.txt") == {'base': 'Deal_Delta', 'kind': 'amendment', 'seq': 12}
+    assert parse_version_name("Deal_Standalone.txt") == {'base': 'Deal_Standalone', 'kind': 'document', 'seq': 0}
+
+
+def test_amend10_sorts_after_amend2(tmp_path):
+    deals = tmp_path / "deals"
+    deals.mkdir()
+    # Written out of order, so neither creation order nor a text sort gives the lineage order
+    for version in ("Amend10", "Amend2", "Orig", "Amend1"):
+        (deals / f"Deal_Echo_{version}.txt").write_text(f"Deal Echo {version}. The Leverage Ratio shall not exceed 3.00:1.\n")
+    (deals / "Deal_Other_Orig.txt").write_text("Another deal.\n")
+
+    index = DealVersionIndex(str(deals), str(tmp_path / "deal_index.db"))
+    index.sync()
+    assert index.versions("Deal_Echo") == [
+        "Deal_Echo_Orig.txt", "Deal_Echo_Amend1.txt", "Deal_Echo_Amend2.txt", "Deal_Echo_Amend10.txt",
+    ]
+    assert [version['version'] for version in index.lineage("Deal_Echo")] == [0, 1, 2, 10]
+    assert index.bases() == ["Deal_Echo"]
+
+    os.remove(deals / "Deal_Echo_Amend2.txt")
+    index.sync()
+    assert index.versions("Deal_Echo")[-2:] == ["Deal_Echo_Amend1.txt", "Deal_Echo_Amend10.txt"]
+
+
+def test_versions_endpoint(client):
+    response = client.get("/api/amendments/Deal_Delta/versions")
+    assert response.status_code == 200
+    assert response.json()["versions"] == ["Deal_Delta_Orig.txt", "Deal_Delta_Amend1.txt", "Deal_Delta_Amend2.txt"]
@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+
+import pytest
+
+from app.core.risk_engine import AIExplanationEngine, RiskScoringEngine
+
+LLM_TEXT = "Fake explanation."
+
+
+@pytest.fixture
+def findings():
+    scorer = RiskScoringEngine()
+    return [
+        scorer.score('leverage_ratio', 5.5),
+        scorer.score('interest_cover', 2.25),
+        scorer.score('grace_period', 10),
+        scorer.score('cross_default', 10_000_000),
+    ]
+
+
+@pytest.fixture
+def make_engine():
+    engines = []
+
+    def make(**options):
+        engine = AIExplanationEngine(**options)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.close()
+
+
+def test_failed_item_falls_back_alone(fake_anthropic, make_engine, findings, caplog):
+    server = fake_anthropic(delay=0.01, fail_on="Clause: Cross Default")
+    engine = make_engine()
+    assert engine.enabled
+
+    with caplog.at_level(logging.WARNING, logger="app.core.risk_engine"):
+        explanations = engine.generate_explanations(findings)
+
+    assert explanations[:3] == [LLM_TEXT] * 3
+    assert explanations[3] == engine._fallback_explanation(findings[3])
+    assert server.requests == 4
+    failures = [record for record in caplog.records if "Cross Default Threshold failed" in record.getMessage()]
+    assert len(failures) == 1
+    # The traceback is only logged at DEBUG
+    assert failures[0].levelno == logging.WARNING and failures[0].exc_info is None
+    # Failures are not cached: the next request tries the failed item again
+    engine.generate_explanations(findings)
+    assert server.requests == 5
+
+
+def test_hung_call_falls_back_after_timeout(fake_anthropic, make_engine, findings):
+    fake_anthropic(delay=0.01, hang_on="Clause: Cross Default", hang_for=10)
+    engine = make_engine(timeout=0.5)
+
+    started = time.perf_counter()
+    explanations = engine.generate_explanations(findings)
+    elapsed = time.perf_counter() - started
+
+    assert 0.5 <= elapsed < 3
+    assert explanations[:3] == [LLM_TEXT] * 3
+    assert explanations[3] == engine._fallback_explanation(findings[3])
+
+
+def test_one_client_serves_every_request(fake_anthropic, make_engine, findings, monkeypatch):
+    import anthropic
+
+    created = []
+
+    class CountingClient(anthropic.AsyncAnthropic):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(anthropic, "AsyncAnthropic", CountingClient)
+    server = fake_anthropic(delay=0.05)
+    engine = make_engine(max_concurrency=4)
+
+    for _ in range(3):
+        engine.cache.clear()
+        assert engine.generate_explanations(findings) == [LLM_TEXT] * 4
+
+    assert len(created) == 1
+    assert server.requests == 12
+    # Pooled keep-alive connections: no more than the concurrency cap, not one per call
+    assert len(server.connections) <= 4
+
+
+def test_memory_tier_honours_ttl(monkeypatch):
+    from app.core import explanation_cache
+    from app.core.explanation_cache import ExplanationCache
+
+    now = [1000.0]
+    monkeypatch.setattr(explanation_cache.time, "time", lambda: now[0])
+    cache = ExplanationCache(ttl=60)
+    cache.put("key", LLM_TEXT)
+    now[0] += 59
+    assert cache.get("key") == LLM_TEXT
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_results_with_fallbacks_are_not_cached(client, fake_anthropic, make_engine, monkeypatch):
+    from app.api import analyze
+
+    server = fake_anthropic(delay=0.01, fail_on="Clause: Leverage")
+    monkeypatch.setattr(analyze.risk_engine, "ai_explainer", make_engine())
+    with open(os.path.join(os.environ["DEALS_DIR"], "Deal_Leveraged_Aggressive.txt")) as f:
+        # Unique text, so no result cached by another test is served
+        request = {"deal_text": f.read() + "\nFallback caching test copy\n"}
+
+    first = client.post("/api/analyze/", json=request)
+    assert first.status_code == 200
+    calls = server.requests
+    # The failed finding is asked for again rather than served from the result cache
+    second = client.post("/api/analyze/", json=request)
+    assert second.status_code == 200
+    assert server.requests == calls + 1
+
+    server.fail_on = None
+    client.post("/api/analyze/", json=request)
+    calls = server.requests
+    client.post("/api/analyze/", json=request)
+    assert server.requests == calls
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from app.core.jobs import JobQueue
+
+
+def _wait(queue, job_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if queue.status(job_id)['status'] == status:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_interactive_lane_starts_while_bulk_workers_are_busy():
+    release = threading.Event()
+
+    def runner(payload, progress):
+        progress('parse')
+        if payload['kind'] == 'bulk':
+            release.wait(5)
+        return payload['kind']
+
+    queue = JobQueue(runner, workers=2, reserved_workers=1)
+    try:
+        bulk = [queue.submit({'kind': 'bulk'}, priority='bulk') for _ in range(4)]
+        assert _wait(queue, bulk[1]['id'], 'running')
+        # Both general workers are busy and two bulk jobs are still waiting
+        assert queue.get_stats()['queued']['bulk'] == 2
+
+        interactive = queue.submit({'kind': 'interactive'})
+        assert _wait(queue, interactive['id'], 'done', timeout=1)
+        assert queue.result(interactive['id'])['result'] == 'interactive'
+        assert queue.status(bulk[3]['id'])['status'] == 'queued'
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_job_endpoint_runs_analysis(client):
+    response = client.post("/api/analyze/jobs", json={"sample_deal_id": "Deal_InvestmentGrade_Clean.txt"})
+    assert response.status_code == 202
+    job_id = response.json()['id']
+
+    deadline = time.monotonic() + 10
+    while client.get(f"/api/analyze/jobs/{job_id}").json()['status'] not in ('done', 'failed'):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    status = client.get(f"/api/analyze/jobs/{job_id}").json()
+    assert status['progress'] == {'parse': 'done', 'score': 'done', 'explain': 'done'}
+    result = client.get(f"/api/analyze/jobs/{job_id}/result").json()
+    assert result == client.post("/api/analyze/", json={"sample_deal_id": "Deal_InvestmentGrade_Clean.txt"}).json()
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/analyze/jobs/missing").status_code == 404
@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.risk_engine import LMADocumentParser
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return LMADocumentParser()
+
+
+@pytest.mark.parametrize("text, vintage", [
+    ("This Agreement is dated 15 March 2021 and made between", "2021"),
+    ("THIS AGREEMENT is dated [●] 2019 between", "2019"),
+    ("This agreement dated as of March 15, 2021 is made between", "2021"),
+    ("This Agreement is made on the 15th day of March, 2018 between", "2018"),
+    ("This Agreement is dated as of the 1st day of June, 2022 between", "2022"),
+    ("This Agreement sets out the terms of the facility.", None),
+])
+def test_vintage_from_agreement_date(parser, text, vintage):
+    assert parser.deal_metadata(parser.parse_document(text))['vintage'] == vintage
+
+
+def test_incremental_parse_matches_whole_document(parser):
+    text = "Recitals.\nThis agreement dated as of March 15, 2021 is governed by English law.\n" * 3
+    parse = parser.incremental()
+    for start in range(0, len(text), 7):
+        parse.feed(text[start:start + 7])
+    assert parse.finish() == parser.parse_document(text)
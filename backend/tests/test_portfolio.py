@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import re
+import zipfile
+
+
+def _result(**overrides):
+    result = {
+        "deal_name": "Manual Entry Facility",
+        "overall_score": 4.0,
+        "risk_label": "Medium",
+        "counts": {"High": 0, "Medium": 1, "Low": 2},
+    }
+    result.update(overrides)
+    return result
+
+
+def test_add_without_deviations(client):
+    response = client.post("/api/portfolio/add", json=_result())
+    assert response.status_code == 200
+    item = response.json()["item"]
+    assert item["deal_name"] == "Manual Entry Facility"
+    assert item["risk_label"] == "Medium"
+    assert client.get("/api/portfolio/stats/verify").json()["consistent"]
+
+
+def _undated_deal():
+    with open(os.path.join(os.environ["DEALS_DIR"], "Deal_Leveraged_Aggressive.txt")) as f:
+        text = f.read()
+    undated = re.sub(r"(?i)agreement\s+(is\s+)?(dated|made\s+on)", "agreement", text)
+    assert undated != text
+    return undated
+
+
+def test_non_numeric_vintage_counts_as_legacy(client):
+    before = client.get("/api/portfolio/stats").json()["pre_2020_documentation"]
+    response = client.post("/api/analyze/add-to-portfolio", json={"deal_text": _undated_deal()})
+    assert response.status_code == 200
+    assert response.json()["portfolio_status"]["item"]["vintage"] == "N/A"
+    assert client.get("/api/portfolio/stats").json()["pre_2020_documentation"] == before + 1
+    assert client.get("/api/portfolio/stats/verify").json()["consistent"]
+
+
+def test_add_ignores_metadata_from_client(client):
+    params = {"jurisdiction": "Irish Law", "vintage": "1999", "facility_type": "Bridge Facility"}
+    response = client.post("/api/portfolio/add", params=params, json=_result(deal_name="Relabelled Facility"))
+    assert response.status_code == 200
+    item = response.json()["item"]
+    assert item["jurisdiction"] == "Unknown"
+    assert item["vintage"] != "1999"
+    assert item["facility_type"] is None
+
+
+def test_add_ignores_document_hash_from_client(client):
+    before = client.post("/api/portfolio/backfill-metadata", params={"dry_run": True}).json()
+    response = client.post("/api/portfolio/add", params={"document_hash": "x"}, json=_result(deal_name="Probe Facility"))
+    assert response.status_code == 200
+    after = client.post("/api/portfolio/backfill-metadata", params={"dry_run": True}).json()
+    assert after["deals_with_documents"] == before["deals_with_documents"]
+    assert after["unresolved"] == before["unresolved"]
+
+
+def test_vintage_filters_compare_years(client):
+    response = client.post("/api/analyze/add-to-portfolio", json={"deal_text": _undated_deal() + "\nVintage filter copy\n"})
+    assert response.status_code == 200
+    deal_id = response.json()["portfolio_status"]["item"]["id"]
+
+    recent = client.get("/api/portfolio/deals", params={"vintage_from": 2019, "limit": 1000}).json()["items"]
+    assert deal_id not in {item["id"] for item in recent}
+    assert all(item["vintage"] >= "2019" and item["vintage"].isdigit() for item in recent)
+    legacy = client.get("/api/portfolio/deals", params={"vintage_to": 2019, "limit": 1000}).json()["items"]
+    assert deal_id in {item["id"] for item in legacy}
+
+
+def test_stream_filters_vintage(client):
+    response = client.post("/api/analyze/add-to-portfolio", json={"deal_text": _undated_deal() + "\nStream filter copy\n"})
+    assert response.status_code == 200
+    deal_id = response.json()["portfolio_status"]["item"]["id"]
+
+    response = client.get("/api/portfolio/deals/stream", params={"vintage_from": 2019})
+    assert response.status_code == 200
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed
+    assert deal_id not in {item["id"] for item in streamed}
+    assert all(int(item["vintage"]) >= 2019 for item in streamed)
+
+    response = client.get("/api/report/export", params={"format": "text", "vintage_to": 2019})
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as pack:
+        assert pack.namelist()
+
+
+def test_missing_governing_law_is_unknown(client):
+    from app.core.amendments import deal_index
+    from app.core.clause_index import clause_index
+
+    with open(os.path.join(os.environ["DEALS_DIR"], "Deal_Leveraged_Aggressive.txt")) as f:
+        text = re.sub(r"(?i)governed\s+by", "construed under", f.read())
+    response = client.post("/api/analyze/add-to-portfolio", json={"deal_text": text})
+    assert response.status_code == 200
+    assert response.json()["portfolio_status"]["item"]["jurisdiction"] == "Unknown"
+
+    # The deals directory's link for the same document agrees
+    path = os.path.join(os.environ["DEALS_DIR"], "Deal_Ungoverned.txt")
+    with open(path, "w") as f:
+        f.write(text)
+    try:
+        deal_index.sync()
+        jurisdictions = {deal["deal"]: deal["jurisdiction"] for deal in clause_index.query("leverage_ratio", source="file")}
+        assert jurisdictions["file:Deal_Ungoverned.txt"] == "Unknown"
+    finally:
+        os.remove(path)
+        deal_index.sync()
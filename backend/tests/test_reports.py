@@ -0,0 +1,15 @@
+def test_report_follows_metadata_updates(client):
+    from app.api.portfolio import portfolio_store
+
+    response = client.post("/api/analyze/add-to-portfolio", json={"sample_deal_id": "Deal_Delta_Orig.txt"})
+    deal_id = response.json()["portfolio_status"]["item"]["id"]
+    first = client.get(f"/api/report/{deal_id}").text
+    assert "Vintage: 1999" not in first
+
+    portfolio_store.update_metadata({int(deal_id): {"jurisdiction": "Irish Law", "vintage": "1999"}})
+    second = client.get(f"/api/report/{deal_id}").text
+    assert "Jurisdiction: Irish Law    Vintage: 1999" in second
+    # Unchanged rows are still served from the cache
+    hits = client.get("/api/report/cache/stats").json()["hits"]
+    assert client.get(f"/api/report/{deal_id}").text == second
+    assert client.get("/api/report/cache/stats").json()["hits"] == hits + 1
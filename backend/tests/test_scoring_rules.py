@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.core.bulk_scoring import ladders, score_covenant
+from app.core.risk_engine import RiskScoringEngine
+from app.core.scoring_rules import CompiledClause, RuleError
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return RiskScoringEngine()
+
+
+@pytest.mark.parametrize("standard", [3.0, 3.2, 4.0])
+def test_leverage_bands_follow_the_standard(scorer, standard):
+    # Medium up to half a turn over the standard, High to one and a half, then the top band
+    expected = [(0.0, 0), (0.3, 4), (0.5, 4), (0.51, 7), (1.5, 7), (1.6, 9)]
+    for offset, risk_score in expected:
+        assert scorer.score('leverage_ratio', standard + offset, standard)['risk_score'] == risk_score, offset
+
+
+def test_vectorized_scores_match_at_band_edges(scorer):
+    rules = scorer.rules
+    for key, ladder in ladders(rules).items():
+        standards = [scorer.standards[ladder['standard']], 3.2, 2.7]
+        for standard in standards:
+            values = np.array([standard + delta for delta in np.arange(-3, 3.01, 0.1)])
+            scored = score_covenant(ladder, values, standard)
+            scalar = [scorer.score(key, float(value), standard)['risk_score'] for value in values]
+            assert scored['risk_score'].tolist() == scalar, (key, standard)
+
+
+def test_bands_cannot_mix_bounds_and_offsets():
+    rule = {
+        "key": "leverage_ratio", "clause": "Financial Covenants", "type": "Leverage Ratio",
+        "value": "float", "standard": "leverage_ratio_leveraged", "worse": "higher",
+        "within": {"risk_level": "Low", "risk_score": 0, "severity": "-"},
+        "bands": [
+            {"offset": 0.5, "risk_level": "Medium", "risk_score": 4, "severity": "-"},
+            {"bound": 5.5, "risk_level": "High", "risk_score": 7, "severity": "-"},
+            {"risk_level": "High", "risk_score": 9, "severity": "-"},
+        ],
+    }
+    with pytest.raises(RuleError):
+        CompiledClause(rule)
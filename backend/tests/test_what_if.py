@@ -0,0 +1,76 @@
+import os
+
+from app.core.scoring_rules import LEVELS
+
+SAMPLES = [
+    "Deal_Leveraged_Aggressive.txt",
+    "Deal_InvestmentGrade_Clean.txt",
+    "Deal_Distressed_Multiple_Waivers.txt",
+    "Deal_Delta_Orig.txt",
+    "Deal_Delta_Amend1.txt",
+    "Deal_Delta_Amend2.txt",
+]
+
+
+def _add_samples(client):
+    for sample in SAMPLES:
+        response = client.post("/api/analyze/add-to-portfolio", json={"sample_deal_id": sample})
+        assert response.status_code == 200
+
+
+def test_current_scenario_reproduces_stored_scores(client):
+    from app.api.analyze import risk_engine
+    from app.api.portfolio import portfolio_columns
+    from app.core.bulk_scoring import book_standards, rescore
+
+    _add_samples(client)
+    columns = portfolio_columns().refresh()
+    rules = risk_engine.scorer.rules
+    score, label, red_flag = rescore(columns, book_standards(columns, risk_engine.scorer.standards, rules), rules)
+
+    for i, deal_id in enumerate(columns['id']):
+        assert score[i] == columns['risk_score'][i], f"deal {deal_id}"
+        assert label[i] == columns['risk_label'][i], f"deal {deal_id}"
+        assert red_flag[i] == columns['is_red_flag'][i], f"deal {deal_id}"
+
+    # The endpoint's "current" column is the stored book
+    result = client.post("/api/portfolio/what-if", json={"standards": {}}).json()
+    deals = client.get("/api/portfolio/").json()
+    assert result['current']['labels'] == {level: sum(d['risk_label'] == level for d in deals) for level in LEVELS}
+    assert result['current']['red_flags'] == sum(d['is_red_flag'] for d in deals)
+    assert result['current'] == result['proposed']
+    assert result['largest_moves'] == []
+
+
+def test_proposed_standard_matches_reanalysis(client):
+    from app.api.analyze import risk_engine, template_registry
+
+    _add_samples(client)
+    template = template_registry.get("LMA_Leveraged_2023.txt")
+    proposed = {**template['standards'], 'leverage_ratio_leveraged': 6.0}
+    result = client.post("/api/portfolio/what-if", json={"standards": {'leverage_ratio_leveraged': 6.0}}).json()
+
+    moves = {move['id']: move for move in result['largest_moves']}
+    assert moves
+    for deal in client.get("/api/portfolio/").json():
+        if deal['id'] not in moves:
+            continue
+        name = deal['deal_name'].replace(" ", "_") + ".txt"
+        with open(os.path.join(os.environ["DEALS_DIR"], name)) as f:
+            reanalysis = risk_engine.analyze_deal(f.read(), template['text'], proposed)
+        assert moves[deal['id']]['proposed_score'] == reanalysis['overall_score']
+        assert moves[deal['id']]['proposed_label'] == reanalysis['risk_label']
+
+
+def test_unknown_standard_is_rejected(client):
+    from app.api.analyze import risk_engine
+    from app.api.portfolio import portfolio_columns
+    from app.core.bulk_scoring import book_standards
+
+    columns = portfolio_columns().refresh()
+    valid = book_standards(columns, risk_engine.scorer.standards, risk_engine.scorer.rules)
+    for key in ('leverage_ratio_leverged', 'leverage_ratio_investment_grade'):
+        response = client.post("/api/portfolio/what-if", json={"standards": {key: 6.0}})
+        assert response.status_code == 400
+        assert key in response.json()['detail']
+        assert all(valid_key in response.json()['detail'] for valid_key in valid)
@@ -28,7 +28,11 @@ api.interceptors.response.use(
   }
 );
 
-export const getReportUrl = (dealName: string) => `${API_BASE_URL.replace('/api','')}/api/report/${encodeURIComponent(dealName)}`;
+export const getReportUrl = (dealId: string, format: 'text' | 'html' | 'pdf' = 'text') => `${API_BASE_URL}/report/${encodeURIComponent(dealId)}?format=${format}`;
+
+// Zip of reports for a portfolio slice (same filters as /portfolio/deals)
+export const getReportExportUrl = (filters: Record<string, string> = {}, format: 'text' | 'html' | 'pdf' = 'pdf') =>
+  `${API_BASE_URL}/report/export?${new URLSearchParams({ ...filters, format })}`;
 
 export const analyzeDeal = async (sampleDealId?: string, dealText?: string) => {
   const response = await api.post('/analyze/', {
@@ -39,21 +43,101 @@ export const analyzeDeal = async (sampleDealId?: string, dealText?: string) => {
   return response.data;
 };
 
+// Multipart upload - the server parses the file as it streams in
+export const analyzeUpload = async (file: File, templateId: string = "LMA_Leveraged_2023.txt") => {
+  const form = new FormData();
+  form.append('file', file);
+  const response = await api.post('/analyze/upload', form, {
+    params: { template_id: templateId },
+    headers: { 'Content-Type': 'multipart/form-data' },
+  });
+  return response.data;
+};
+
+export const submitAnalysisJob = async (sampleDealId?: string, dealText?: string, priority: 'interactive' | 'bulk' = 'interactive') => {
+  const response = await api.post('/analyze/jobs', {
+    sample_deal_id: sampleDealId,
+    deal_text: dealText,
+    template_id: "LMA_Leveraged_2023.txt",
+    priority,
+  });
+  return response.data;
+};
+
+export const getAnalysisJob = async (jobId: string) => {
+  const response = await api.get(`/analyze/jobs/${jobId}`);
+  return response.data;
+};
+
+export const getAnalysisJobResult = async (jobId: string) => {
+  const response = await api.get(`/analyze/jobs/${jobId}/result`);
+  return response.data;
+};
+
+export const analyzeBatch = async (sampleDealIds: string[]) => {
+  const response = await api.post('/analyze/batch', {
+    deals: sampleDealIds.map((id) => ({
+      sample_deal_id: id,
+      template_id: "LMA_Leveraged_2023.txt"
+    }))
+  });
+  return response.data;
+};
+
+export const analyzeMulti = async (sampleDealId: string, templateIds: string[]) => {
+  const response = await api.post('/analyze/multi', {
+    sample_deal_id: sampleDealId,
+    template_ids: templateIds
+  });
+  return response.data;
+};
+
 export const getSamples = async () => {
   const response = await api.get('/analyze/samples');
   return response.data.samples;
 };
 
+export const getTemplates = async () => {
+  const response = await api.get('/analyze/templates');
+  return response.data.templates;
+};
+
 export const getPortfolio = async () => {
   const response = await api.get('/portfolio/');
   return response.data;
 };
 
+export interface PortfolioQuery {
+  jurisdiction?: string;
+  vintage_from?: number;
+  vintage_to?: number;
+  risk_label?: string;
+  is_red_flag?: boolean;
+  sort?: 'id' | 'risk_score' | '-risk_score';
+  limit?: number;
+  cursor?: string;
+}
+
+export const getPortfolioPage = async (query: PortfolioQuery = {}) => {
+  const response = await api.get('/portfolio/deals', { params: query });
+  return response.data;
+};
+
+export const getPortfolioStats = async () => {
+  const response = await api.get('/portfolio/stats');
+  return response.data;
+};
+
 export const getVersions = async (baseName: string) => {
   const response = await api.get(`/amendments/${baseName}/versions`);
   return response.data.versions;
 };
 
+export const getCovenantTimeline = async (baseName: string) => {
+  const response = await api.get(`/amendments/${baseName}/timeline`);
+  return response.data;
+};
+
 export const compareVersions = async (v1: string, v2: string) => {
   const response = await api.get(`/amendments/compare`, { params: { v1, v2 } });
   return response.data;
@@ -1,10 +1,19 @@
 import React, { useState, useEffect } from 'react';
-import { getVersions, compareVersions } from '../api/client';
-import { GitCommit, ArrowRight, Clock, FileDiff } from 'lucide-react';
+import { getCovenantTimeline, compareVersions } from '../api/client';
+import { CovenantTimeline } from '../types';
+import { GitCommit, ArrowRight, Clock, FileDiff, TrendingUp } from 'lucide-react';
+
+const DIRECTION_STYLES: Record<string, string> = {
+  loosened: 'text-red-700 bg-red-50',
+  tightened: 'text-green-700 bg-green-50',
+  added: 'text-amber-700 bg-amber-50',
+  removed: 'text-amber-700 bg-amber-50',
+};
 
 const AmendmentsPage = () => {
   const [baseDeal, setBaseDeal] = useState('Deal_Delta');
   const [versions, setVersions] = useState<string[]>([]);
+  const [timeline, setTimeline] = useState<CovenantTimeline | null>(null);
   const [v1, setV1] = useState('');
   const [v2, setV2] = useState('');
   const [diff, setDiff] = useState<any>(null);
@@ -12,7 +21,10 @@ const AmendmentsPage = () => {
 
   useEffect(() => {
     // Load versions for the demo deal
-    getVersions(baseDeal).then(vs => {
+    // One call gives the lineage and every version's covenants
+    getCovenantTimeline(baseDeal).then((t: CovenantTimeline) => {
+      const vs = t.versions.map(v => v.filename);
+      setTimeline(t);
       setVersions(vs);
       if (vs.length >= 1) setV1(vs[0]);
       if (vs.length >= 2) setV2(vs[1]);
@@ -90,6 +102,51 @@ const AmendmentsPage = () => {
         </div>
       </div>
 
+      {/* Covenant Evolution */}
+      {timeline && timeline.versions.length > 0 && (
+        <div className="bg-white rounded-xl border border-slate-200 shadow-sm overflow-hidden">
+          <div className="px-6 py-4 border-b border-slate-200 bg-slate-50 flex items-center space-x-2">
+            <TrendingUp size={18} className="text-slate-500" />
+            <h3 className="font-semibold text-slate-900">Covenant Evolution</h3>
+          </div>
+          <div className="p-6 overflow-x-auto">
+            <table className="w-full text-sm">
+              <thead>
+                <tr className="text-left text-slate-500">
+                  <th className="py-2 pr-4 font-medium">Covenant</th>
+                  {timeline.versions.map(v => (
+                    <th key={v.filename} className="py-2 px-3 font-medium">
+                      {v.filename.replace(`${timeline.base}_`, '').replace('.txt', '')}
+                    </th>
+                  ))}
+                </tr>
+              </thead>
+              <tbody>
+                {Object.keys(timeline.versions[0].covenants)
+                  .filter(key => timeline.versions.some(v => v.covenants[key] !== null))
+                  .map(key => (
+                    <tr key={key} className="border-t border-slate-100">
+                      <td className="py-2 pr-4 text-slate-700">{key.replace(/_/g, ' ')}</td>
+                      {timeline.versions.map((v, idx) => {
+                        const change = idx > 0
+                          ? timeline.deltas[idx - 1].changes.find(c => c.covenant === key)
+                          : undefined;
+                        return (
+                          <td key={v.filename} className="py-2 px-3">
+                            <span className={`px-2 py-0.5 rounded ${change ? DIRECTION_STYLES[change.direction] : 'text-slate-600'}`}>
+                              {v.covenants[key] ?? '—'}
+                            </span>
+                          </td>
+                        );
+                      })}
+                    </tr>
+                  ))}
+              </tbody>
+            </table>
+          </div>
+        </div>
+      )}
+
       {/* Diff Output */}
       <div className="bg-white rounded-xl border border-slate-200 shadow-sm overflow-hidden min-h-[400px]">
          <div className="px-6 py-4 border-b border-slate-200 bg-slate-50 flex items-center space-x-2">
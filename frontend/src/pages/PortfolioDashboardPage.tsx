@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
-import { getPortfolio } from '../api/client';
-import { PortfolioItem } from '../types';
+import { getPortfolioPage, getPortfolioStats, getReportExportUrl } from '../api/client';
+import { PortfolioItem, PortfolioPage, PortfolioStats } from '../types';
 import { Filter, ArrowUpDown, AlertCircle, FileText, Globe, Calendar } from 'lucide-react';
 
 type RiskLevel = 'High' | 'Medium' | 'Low';
@@ -13,26 +13,50 @@ const RiskPill = ({ level }: { level: RiskLevel }) => {
   return <span className={`px-2 py-0.5 rounded text-xs font-semibold ${colors[level]}`}>{level}</span>;
 };
 
+const PAGE_SIZE = 50;
+
 const PortfolioDashboardPage = () => {
   const [data, setData] = useState<PortfolioItem[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [stats, setStats] = useState<PortfolioStats | null>(null);
   const [loading, setLoading] = useState(true);
   const [filterJur, setFilterJur] = useState('All');
+  const [sortByRisk, setSortByRisk] = useState(false);
+
+  // Filtering and sorting happen server-side; only the visible window is fetched
+  const fetchPage = (cursor?: string) => getPortfolioPage({
+    jurisdiction: filterJur === 'All' ? undefined : filterJur,
+    sort: sortByRisk ? '-risk_score' : 'id',
+    limit: PAGE_SIZE,
+    cursor,
+  }) as Promise<PortfolioPage>;
 
   useEffect(() => {
-    getPortfolio().then(d => {
-      setData(d);
+    getPortfolioStats().then(setStats);
+  }, []);
+
+  useEffect(() => {
+    setLoading(true);
+    fetchPage().then(page => {
+      setData(page.items);
+      setNextCursor(page.next_cursor);
       setLoading(false);
     });
-  }, []);
+  }, [filterJur, sortByRisk]);
 
-  const filteredData = filterJur === 'All' 
-    ? data 
-    : data.filter(d => d.jurisdiction === filterJur);
+  const loadMore = () => {
+    if (!nextCursor) return;
+    fetchPage(nextCursor).then(page => {
+      setData(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    });
+  };
 
-  // Calculate stats
-  const totalDeals = data.length;
-  const highRiskDeals = data.filter(d => d.risk_label === 'High').length;
-  const avgScore = (data.reduce((acc, curr) => acc + curr.risk_score, 0) / totalDeals).toFixed(1);
+  // Book-wide figures come from the maintained aggregates, not the loaded window
+  const totalDeals = stats?.total_deals ?? 0;
+  const highRiskDeals = stats?.high_risk_count ?? 0;
+  const avgScore = (stats?.average_risk_score ?? 0).toFixed(1);
+  const jurisdictions = Object.keys(stats?.jurisdiction_breakdown ?? {});
 
   return (
     <div className="space-y-6">
@@ -41,9 +65,13 @@ const PortfolioDashboardPage = () => {
            <h1 className="text-2xl font-bold text-slate-900">Portfolio Compliance</h1>
            <p className="text-slate-500">Monitor documentation risk across your loan book.</p>
         </div>
-        <button className="bg-white border border-slate-300 text-slate-700 px-4 py-2 rounded-md text-sm font-medium hover:bg-slate-50">
+        {/* Committee pack: zip of per-deal reports for the current filter */}
+        <a
+           href={getReportExportUrl(filterJur === 'All' ? {} : { jurisdiction: filterJur })}
+           className="bg-white border border-slate-300 text-slate-700 px-4 py-2 rounded-md text-sm font-medium hover:bg-slate-50"
+        >
            Export Report
-        </button>
+        </a>
       </div>
 
       {/* Summary Stats */}
@@ -90,10 +118,9 @@ const PortfolioDashboardPage = () => {
               className="border-none bg-slate-100 rounded-md py-1 pl-2 pr-8 text-sm focus:ring-0"
             >
               <option value="All">All Jurisdictions</option>
-              <option value="English Law">English Law</option>
-              <option value="Irish Law">Irish Law</option>
-              <option value="Luxembourg">Luxembourg</option>
-              <option value="UAE">UAE</option>
+              {jurisdictions.map(jur => (
+                <option key={jur} value={jur}>{jur}</option>
+              ))}
             </select>
           </div>
         </div>
@@ -113,8 +140,15 @@ const PortfolioDashboardPage = () => {
                 <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-slate-500 uppercase tracking-wider">
                   Vintage
                 </th>
-                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-slate-500 uppercase tracking-wider">
-                   Risk Score
+                <th
+                  scope="col"
+                  onClick={() => setSortByRisk(!sortByRisk)}
+                  className="px-6 py-3 text-left text-xs font-medium text-slate-500 uppercase tracking-wider cursor-pointer hover:text-slate-700"
+                >
+                  <div className="flex items-center space-x-1">
+                    <span>Risk Score</span>
+                    <ArrowUpDown size={12} className={sortByRisk ? 'text-slate-700' : ''} />
+                  </div>
                 </th>
                 <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-slate-500 uppercase tracking-wider">
                    Deviations (H/M/L)
@@ -131,7 +165,7 @@ const PortfolioDashboardPage = () => {
                     Loading portfolio data...
                   </td>
                 </tr>
-              ) : filteredData.map((item) => (
+              ) : data.map((item) => (
                 <tr key={item.id} className={`hover:bg-slate-50 transition-colors ${item.is_red_flag ? 'bg-red-50/30' : ''}`}>
                   <td className="px-6 py-4 whitespace-nowrap">
                     <div className="flex items-center">
@@ -183,6 +217,13 @@ const PortfolioDashboardPage = () => {
             </tbody>
           </table>
         </div>
+        {!loading && nextCursor && (
+          <div className="px-6 py-3 border-t border-slate-200 text-center">
+            <button onClick={loadMore} className="text-sm font-medium text-brand-600 hover:text-brand-700">
+              Load more
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -22,6 +22,8 @@ const SingleDealPage = () => {
   const [analyzing, setAnalyzing] = useState(false);
   const [result, setResult] = useState<AnalysisResult | null>(null);
   const [selectedDeviation, setSelectedDeviation] = useState<Deviation | null>(null);
+  // Reports are rendered from the stored analysis, so they need the portfolio id
+  const [portfolioId, setPortfolioId] = useState<string | null>(null);
 
   useEffect(() => {
     getSamples().then(setSamples);
@@ -31,6 +33,7 @@ const SingleDealPage = () => {
     if (!selectedSample) return;
     setAnalyzing(true);
     setResult(null);
+    setPortfolioId(null);
     try {
       // Artificial delay for effect
       await new Promise(resolve => setTimeout(resolve, 800));
@@ -107,19 +110,21 @@ const SingleDealPage = () => {
             </div>
             <div className="flex items-center space-x-3">
                <button 
-                onClick={() => setResult(null)}
+                onClick={() => { setResult(null); setPortfolioId(null); }}
                 className="text-slate-500 hover:text-slate-700 text-sm font-medium"
                >
                  Analyze Another
                </button>
-               <a 
-                 href={getReportUrl(result.deal_name)}
-                 target="_blank"
-                 rel="noreferrer"
-                 className="bg-white border border-slate-300 text-slate-700 px-4 py-2 rounded-md text-sm font-medium hover:bg-slate-50 flex items-center"
-               >
-                 Download Report
-               </a>
+               {portfolioId && (
+                 <a 
+                   href={getReportUrl(portfolioId, 'pdf')}
+                   target="_blank"
+                   rel="noreferrer"
+                   className="bg-white border border-slate-300 text-slate-700 px-4 py-2 rounded-md text-sm font-medium hover:bg-slate-50 flex items-center"
+                 >
+                   Download Report
+                 </a>
+               )}
             </div>
           </div>
 
@@ -174,10 +179,11 @@ const SingleDealPage = () => {
             <button 
               onClick={async () => {
                 try {
-                  await api.post('/analyze/add-to-portfolio', {
+                  const response = await api.post('/analyze/add-to-portfolio', {
                     sample_deal_id: selectedSample,
                     template_id: "LMA_Leveraged_2023.txt"
                   });
+                  setPortfolioId(response.data.portfolio_status.item.id);
                   alert('Added to portfolio successfully!');
                 } catch (err) {
                   console.error(err);
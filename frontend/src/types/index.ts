@@ -19,6 +19,33 @@ export interface AnalysisResult {
   };
 }
 
+export interface BatchAnalysisResult {
+  results: AnalysisResult[];
+  wall_time_ms: number;
+}
+
+export interface DeviationCell {
+  risk_level: 'High' | 'Medium' | 'Low';
+  risk_score: number;
+  standard_value: number | null;
+  deviation_pct: number | null;
+}
+
+export interface DeviationMatrixRow {
+  clause: string;
+  type: string;
+  extracted_value: number | null;
+  templates: Record<string, DeviationCell | null>;
+}
+
+export interface MultiAnalysisResult {
+  deal_name: string;
+  results: AnalysisResult[];
+  matrix: DeviationMatrixRow[];
+  parse_ms: number;
+  score_ms: number;
+}
+
 export interface PortfolioItem {
   id: string;
   deal_name: string;
@@ -30,5 +57,43 @@ export interface PortfolioItem {
   medium_risk_count: number;
   low_risk_count: number;
   is_red_flag: boolean;
+  facility_type?: string | null;
+}
+
+export interface PortfolioPage {
+  items: PortfolioItem[];
+  next_cursor: string | null;
+}
+
+export interface PortfolioStats {
+  total_deals: number;
+  high_risk_count: number;
+  high_risk_percentage: number;
+  average_risk_score: number;
+  jurisdiction_breakdown: Record<string, number>;
+  pre_2020_documentation: number;
+  red_flags: number;
 }
 
+export interface CovenantDelta {
+  covenant: string;
+  label: string;
+  from: number | null;
+  to: number | null;
+  direction: 'loosened' | 'tightened' | 'added' | 'removed' | 'unchanged';
+}
+
+export interface DealVersion {
+  filename: string;
+  version: number;
+  kind: 'orig' | 'amendment' | 'document';
+  hash: string;
+  covenants: Record<string, number | null>;
+}
+
+export interface CovenantTimeline {
+  base: string;
+  versions: DealVersion[];
+  deltas: { version_from: string; version_to: string; changes: CovenantDelta[] }[];
+  net_changes: CovenantDelta[];
+}